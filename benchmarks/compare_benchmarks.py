@@ -0,0 +1,70 @@
+"""
+Compare two benchmark result files written by run_benchmarks.py.
+
+Prints the time and peak-memory ratio (new / old) for every stage and frame
+count present in both files, and exits with status 1 if any stage got slower
+than --threshold, so it can gate nightly jobs.
+
+Usage:
+    python benchmarks/compare_benchmarks.py old.json new.json --threshold 1.2
+"""
+
+import argparse
+import json
+import sys
+
+
+def load_results(file_path):
+    with open(file_path) as f:
+        report = json.load(f)
+    results = {}
+    for result in report["results"]:
+        if "skipped" in result:
+            continue
+        results[(result["stage"], result["n_frames"])] = result
+    return report, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="time ratio above which a stage counts as a regression "
+                             "(default: 1.2)")
+    args = parser.parse_args(argv)
+
+    old_report, old_results = load_results(args.old)
+    new_report, new_results = load_results(args.new)
+
+    print(f"old: {old_report['commit'][:12]}  new: {new_report['commit'][:12]}")
+    print(f"{'stage':>30} {'n_frames':>9} {'old s':>9} {'new s':>9} "
+          f"{'time x':>7} {'mem x':>7}")
+
+    regressions = []
+    common = old_results.keys() & new_results.keys()
+    for key in sorted(common, key=lambda key: (key[1], key[0])):
+        old, new = old_results[key], new_results[key]
+        if old["seconds_min"] > 0:
+            time_ratio = new["seconds_min"] / old["seconds_min"]
+        else:
+            time_ratio = float("inf")
+        memory_ratio = ""
+        if old.get("peak_bytes") and new.get("peak_bytes") is not None:
+            memory_ratio = f"{new['peak_bytes'] / old['peak_bytes']:.2f}"
+        flag = " <-" if time_ratio > args.threshold else ""
+        print(f"{key[0]:>30} {key[1]:>9} "
+              f"{old['seconds_min']:>9.4f} {new['seconds_min']:>9.4f} "
+              f"{time_ratio:>7.2f} {memory_ratio:>7}{flag}")
+        if flag:
+            regressions.append(key)
+
+    if regressions:
+        print(f"{len(regressions)} stage(s) slower than {args.threshold}x.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""
+Benchmark the preprocessing -> PCA -> reconstruction pipeline stage by stage.
+
+Each stage is timed (best and median of --repeat runs) and, separately,
+memory-profiled with tracemalloc (peak bytes allocated during one run) on
+synthetic data at each frame count. Results are written as JSON so runs on
+different commits can be compared with compare_benchmarks.py.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 1e3 1e4 1e5 --output results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import sklearn
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_synthetic_markers, write_synthetic_csv
+
+from spiderpca import (
+    combine_legs,
+    create_scores_dataframe,
+    get_all_legs_markers,
+    load_and_process_spider_data,
+    make_coxa_origin,
+    reconstruct,
+    reflect_legs,
+    run_PCA,
+    undo_body_rotation,
+)
+
+DEFAULT_SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+NUM_LEGS = 8
+N_RECONSTRUCT_COMPONENTS = 12
+
+
+# ------------------------- STAGES -----------------------------
+# Each stage takes the context built by earlier stages and returns its
+# outputs as a dict, which is merged into the context for later stages.
+
+def stage_load(ctx):
+    marker_data, _, _ = load_and_process_spider_data(ctx["csv_path"])
+    return {"loaded_markers": marker_data}
+
+
+def stage_undo_body_rotation(ctx):
+    return {"rotated": undo_body_rotation(ctx["markers"], ctx["angles"])}
+
+
+def stage_get_all_legs_markers(ctx):
+    all_legs, all_legs_names, _ = get_all_legs_markers(ctx["marker_names"],
+                                                       ctx["rotated"], NUM_LEGS)
+    return {"all_legs": all_legs, "all_legs_names": all_legs_names}
+
+
+def stage_make_coxa_origin(ctx):
+    aligned, coxa = make_coxa_origin(ctx["all_legs"])
+    return {"aligned": aligned, "coxa": coxa}
+
+
+def stage_reflect_combine_legs(ctx):
+    return {"combined": combine_legs(reflect_legs(ctx["aligned"]))}
+
+
+def stage_run_PCA(ctx):
+    principal_components, scores, pca = run_PCA(ctx["rotated"])
+    return {"principal_components": principal_components, "scores": scores, "pca": pca}
+
+
+def stage_run_PCA_legs(ctx):
+    _, scores, _ = run_PCA(ctx["combined"])
+    return {"leg_scores": scores}
+
+
+def stage_create_scores_dataframe(ctx):
+    return {"scores_df": create_scores_dataframe(ctx["scores"], ctx["metadata"])}
+
+
+def stage_reconstruct(ctx):
+    mu = ctx["pca"].mean_.reshape(1, -1, 3)
+    components_list = list(range(N_RECONSTRUCT_COMPONENTS))
+    reconstructed = reconstruct(ctx["scores"], ctx["principal_components"], mu,
+                                components_list)
+    return {"reconstructed": reconstructed}
+
+
+STAGES = {
+    "load_and_process_spider_data": stage_load,
+    "undo_body_rotation": stage_undo_body_rotation,
+    "get_all_legs_markers": stage_get_all_legs_markers,
+    "make_coxa_origin": stage_make_coxa_origin,
+    "reflect_legs+combine_legs": stage_reflect_combine_legs,
+    "run_PCA": stage_run_PCA,
+    "run_PCA_legs": stage_run_PCA_legs,
+    "create_scores_dataframe": stage_create_scores_dataframe,
+    "reconstruct": stage_reconstruct,
+}
+
+
+# ------------------------- RUNNER -----------------------------
+
+def time_stage(stage, ctx, repeat):
+    """
+    Run a stage repeat times, returning its outputs and the run times in seconds.
+    """
+    times = []
+    outputs = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            outputs = stage(ctx)
+        times.append(time.perf_counter() - start)
+    return outputs, times
+
+
+def profile_stage_memory(stage, ctx):
+    """
+    Peak bytes allocated (as seen by tracemalloc) during one run of a stage.
+    """
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            stage(ctx)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def available_memory():
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def run_size(n_frames, stages, repeat, profile_memory, csv_max_frames, tmp_dir, seed):
+    markers, marker_names, metadata = make_synthetic_markers(n_frames, seed=seed)
+    ctx = {"markers": markers,
+           "marker_names": marker_names,
+           "metadata": metadata,
+           "angles": metadata["whole_body_angle"].to_numpy()}
+
+    results = []
+    for name, stage in STAGES.items():
+        if name not in stages:
+            # Later stages need this stage's outputs, so run it untimed
+            if name != "load_and_process_spider_data":
+                with contextlib.redirect_stdout(io.StringIO()):
+                    ctx.update(stage(ctx))
+            continue
+
+        if name == "load_and_process_spider_data":
+            if n_frames > csv_max_frames:
+                results.append({"stage": name, "n_frames": n_frames,
+                                "skipped": "csv_max_frames"})
+                continue
+            ctx["csv_path"] = os.path.join(tmp_dir, f"spiders_{n_frames}.csv")
+            write_synthetic_csv(ctx["csv_path"], n_frames, seed=seed)
+
+        outputs, times = time_stage(stage, ctx, repeat)
+        result = {"stage": name,
+                  "n_frames": n_frames,
+                  "seconds_min": min(times),
+                  "seconds_median": statistics.median(times),
+                  "repeat": repeat}
+        if profile_memory:
+            result["peak_bytes"] = profile_stage_memory(stage, ctx)
+        results.append(result)
+        ctx.update(outputs)
+
+        memory = f", peak {result['peak_bytes'] / 1e6:.1f} MB" if profile_memory else ""
+        print(f"{name:>30} n={n_frames:>9}: {result['seconds_min']:.4f} s{memory}")
+
+    return results
+
+
+def get_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"],
+                                capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return result.stdout.strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=float, default=DEFAULT_SIZES,
+                        help="frame counts to benchmark (default: 1e3 ... 1e7)")
+    parser.add_argument("--stages", nargs="+",
+                        choices=list(STAGES), default=list(STAGES),
+                        help="stages to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timed runs per stage (default: 3)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip tracemalloc memory profiling")
+    parser.add_argument("--csv-max-frames", type=float, default=1e6,
+                        help="largest frame count for the CSV loading stage "
+                             "(default: 1e6)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None,
+                        help="JSON file to write "
+                             "(default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args(argv)
+
+    commit = get_commit()
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                         "results", f"{commit[:12]}.json")
+
+    report = {"commit": commit,
+              "timestamp": datetime.now(timezone.utc).isoformat(),
+              "environment": {"python": platform.python_version(),
+                              "platform": platform.platform(),
+                              "processor": platform.processor(),
+                              "cpu_count": os.cpu_count(),
+                              "numpy": np.__version__,
+                              "scikit-learn": sklearn.__version__},
+              "results": []}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_frames in sorted(int(size) for size in args.sizes):
+            # markers, rotated copy, leg tensors and PCA copies, ~8 full-size arrays
+            needed = n_frames * 36 * 3 * 8 * 8
+            available = available_memory()
+            if available is not None and needed > available:
+                print(f"Skipping n={n_frames}: needs ~{needed / 1e9:.1f} GB, "
+                      f"{available / 1e9:.1f} GB available.")
+                report["results"].append({"n_frames": n_frames, "skipped": "memory"})
+                continue
+            report["results"] += run_size(n_frames, args.stages, args.repeat,
+                                          not args.no_memory, int(args.csv_max_frames),
+                                          tmp_dir, args.seed)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
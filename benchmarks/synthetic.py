@@ -0,0 +1,134 @@
+"""
+Synthetic spider data with the same column layout as the real recordings.
+
+Legs 1-8 each have claw, tibiametatarsus, patella and coxa markers (x, y, z),
+followed by the body markers. Metadata columns match those used by the
+analysis: species, sq_level, filename, time_in_frames and whole_body_angle.
+"""
+
+import numpy as np
+import pandas as pd
+
+KEYPOINTS = ["claw", "tibiametatarsus", "patella", "coxa"]
+BODY_MARKERS = ["center", "clypeus", "pedicel", "spinneret"]
+NUM_LEGS = 8
+SQ_LEVELS = ["sq040", "sq060", "sq080", "sq100"]
+
+# Distance of each keypoint from the body centre, in metres
+KEYPOINT_RADII = np.array([0.030, 0.022, 0.014, 0.006])
+KEYPOINT_HEIGHTS = np.array([-0.004, 0.004, 0.006, 0.001])
+
+
+def get_marker_names():
+    """
+    Marker names in file order, e.g. ['claw1', 'tibiametatarsus1', ..., 'spinneret'].
+    """
+    leg_markers = [f"{keypoint}{leg}"
+                   for leg in range(1, NUM_LEGS + 1) for keypoint in KEYPOINTS]
+    return leg_markers + BODY_MARKERS
+
+
+def get_marker_columns():
+    return [f"{name}_{axis}" for name in get_marker_names() for axis in "xyz"]
+
+
+def make_mean_shape():
+    """
+    A plausible resting pose, shape (n_markers, 3), in metres.
+    Legs 1-4 are on the right (negative y), legs 5-8 mirror them on the left.
+    """
+    right_angles = np.radians([-40, -75, -105, -140])
+    leg_angles = np.concatenate([right_angles, -right_angles[::-1]])
+
+    legs = np.empty((NUM_LEGS, len(KEYPOINTS), 3))
+    legs[..., 0] = np.cos(leg_angles)[:, None] * KEYPOINT_RADII
+    legs[..., 1] = np.sin(leg_angles)[:, None] * KEYPOINT_RADII
+    legs[..., 2] = KEYPOINT_HEIGHTS
+
+    body = np.array([[0.0, 0.0, 0.0],
+                     [0.006, 0.0, 0.002],
+                     [-0.004, 0.0, 0.001],
+                     [-0.014, 0.0, 0.0]])
+
+    return np.concatenate([legs.reshape(-1, 3), body], axis=0)
+
+
+def make_synthetic_markers(n_frames, seed=0, frames_per_sequence=250, first_frame=0):
+    """
+    Generate marker trajectories and their metadata.
+
+    Each leg swings about its coxa with a per-sequence gait frequency and phase,
+    plus tracking noise, and the whole body pitches slowly. first_frame offsets
+    the frame and sequence numbering, for generating a long recording in chunks.
+
+    Returns:
+        numpy array of marker coordinates [n_frames, n_markers, 3], in metres
+        list of marker names
+        DataFrame of metadata, one row per frame
+    """
+    rng = np.random.default_rng(seed)
+    mean_shape = make_mean_shape()
+    n_markers = mean_shape.shape[0]
+
+    frames = first_frame + np.arange(n_frames)
+    time_in_frames = frames % frames_per_sequence
+    sequence = frames // frames_per_sequence
+    local_sequence = sequence - first_frame // frames_per_sequence
+    n_sequences = int(local_sequence[-1]) + 1 if n_frames else 0
+
+    frequency = rng.uniform(0.02, 0.06, size=n_sequences)[local_sequence]
+    phase = rng.uniform(0, 2 * np.pi, size=(n_sequences, NUM_LEGS))[local_sequence]
+
+    # Alternating tetrapod gait: neighbouring legs half a cycle apart
+    gait_offset = np.pi * (np.arange(NUM_LEGS) % 2)
+    cycle = np.sin(2 * np.pi * frequency[:, None] * time_in_frames[:, None]
+                   + phase + gait_offset)
+    swing = 0.25 * cycle
+    lift = 0.003 * np.clip(cycle, 0, None)
+
+    markers = np.broadcast_to(mean_shape, (n_frames, n_markers, 3)).copy()
+    legs = markers[:, :NUM_LEGS * len(KEYPOINTS)].reshape(n_frames, NUM_LEGS,
+                                                          len(KEYPOINTS), 3)
+
+    # Rotate each leg about its coxa in the x-y plane
+    coxa = legs[:, :, -1:, :].copy()
+    relative = legs - coxa
+    cos = np.cos(swing)[:, :, None]
+    sin = np.sin(swing)[:, :, None]
+    x = relative[..., 0] * cos - relative[..., 1] * sin
+    y = relative[..., 0] * sin + relative[..., 1] * cos
+    relative[..., 0] = x
+    relative[..., 1] = y
+    relative[:, :, :-1, 2] += lift[:, :, None]
+    legs[...] = relative + coxa
+
+    markers += rng.normal(scale=0.0003, size=markers.shape)
+
+    metadata = pd.DataFrame({
+        "species": "carolina",
+        "sq_level": np.array(SQ_LEVELS)[sequence % len(SQ_LEVELS)],
+        "filename": [f"seq{ii:05d}" for ii in sequence],
+        "time_in_frames": time_in_frames,
+        "whole_body_angle": 5 * np.sin(2 * np.pi * time_in_frames / frames_per_sequence)
+                            + rng.normal(scale=0.5, size=n_frames),
+    })
+
+    return markers, get_marker_names(), metadata
+
+
+def write_synthetic_csv(file_path, n_frames, seed=0, chunk_size=100_000):
+    """
+    Write synthetic spider data to a CSV in the raw format (millimetres),
+    generated chunk by chunk so large files do not need to fit in memory.
+    """
+    columns = get_marker_columns()
+    # Keep whole sequences inside a chunk
+    chunk_size = max(250, chunk_size - chunk_size % 250)
+    for start in range(0, n_frames, chunk_size):
+        n_chunk = min(chunk_size, n_frames - start)
+        markers, _, metadata = make_synthetic_markers(n_chunk, seed=seed + start,
+                                                      first_frame=start)
+        chunk = pd.DataFrame(markers.reshape(n_chunk, -1) * 1000, columns=columns)
+        chunk = pd.concat([chunk, metadata], axis=1)
+        chunk.to_csv(file_path, mode="w" if start == 0 else "a", header=start == 0,
+                     index=False)
@@ -1,13 +1,30 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from sklearn.decomposition import PCA
+from sklearn.decomposition import PCA, IncrementalPCA
+
+from .data_memmap import DEFAULT_CHUNK_SIZE, allocate_like, frame_chunks
+
 
-def run_PCA(markers, project_data=None):
+def run_PCA(markers, project_data=None, n_components=None, svd_solver=None, random_state=None,
+            incremental=False, chunk_size=DEFAULT_CHUNK_SIZE):
     """
     Run Principal Component Analysis on the given markers data.
 
     Args:
         markers (np.ndarray): Input marker data.
         project_data (np.ndarray, optional): Additional data to project onto the PCA space.
+        n_components (int or float, optional): Number of components to keep, or a
+            target explained-variance ratio in (0, 1). Default keeps all components.
+        svd_solver (str, optional): sklearn PCA solver, or 'covariance' for the
+            threaded CovariancePCA engine. By default chosen by get_svd_solver:
+            randomized for a small component budget, full for other budgets or
+            thresholds, and sklearn's 'auto' when n_components is not given.
+        random_state (int, optional): Seed for the randomized solver.
+        incremental (bool, optional): Fit and score in chunks of chunk_size frames
+            with run_PCA_incremental, e.g. for np.memmap inputs. Default is False.
+        chunk_size (int, optional): Frames per chunk in incremental mode.
 
     Returns:
         Tuple[np.ndarray, np.ndarray, PCA]: Principal components, scores, and PCA object.
@@ -15,11 +32,21 @@ def run_PCA(markers, project_data=None):
     Raises:
         ValueError: If the input data shapes are inconsistent.
     """
+    if incremental:
+        return run_PCA_incremental(markers, project_chunks=project_data, chunk_size=chunk_size,
+                                   n_components=n_components)
+
     # Reshape the data to be [n, nMarkers*3]
     pca_input = get_PCA_input(markers)
 
+    if svd_solver is None:
+        svd_solver = get_svd_solver(n_components, *pca_input.shape)
+
     # Run PCA
-    pca = PCA()
+    if svd_solver == "covariance":
+        pca = CovariancePCA(n_components=n_components, block_size=chunk_size)
+    else:
+        pca = PCA(n_components=n_components, svd_solver=svd_solver, random_state=random_state)
     pca_output = pca.fit(pca_input)
 
     # User may want to fit the principle components 
@@ -38,11 +65,230 @@ def run_PCA(markers, project_data=None):
     # Check the shape of the output
     try:
         test_PCA_output(project_data, principal_components, scores)
-    except AssertionError as msg:
-        raise ValueError(f"PCA output validation failed: {str(msg)}")
+    except AssertionError as err:
+        raise ValueError(f"PCA output validation failed: {err}") from err
+
+    return principal_components, scores, pca
+
+
+def run_PCA_incremental(marker_chunks, project_chunks=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                        scores_out=None, n_components=None):
+    """
+    Run PCA in two streaming passes over chunks of marker data.
+
+    The first pass fits an IncrementalPCA chunk by chunk (mean, variance and
+    components), the second pass scores each chunk against the fitted
+    components. Only one chunk is held in memory at a time, plus the scores.
+
+    Args:
+        marker_chunks: Marker data to fit, as one of
+            - an array or np.memmap, read in chunks of chunk_size frames,
+            - a callable returning a fresh iterator of marker chunks,
+            - a re-iterable collection (e.g. a list) of marker chunks.
+            A one-shot iterator is only accepted if project_chunks is given.
+        project_chunks (optional): Data to score instead of marker_chunks, in
+            any of the forms above.
+        chunk_size (int, optional): Frames per chunk when given an array.
+        scores_out (np.ndarray, optional): Preallocated [n_frames, n_components]
+            buffer (or np.memmap) for the scores.
+        n_components (int, optional): Number of components to keep. Default keeps all.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, IncrementalPCA]: Principal components, scores, and PCA object.
+
+    Raises:
+        ValueError: If the input data shapes are inconsistent.
+    """
+    if project_chunks is None:
+        if _is_one_shot(marker_chunks):
+            raise ValueError("marker_chunks is a one-shot iterator and cannot be scored in a "
+                             "second pass. Pass a callable returning a fresh iterator instead.")
+        project_chunks = marker_chunks
+
+    if n_components is not None and not isinstance(n_components, (int, np.integer)):
+        raise ValueError("Incremental PCA only supports an integer n_components.")
+
+    # First pass: fit
+    pca = IncrementalPCA(n_components=n_components)
+    n_vars = None
+    for batch in _rebatch(_iter_PCA_input(marker_chunks, chunk_size)):
+        n_vars = batch.shape[1]
+        pca.partial_fit(batch)
+
+    if n_vars is None:
+        raise ValueError("marker_chunks is empty.")
+
+    principal_components = pca.components_
+
+    # Second pass: score, straight into a buffer when the size is known
+    if scores_out is None and isinstance(project_chunks, np.ndarray):
+        scores_out = allocate_like(project_chunks,
+                                   (project_chunks.size // n_vars, principal_components.shape[0]),
+                                   dtype=principal_components.dtype)
+
+    n_frames = 0
+    scores_chunks = []
+    for chunk in _iter_PCA_input(project_chunks, chunk_size):
+        if scores_out is not None:
+            if n_frames + chunk.shape[0] > scores_out.shape[0]:
+                raise ValueError("scores_out has fewer rows than the projected data.")
+            scores_out[n_frames:n_frames + chunk.shape[0]] = pca.transform(chunk)
+        else:
+            scores_chunks.append(pca.transform(chunk))
+        n_frames += chunk.shape[0]
+
+    if scores_out is not None:
+        scores = scores_out[:n_frames]
+    elif scores_chunks:
+        scores = np.concatenate(scores_chunks, axis=0)
+    else:
+        scores = np.empty((0, principal_components.shape[0]))
+
+    # Check the shape of the output
+    try:
+        test_PCA_output_shapes(n_frames, n_vars, principal_components, scores)
+    except AssertionError as err:
+        raise ValueError(f"PCA output validation failed: {err}") from err
 
     return principal_components, scores, pca
 
+class CovariancePCA:
+    """
+    PCA for very tall, narrow matrices via the covariance matrix.
+
+    The d x d covariance is accumulated in float64 over row blocks, in parallel
+    threads, and eigendecomposed. For marker matrices (d = 96, or 12 per leg)
+    with millions of rows this is much cheaper than an SVD of the full data and
+    only ever holds one block per thread in memory, so np.memmap inputs work.
+
+    Exposes the same attributes and transform interface as sklearn's PCA:
+    components_, explained_variance_, explained_variance_ratio_,
+    singular_values_, mean_, n_components_, n_samples_ and n_features_in_.
+
+    Args:
+        n_components (int or float, optional): Number of components to keep, or a
+            target explained-variance ratio in (0, 1). Default keeps all.
+        block_size (int, optional): Rows per block.
+        n_jobs (int, optional): Number of threads. Default is os.cpu_count().
+    """
+
+    def __init__(self, n_components=None, block_size=DEFAULT_CHUNK_SIZE, n_jobs=None):
+        self.n_components = n_components
+        self.block_size = block_size
+        self.n_jobs = n_jobs
+        self._reset()
+
+    def fit(self, X, y=None):  # noqa: ARG002
+        """
+        Fit the model on X, shape (n_samples, n_features). y is ignored, as in sklearn.
+        """
+        self._reset()
+        return self.partial_fit(X)
+
+    def partial_fit(self, X):
+        """
+        Add the rows of X to the accumulated covariance and refit the components.
+        """
+        if X.ndim != 2:
+            raise ValueError("X must be 2d.")
+
+        if self._shift is None:
+            # Accumulate around a rough centre to avoid cancellation in float64
+            self._shift = np.asarray(X[:min(X.shape[0], self.block_size)], dtype=np.float64).mean(axis=0)
+            self._sum = np.zeros(X.shape[1])
+            self._cross = np.zeros((X.shape[1], X.shape[1]))
+        elif X.shape[1] != self._shift.shape[0]:
+            raise ValueError("X has a different number of features than the fitted data.")
+
+        blocks = list(frame_chunks(X.shape[0], self.block_size))
+        n_jobs = self.n_jobs or os.cpu_count() or 1
+
+        with ThreadPoolExecutor(max_workers=min(n_jobs, max(len(blocks), 1))) as executor:
+            for block_sum, block_cross in executor.map(lambda rows: self._block_moments(X[rows]), blocks):
+                self._sum += block_sum
+                self._cross += block_cross
+
+        self._count += X.shape[0]
+        self._fit_from_moments()
+        return self
+
+    def transform(self, X):
+        """
+        Project X onto the principal components, block by block.
+        """
+        scores = np.empty((X.shape[0], self.n_components_))
+        for rows in frame_chunks(X.shape[0], self.block_size):
+            np.dot(np.asarray(X[rows], dtype=np.float64) - self.mean_, self.components_.T, out=scores[rows])
+        return scores
+
+    def fit_transform(self, X, y=None):  # noqa: ARG002
+        return self.fit(X).transform(X)
+
+    def inverse_transform(self, X):
+        """
+        Map scores back to the original space.
+        """
+        return X @ self.components_ + self.mean_
+
+    def get_covariance(self):
+        """
+        The accumulated (unbiased) covariance matrix.
+        """
+        return self._covariance()
+
+    # -------------------------------------------------------------------------
+
+    def _reset(self):
+        self._shift = None
+        self._sum = None
+        self._cross = None
+        self._count = 0
+
+    def _block_moments(self, block):
+        block = np.asarray(block, dtype=np.float64) - self._shift
+        return block.sum(axis=0), block.T @ block
+
+    def _covariance(self):
+        shifted_mean = self._sum / self._count
+        cross = self._cross - self._count * np.outer(shifted_mean, shifted_mean)
+        return cross / max(self._count - 1, 1)
+
+    def _fit_from_moments(self):
+        covariance = self._covariance()
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+
+        # Largest first; clip tiny negative round-off
+        eigenvalues = np.clip(eigenvalues[::-1], 0, None)
+        components = eigenvectors[:, ::-1].T
+
+        # Same sign convention as sklearn: largest loading of each component is positive
+        max_abs_cols = np.argmax(np.abs(components), axis=1)
+        signs = np.sign(components[np.arange(components.shape[0]), max_abs_cols])
+        signs[signs == 0] = 1
+        components *= signs[:, np.newaxis]
+
+        total_variance = eigenvalues.sum()
+        explained_variance_ratio = eigenvalues / total_variance if total_variance > 0 else np.zeros_like(eigenvalues)
+
+        n_components = min(self._count, covariance.shape[0])
+        if self.n_components is not None:
+            if 0 < self.n_components < 1 and not isinstance(self.n_components, (int, np.integer)):
+                cumulative = np.cumsum(explained_variance_ratio)
+                n_components = int(np.searchsorted(cumulative, self.n_components, side="right") + 1)
+                n_components = min(n_components, covariance.shape[0])
+            else:
+                n_components = min(int(self.n_components), n_components)
+
+        self.n_samples_ = self._count
+        self.n_features_in_ = covariance.shape[0]
+        self.n_components_ = n_components
+        self.mean_ = self._shift + self._sum / self._count
+        self.components_ = components[:n_components]
+        self.explained_variance_ = eigenvalues[:n_components]
+        self.explained_variance_ratio_ = explained_variance_ratio[:n_components]
+        self.singular_values_ = np.sqrt(self.explained_variance_ * max(self._count - 1, 1))
+        self.noise_variance_ = eigenvalues[n_components:].mean() if n_components < len(eigenvalues) else 0.0
+
 # -----------------------------------------------------------------------------
 # Helper functions
 # -----------------------------------------------------------------------------
@@ -59,9 +305,36 @@ def get_PCA_input_sizes(pca_input):
 
     return n_frames, n_markers, n_vars
 
+def get_svd_solver(n_components, n_samples, n_vars):
+    """
+    Choose the sklearn PCA solver from the input size and the requested number of components.
+
+    - No n_components: sklearn's default, 'auto'.
+    - A fixed component budget below 80% of min(n_samples, n_vars), on an
+      input with more than 500 rows or columns: 'randomized', which only
+      computes the leading components.
+    - Any other budget or variance threshold: 'full'.
+
+    The CovariancePCA engine is never chosen here; pass svd_solver='covariance'
+    to run_PCA to use it.
+    """
+    if n_components is None:
+        return "auto"
+
+    is_budget = (isinstance(n_components, (int, np.integer))
+                 and not isinstance(n_components, bool))
+    if (is_budget
+            and max(n_samples, n_vars) > 500
+            and n_components < 0.8 * min(n_samples, n_vars)):
+        return "randomized"
+    return "full"
+
+
 def get_PCA_input(markers):
     """
     Reshape the data to be [n, nMarkers*3]
+
+    For contiguous inputs this is a view, so a np.memmap stays a np.memmap.
     """
     n_markers = markers.shape[1]
     pca_input = markers.reshape(-1, n_markers*3)
@@ -76,8 +349,72 @@ def test_PCA_output(pca_input, principal_components, scores):
     n_frames, n_markers, n_vars = get_PCA_input_sizes(pca_input)
 
     assert n_vars == n_markers*3, "n_vars is not equal to n_markers*3."
-    assert principal_components.shape[0] == n_vars, "principal_components is not the right shape."
+    test_PCA_output_shapes(n_frames, n_vars, principal_components, scores)
+
+
+def test_PCA_output_shapes(n_frames, n_vars, principal_components, scores):
+    """
+    Test the shape of the PCA output given the input sizes.
+    A truncated fit may keep fewer than n_vars components.
+    """
+    n_components = principal_components.shape[0]
+
+    assert 0 < n_components <= n_vars, "principal_components is not the right shape."
     assert principal_components.shape[1] == n_vars, "principal_components is not the right shape."
     assert scores.shape[0] == n_frames, "scores first dim is not the right shape."
-    assert scores.shape[1] == n_vars, "scores second dim is not the right shape."
+    assert scores.shape[1] == n_components, "scores second dim is not the right shape."
+
+
+def _is_one_shot(chunks):
+    """
+    Whether chunks is an iterator that can only be consumed once.
+    """
+    return not isinstance(chunks, np.ndarray) and not callable(chunks) and iter(chunks) is chunks
+
+
+def _iter_PCA_input(chunks, chunk_size):
+    """
+    Yield [n, nMarkers*3] PCA input blocks from an array, callable or iterable of chunks.
+    """
+    if isinstance(chunks, np.ndarray):
+        for frames in frame_chunks(chunks.shape[0], chunk_size):
+            yield np.asarray(get_PCA_input(chunks[frames]), dtype=float)
+        return
+
+    if callable(chunks):
+        chunks = chunks()
+
+    for chunk in chunks:
+        yield np.asarray(get_PCA_input(chunk), dtype=float)
+
+
+def _rebatch(blocks):
+    """
+    Merge blocks so that every batch has at least n_vars rows, as needed by
+    IncrementalPCA.partial_fit to keep all components. A short final block is
+    merged into the batch before it.
+    """
+    pending = []
+    n_pending = 0
+    previous = None
+
+    for block in blocks:
+        if block.shape[0] == 0:
+            continue
+        pending.append(block)
+        n_pending += block.shape[0]
+        if n_pending >= block.shape[1]:
+            if previous is not None:
+                yield previous
+            previous = np.concatenate(pending, axis=0) if len(pending) > 1 else pending[0]
+            pending = []
+            n_pending = 0
+
+    if pending:
+        if previous is None:
+            previous = np.concatenate(pending, axis=0)
+        else:
+            previous = np.concatenate([previous, *pending], axis=0)
 
+    if previous is not None:
+        yield previous
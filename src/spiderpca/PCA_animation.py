@@ -0,0 +1,313 @@
+"""
+Animate principal component sweeps, one GIF or MP4 per PC.
+
+Regenerate the sweep set from a saved PCAModel with:
+
+    python -m spiderpca.PCA_animation model.npz results/gifs
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib as mpl
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+from PIL import Image
+
+from .data_legs import get_leg_marker_schema
+from .PCA_model import PCAModel
+from .PCA_scores import get_score_range, triangle_wave
+
+
+def reconstruct_pc_sweeps(score_frames, principal_components, mu, components=None):
+    """
+    Reconstruct the sweep of every PC in one batched matmul.
+
+    Sweep p moves only component components[p] through score_frames[:, components[p]],
+    i.e. the same poses as reconstruct(score_frames, principal_components, mu,
+    components_list=[components[p]]).
+
+    Parameters
+    ----------
+    score_frames : numpy.ndarray, shape (num_frames, n_components)
+        Scores of each animation frame, e.g. from get_score_range.
+    principal_components : numpy.ndarray, shape (n_components, n_markers * 3)
+        The principal components.
+    mu : numpy.ndarray, shape (1, n_markers, 3)
+        The mean pose.
+    components : list of int, optional
+        0-based indices of the PCs to sweep (default: all).
+
+    Returns
+    -------
+    numpy.ndarray, shape (n_pcs, num_frames, n_markers, 3)
+        The poses of every sweep.
+    """
+    if components is None:
+        components = range(principal_components.shape[0])
+    components = list(components)
+
+    # [n_pcs, num_frames, 1] @ [n_pcs, 1, n_markers*3]
+    sweep_scores = score_frames[:, components].T[:, :, np.newaxis]
+    sweeps = np.matmul(sweep_scores, principal_components[components][:, np.newaxis, :])
+    sweeps += mu.reshape(-1)
+
+    return sweeps.reshape(len(components), score_frames.shape[0], -1, 3)
+
+
+class PoseRenderer:
+    """
+    Off-screen renderer of spider poses that reuses one figure and its artists.
+
+    The figure is built once. Each call to render moves the existing artists to
+    the new pose and redraws the Agg canvas, so a frame costs one draw and no
+    figure or artist construction. pyplot is not used.
+
+    Parameters
+    ----------
+    marker_names : list of str
+        Marker names in the order of the poses.
+    limit : float, optional
+        Half-width of the plotted cube in metres (default: 0.04)
+    figsize : tuple, optional
+        Figure size in inches (default: (9, 9))
+    dpi : int, optional
+        Resolution of the frames (default: 100)
+    elev, azim : float, optional
+        View angles of the 3D axes
+    colour : str, optional
+        Colour of the markers and body (default: "#817")
+    """
+
+    def __init__(self, marker_names, limit=0.04, figsize=(9, 9), dpi=100,
+                 elev=30, azim=-150, colour="#817"):
+        schema = get_leg_marker_schema(marker_names)
+
+        # All legs as one polyline, claw to coxa, separated by NaNs (index -1)
+        leg_chains = np.full((schema.n_legs, schema.n_keypoints + 1), -1, dtype=np.intp)
+        leg_chains[:, :-1] = schema.index
+        self._leg_path = leg_chains.ravel()
+        # Body outline through the leg roots, in leg order
+        root = schema.keypoints.index("coxa") if "coxa" in schema.keypoints else -1
+        self._body_ring = schema.index[:, root]
+
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        ax = self.figure.add_subplot(projection="3d")
+        ax.view_init(elev=elev, azim=azim)
+        for set_lim in (ax.set_xlim, ax.set_ylim, ax.set_zlim):
+            set_lim(-limit, limit)
+        ticks = [-limit, 0, limit]
+        ax.set_xticks(ticks)
+        ax.set_yticks(ticks)
+        ax.set_zticks(ticks)
+        ax.set_xlabel("x (m)")
+        ax.set_ylabel("y (m)")
+        ax.set_zlabel("z (m)")
+        ax.set_box_aspect((1, 1, 1))
+        self.ax = ax
+
+        nan_line = [np.nan]
+        self._legs_line, = ax.plot(nan_line, nan_line, nan_line, color="grey", linewidth=1, alpha=0.8)
+        self._markers_line, = ax.plot(nan_line, nan_line, nan_line, linestyle="none",
+                                      marker="o", markersize=3, color=colour, alpha=0.7)
+        self._body = Poly3DCollection([np.zeros((len(self._body_ring), 3))],
+                                      facecolor=colour, edgecolor=colour, alpha=0.3)
+        ax.add_collection3d(self._body)
+
+    def render(self, pose):
+        """
+        Draw one pose [n_markers, 3] and return the frame as an RGB array [height, width, 3].
+        """
+        path = pose[self._leg_path]
+        path[self._leg_path < 0] = np.nan
+        self._legs_line.set_data_3d(path[:, 0], path[:, 1], path[:, 2])
+        self._markers_line.set_data_3d(pose[:, 0], pose[:, 1], pose[:, 2])
+        self._body.set_verts([pose[self._body_ring]])
+
+        self.canvas.draw()
+        return np.asarray(self.canvas.buffer_rgba())[..., :3].copy()
+
+    def frames(self, poses):
+        """
+        Generate the frames of a sequence of poses [n_frames, n_markers, 3].
+        """
+        for pose in poses:
+            yield self.render(pose)
+
+
+def save_animation(frames, file_path, fps=20):
+    """
+    Encode frames (an iterable of RGB arrays) as a looping GIF or, with ffmpeg, an MP4.
+
+    The format is taken from the extension of file_path. Frames are consumed
+    one at a time; for MP4 they are streamed to ffmpeg without being stored.
+    """
+    file_format = os.path.splitext(file_path)[1].lower()
+    if file_format not in (".gif", ".mp4"):
+        raise ValueError(f"Invalid animation format: {file_format}")
+
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError(f"No frames to write to {file_path}.")
+
+    if file_format == ".gif":
+        images = (Image.fromarray(frame) for frame in frames)
+        Image.fromarray(first).save(file_path, save_all=True, append_images=images,
+                                    duration=round(1000 / fps), loop=0)
+        return file_path
+
+    ffmpeg = _ffmpeg_path()
+    height, width = first.shape[:2]
+    command = [ffmpeg, "-y", "-loglevel", "error",
+               "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps),
+               "-i", "-",
+               "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", file_path]
+    with subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+        try:
+            process.stdin.write(first.tobytes())
+            for frame in frames:
+                process.stdin.write(frame.tobytes())
+        except BrokenPipeError:
+            # ffmpeg exited early; its error message is read below
+            pass
+        _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise ValueError(f"ffmpeg failed to write {file_path}: "
+                         f"{stderr.decode(errors='replace').strip()}")
+    return file_path
+
+
+def animate_pc_sweeps(model,
+                      output_dir,
+                      scores=None,
+                      components=None,
+                      num_frames=12,
+                      file_format="gif",
+                      fps=20,
+                      filename="PC{:02d}",
+                      n_jobs=None,
+                      **renderer_kwargs):
+    """
+    Write one animation per PC, sweeping it between -2 and +2 standard deviations.
+
+    All sweeps are reconstructed in one batched matmul. PCs are rendered and
+    encoded in parallel worker processes, each of which builds one PoseRenderer
+    and reuses it for all its PCs.
+
+    Parameters
+    ----------
+    model : PCAModel
+        The fitted basis, with marker_names.
+    output_dir : str
+        Directory for the animations (created if needed).
+    scores : numpy.ndarray, optional
+        Scores [n_frames, n_components] to take the sweep range from, as in
+        get_score_range. By default the range is 0 +/- 2 sqrt(explained variance).
+    components : list of int, optional
+        0-based indices of the PCs to animate (default: all).
+    num_frames : int, optional
+        Frames per sweep (default: 12)
+    file_format : str, optional
+        "gif" or "mp4" (default: "gif")
+    fps : int, optional
+        Frames per second (default: 20)
+    filename : str, optional
+        Name template of each file, formatted with the 1-based PC number
+        (default: "PC{:02d}", i.e. PC01, ..., PC10)
+    n_jobs : int, optional
+        Number of worker processes (default: os.cpu_count())
+    **renderer_kwargs
+        Passed to PoseRenderer. limit defaults to the largest coordinate of any sweep,
+        rounded up to the centimetre.
+
+    Returns
+    -------
+    list of str
+        Paths of the animations, in the order of components.
+    """
+    if model.marker_names is None:
+        raise ValueError("model has no marker_names to draw the skeleton from.")
+    if file_format not in ("gif", "mp4"):
+        raise ValueError(f"Invalid animation format: {file_format}")
+    if file_format == "mp4":
+        _ffmpeg_path()
+
+    if scores is None:
+        half_range = 2 * np.sqrt(model.explained_variance)
+        score_frames = half_range * (2 * triangle_wave(num_frames)[:, np.newaxis] - 1)
+    else:
+        score_frames = get_score_range(scores, num_frames)
+
+    if components is None:
+        components = range(model.n_components)
+    components = list(components)
+
+    sweeps = reconstruct_pc_sweeps(score_frames, model.components, model.mu, components)
+    # Shared axes for all PCs, rounded up to the centimetre
+    renderer_kwargs.setdefault("limit", float(np.ceil(np.abs(sweeps).max() * 100) / 100))
+
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(sweep, os.path.join(output_dir, f"{filename.format(pc + 1)}.{file_format}"))
+             for pc, sweep in zip(components, sweeps, strict=True)]
+
+    n_jobs = max(1, min(n_jobs or os.cpu_count() or 1, len(tasks)))
+    with ProcessPoolExecutor(max_workers=n_jobs,
+                             initializer=_init_worker,
+                             initargs=(model.marker_names, renderer_kwargs, fps)) as pool:
+        return list(pool.map(_animate_one, tasks))
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+# Renderer and frame rate of each worker process
+_WORKER_STATE = {}
+
+
+def _ffmpeg_path():
+    ffmpeg = shutil.which(mpl.rcParams["animation.ffmpeg_path"])
+    if ffmpeg is None:
+        raise ValueError("Saving MP4 needs ffmpeg on the PATH.")
+    return ffmpeg
+
+
+def _init_worker(marker_names, renderer_kwargs, fps):
+    _WORKER_STATE["renderer"] = PoseRenderer(marker_names, **renderer_kwargs)
+    _WORKER_STATE["fps"] = fps
+
+
+def _animate_one(task):
+    sweep, file_path = task
+    return save_animation(_WORKER_STATE["renderer"].frames(sweep), file_path, fps=_WORKER_STATE["fps"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", help="PCAModel .npz file")
+    parser.add_argument("output_dir", help="directory for the animations")
+    parser.add_argument("--components", nargs="+", type=int,
+                        help="1-based PC numbers to animate (default: all)")
+    parser.add_argument("--num-frames", type=int, default=12, help="frames per sweep (default: 12)")
+    parser.add_argument("--format", choices=["gif", "mp4"], default="gif", help="output format (default: gif)")
+    parser.add_argument("--fps", type=int, default=20, help="frames per second (default: 20)")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all CPUs)")
+    args = parser.parse_args(argv)
+
+    model = PCAModel.load(args.model)
+    components = None if args.components is None else [pc - 1 for pc in args.components]
+    paths = animate_pc_sweeps(model, args.output_dir,
+                              components=components,
+                              num_frames=args.num_frames,
+                              file_format=args.format,
+                              fps=args.fps,
+                              n_jobs=args.jobs)
+    print(f"Wrote {len(paths)} animations to {args.output_dir}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from scipy.stats import norm
+
+from .PCA import get_PCA_input
+
+# Resamples per task; fixed so that results do not depend on n_jobs
+RESAMPLES_PER_TASK = 16
+
+# Default limit on the per-sequence cross-product matrices, 8 * n_sequences * n_vars^2 bytes
+DEFAULT_MAX_STATISTICS_BYTES = 4 * 1024**3  # 4 GB
+
+
+def bootstrap_PCA(markers, groups, n_resamples=200, n_components=12, seed=0, n_jobs=None,
+                  max_statistics_bytes=DEFAULT_MAX_STATISTICS_BYTES):
+    """
+    Bootstrap the PCA over whole sequences to get confidence intervals on the
+    explained variance and the component loadings.
+
+    The data are centred once and reduced to per-sequence sufficient
+    statistics (frame count, sum and cross-product matrix). Each resample
+    draws sequences with replacement and builds its covariance from those
+    statistics, so a resample costs O(n_sequences * n_vars^2) and never touches
+    the frames again. Resamples run on a thread pool; each one has its own seed
+    spawned from seed, so results are reproducible for any n_jobs.
+
+    The cross-product matrices take O(n_sequences * n_vars^2) memory, float64:
+    1000 sequences of 8 legs x 4 keypoints (n_vars = 96) need 74 MB, but
+    1000 sequences of 100 markers (n_vars = 300) need 720 MB. Inputs that
+    would need more than max_statistics_bytes are refused.
+
+    Resampled components are matched to the full-data components (by absolute
+    cosine similarity, one to one) and sign-flipped to agree with them. Only
+    running summaries are kept: the explained variance ratios of every
+    resample (small) and the running mean and variance of the aligned loadings.
+
+    Parameters
+    ----------
+    markers : numpy.ndarray
+        Marker data [n_frames, n_markers, 3] or PCA input [n_frames, n_vars].
+    groups : array-like
+        Sequence label of every frame, e.g. spider_data_df["filename"].
+    n_resamples : int, optional
+        Number of bootstrap resamples (default: 200).
+    n_components : int, optional
+        Number of leading components to summarise (default: 12).
+    seed : int, optional
+        Seed for the resampling (default: 0).
+    n_jobs : int, optional
+        Number of threads (default: os.cpu_count()).
+    max_statistics_bytes : int, optional
+        Largest size of the per-sequence statistics (default: 4 GB).
+
+    Returns
+    -------
+    BootstrapResult
+    """
+    pca_input = get_PCA_input(markers) if markers.ndim > 2 else markers
+    codes, _ = pd.factorize(np.asarray(groups))
+    if codes.shape[0] != pca_input.shape[0]:
+        raise ValueError("groups must have one label per frame.")
+    if np.any(codes < 0):
+        raise ValueError("groups must not contain missing labels.")
+
+    n_vars = pca_input.shape[1]
+    statistics_bytes = 8 * (int(codes.max()) + 1) * n_vars * (n_vars + 1)
+    if statistics_bytes > max_statistics_bytes:
+        raise ValueError(f"The per-sequence statistics would need {statistics_bytes / 1e9:.1f} GB "
+                         f"(limit {max_statistics_bytes / 1e9:.1f} GB). Use fewer sequences or "
+                         "variables, or raise max_statistics_bytes.")
+
+    counts, sums, cross = _sequence_statistics(pca_input, codes)
+    n_components = min(n_components, n_vars)
+
+    reference_variance, reference_components = _weighted_eigh(np.ones(counts.shape[0]), counts, sums, cross)
+    reference_components = reference_components[:n_components]
+    reference_ratio = reference_variance / reference_variance.sum()
+
+    seeds = np.random.SeedSequence(seed).spawn(n_resamples)
+    tasks = [seeds[start:start + RESAMPLES_PER_TASK]
+             for start in range(0, n_resamples, RESAMPLES_PER_TASK)]
+
+    def run_task(task_seeds):
+        return _run_resamples(task_seeds, counts, sums, cross, reference_components, n_components)
+
+    ratio_samples = []
+    loadings = _RunningMoments((n_components, n_vars))
+    with ThreadPoolExecutor(max_workers=n_jobs or os.cpu_count() or 1) as pool:
+        # map returns in task order, so the running sums are deterministic
+        for task_ratios, task_moments in pool.map(run_task, tasks):
+            ratio_samples.append(task_ratios)
+            loadings.combine(task_moments)
+
+    return BootstrapResult(explained_variance_ratio=reference_ratio[:n_components],
+                           components=reference_components,
+                           explained_variance_ratio_samples=np.concatenate(ratio_samples, axis=0),
+                           loadings_mean=loadings.mean,
+                           loadings_std=loadings.std,
+                           n_sequences=counts.shape[0])
+
+
+class BootstrapResult:
+    """
+    Summary of a sequence bootstrap of the PCA.
+
+    Attributes
+    ----------
+    explained_variance_ratio : numpy.ndarray, shape (n_components,)
+        Explained variance ratio of the full-data fit.
+    components : numpy.ndarray, shape (n_components, n_vars)
+        Components of the full-data fit, which the resamples are aligned to.
+    explained_variance_ratio_samples : numpy.ndarray, shape (n_resamples, n_components)
+        Explained variance ratio of every resample, by rank.
+    loadings_mean, loadings_std : numpy.ndarray, shape (n_components, n_vars)
+        Mean and standard deviation of the aligned resampled loadings.
+    n_sequences : int
+        Number of sequences resampled.
+    """
+
+    def __init__(self, explained_variance_ratio, components, explained_variance_ratio_samples,
+                 loadings_mean, loadings_std, n_sequences):
+        self.explained_variance_ratio = explained_variance_ratio
+        self.components = components
+        self.explained_variance_ratio_samples = explained_variance_ratio_samples
+        self.loadings_mean = loadings_mean
+        self.loadings_std = loadings_std
+        self.n_sequences = n_sequences
+
+    @property
+    def n_resamples(self):
+        return self.explained_variance_ratio_samples.shape[0]
+
+    def explained_variance_ci(self, level=0.95, cumulative=False):
+        """
+        Percentile confidence interval of the (cumulative) explained variance ratio.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            Lower and upper bounds, each shape (n_components,).
+        """
+        samples = self.explained_variance_ratio_samples
+        if cumulative:
+            samples = np.cumsum(samples, axis=1)
+        alpha = (1 - level) / 2
+        return (np.quantile(samples, alpha, axis=0),
+                np.quantile(samples, 1 - alpha, axis=0))
+
+    def loadings_ci(self, level=0.95):
+        """
+        Normal-approximation confidence interval of the aligned loadings.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            Lower and upper bounds, each shape (n_components, n_vars).
+        """
+        z = norm.ppf(0.5 + level / 2)
+        return (self.loadings_mean - z * self.loadings_std,
+                self.loadings_mean + z * self.loadings_std)
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+def _sequence_statistics(pca_input, codes, block_size=100_000):
+    """
+    Frame count, sum and cross-product matrix of the centred data per sequence.
+    """
+    n_sequences = int(codes.max()) + 1
+    n_vars = pca_input.shape[1]
+    mean = np.asarray(pca_input, dtype=np.float64).mean(axis=0)
+
+    counts = np.bincount(codes, minlength=n_sequences).astype(np.float64)
+    sums = np.zeros((n_sequences, n_vars))
+    cross = np.zeros((n_sequences, n_vars, n_vars))
+
+    # Sort frames by sequence once, then take contiguous runs per sequence
+    order = np.argsort(codes, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts[:-1]).astype(np.intp)])
+    for sequence, start in enumerate(starts):
+        frames = order[start:start + int(counts[sequence])]
+        for block in range(0, frames.shape[0], block_size):
+            centred = np.asarray(pca_input[frames[block:block + block_size]], dtype=np.float64) - mean
+            sums[sequence] += centred.sum(axis=0)
+            cross[sequence] += centred.T @ centred
+
+    return counts, sums, cross
+
+
+def _weighted_eigh(weights, counts, sums, cross):
+    """
+    Eigenvalues (descending) and eigenvectors (rows) of the covariance of
+    the sequences weighted by how often they were drawn.
+    """
+    n = weights @ counts
+    total = weights @ sums
+    covariance = (np.tensordot(weights, cross, axes=1) - np.outer(total, total) / n) / max(n - 1, 1)
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    return np.clip(eigenvalues[::-1], 0, None), eigenvectors[:, ::-1].T
+
+
+def _run_resamples(task_seeds, counts, sums, cross, reference_components, n_components):
+    n_sequences = counts.shape[0]
+    ratios = np.empty((len(task_seeds), n_components))
+    moments = _RunningMoments(reference_components.shape)
+
+    for ii, seed in enumerate(task_seeds):
+        rng = np.random.default_rng(seed)
+        weights = np.bincount(rng.integers(0, n_sequences, n_sequences), minlength=n_sequences)
+        variance, components = _weighted_eigh(weights.astype(np.float64), counts, sums, cross)
+
+        ratios[ii] = variance[:n_components] / variance.sum()
+        moments.add(_align_components(components, reference_components))
+
+    return ratios, moments
+
+
+def _align_components(components, reference_components):
+    """
+    Pick the resampled component matching each reference component and flip its sign to agree.
+    """
+    similarity = reference_components @ components.T
+    _, matched = linear_sum_assignment(-np.abs(similarity))
+    aligned = components[matched]
+    signs = np.sign(np.einsum("ij,ij->i", aligned, reference_components))
+    signs[signs == 0] = 1
+    return aligned * signs[:, np.newaxis]
+
+
+class _RunningMoments:
+    """
+    Running mean and variance (Welford / Chan et al.), mergeable across workers.
+    """
+
+    def __init__(self, shape):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def combine(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.count / count)
+        self.m2 = self.m2 + other.m2 + delta**2 * (self.count * other.count / count)
+        self.count = count
+
+    @property
+    def std(self):
+        if self.count < 2:
+            return np.zeros_like(self.mean)
+        return np.sqrt(self.m2 / (self.count - 1))
@@ -0,0 +1,181 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.stats import f as f_distribution
+
+from .data_memmap import DEFAULT_CHUNK_SIZE, allocate_like, frame_chunks
+from .PCA import get_PCA_input
+
+
+def reconstruction_errors(markers,
+                          model,
+                          n_components=None,
+                          scores=None,
+                          per_marker=False,
+                          top_k=100,
+                          chunk_size=DEFAULT_CHUNK_SIZE,
+                          n_jobs=None):
+    """
+    Reconstruction error and Hotelling T^2 of every frame, without building the reconstruction.
+
+    With x the centred frame, t its first n_components scores and C those
+    components, the squared residual (Q, or SPE) is ||x - t C||^2 and T^2 is
+    sum(t_j^2 / explained_variance_j). The residual is formed chunk by chunk
+    and dropped, so only one chunk is ever held. It is not taken as
+    ||x||^2 - ||t||^2, which cancels catastrophically when n_components is
+    close to the number of variables.
+
+    Chunks run in parallel on a thread pool and write straight into the
+    output arrays, which are file-backed if markers is a np.memmap.
+
+    Parameters
+    ----------
+    markers : numpy.ndarray
+        Marker data [n_frames, n_markers, 3] or PCA input [n_frames, n_markers * 3],
+        preprocessed as for the fit.
+    model : PCAModel
+        The fitted basis.
+    n_components : int, optional
+        Number of leading components kept (default: all the model has).
+    scores : numpy.ndarray, optional
+        Scores [n_frames, >= n_components] from model.transform, to skip the projection.
+    per_marker : bool, optional
+        Also compute the residual distance of every marker (default: False).
+    top_k : int, optional
+        Number of outliers to index by Q and by T^2 (default: 100).
+    chunk_size : int, optional
+        Frames per chunk.
+    n_jobs : int, optional
+        Number of threads (default: os.cpu_count()).
+
+    Returns
+    -------
+    ReconstructionErrors
+    """
+    pca_input = get_PCA_input(markers) if markers.ndim > 2 else markers
+    n_frames, n_vars = pca_input.shape
+    if n_vars != model.components.shape[1]:
+        raise ValueError(f"markers have {n_vars} values per frame, "
+                         f"the model expects {model.components.shape[1]}.")
+
+    if n_components is None:
+        n_components = model.n_components
+    if (not isinstance(n_components, (int, np.integer)) or isinstance(n_components, bool)
+            or not 0 < n_components <= model.n_components):
+        raise ValueError(f"n_components must be an integer between 1 and {model.n_components}.")
+    if scores is not None and (scores.shape[0] != n_frames or scores.shape[1] < n_components):
+        raise ValueError(f"scores must have shape ({n_frames}, >= {n_components}).")
+
+    components = model.components[:n_components]
+    inverse_variance = 1 / model.explained_variance[:n_components]
+
+    q = allocate_like(pca_input, (n_frames,), dtype=np.float64)
+    t2 = allocate_like(pca_input, (n_frames,), dtype=np.float64)
+    marker_errors = None
+    if per_marker:
+        marker_errors = allocate_like(pca_input, (n_frames, n_vars // 3), dtype=np.float64)
+
+    def run_chunk(rows):
+        centred = np.asarray(pca_input[rows], dtype=np.float64) - model.mean
+        if scores is None:
+            chunk_scores = centred @ components.T
+        else:
+            chunk_scores = np.asarray(scores[rows, :n_components], dtype=np.float64)
+
+        t2[rows] = np.einsum("ij,ij,j->i", chunk_scores, chunk_scores, inverse_variance)
+
+        residual = centred - chunk_scores @ components
+        if per_marker:
+            squared = residual.reshape(residual.shape[0], -1, 3)
+            squared = np.einsum("ijk,ijk->ij", squared, squared)
+            marker_errors[rows] = np.sqrt(squared)
+            q[rows] = squared.sum(axis=1)
+        else:
+            q[rows] = np.einsum("ij,ij->i", residual, residual)
+
+    with ThreadPoolExecutor(max_workers=n_jobs or os.cpu_count() or 1) as pool:
+        # list() re-raises any worker exception
+        list(pool.map(run_chunk, frame_chunks(n_frames, chunk_size)))
+
+    return ReconstructionErrors(q=q, t2=t2, marker_errors=marker_errors,
+                                n_components=n_components, top_k=top_k,
+                                n_samples=model.n_samples)
+
+
+class ReconstructionErrors:
+    """
+    Per-frame (and optionally per-marker) reconstruction error and Hotelling T^2.
+
+    Attributes
+    ----------
+    q : numpy.ndarray, shape (n_frames,)
+        Squared residual norm (Q statistic / SPE) of every frame.
+    t2 : numpy.ndarray, shape (n_frames,)
+        Hotelling T^2 of every frame.
+    marker_errors : numpy.ndarray or None, shape (n_frames, n_markers)
+        Residual distance of every marker, if computed.
+    n_components : int
+        Number of components kept.
+    n_samples : int or None
+        Number of samples the model was fitted on, used by t2_limit.
+    q_outliers, t2_outliers : numpy.ndarray
+        Indices of the top_k frames with the largest Q and T^2, largest first.
+    """
+
+    def __init__(self, q, t2, marker_errors, n_components, top_k=100, n_samples=None):
+        self.q = q
+        self.t2 = t2
+        self.marker_errors = marker_errors
+        self.n_components = n_components
+        self.n_samples = n_samples
+        self.q_outliers = self.top_outliers(top_k, statistic="q")
+        self.t2_outliers = self.top_outliers(top_k, statistic="t2")
+
+    @property
+    def n_frames(self):
+        return self.q.shape[0]
+
+    @property
+    def residual_norm(self):
+        """
+        Euclidean reconstruction error of every frame, sqrt(Q).
+        """
+        return np.sqrt(self.q)
+
+    def top_outliers(self, k=10, statistic="q"):
+        """
+        Indices of the k frames with the largest statistic ("q", "t2" or
+        "marker", the worst marker of each frame), largest first.
+        """
+        if statistic == "q":
+            values = self.q
+        elif statistic == "t2":
+            values = self.t2
+        elif statistic == "marker":
+            if self.marker_errors is None:
+                raise ValueError("Marker errors were not computed, use per_marker=True.")
+            values = np.max(self.marker_errors, axis=1)
+        else:
+            raise ValueError(f"Invalid statistic: {statistic}")
+
+        values = np.asarray(values)
+        k = min(k, values.shape[0])
+        if k == 0:
+            return np.empty(0, dtype=np.intp)
+        top = np.argpartition(values, -k)[-k:]
+        return top[np.argsort(values[top])[::-1]]
+
+    def t2_limit(self, alpha=0.05, n_samples=None):
+        """
+        Upper control limit of T^2 at significance alpha, for frames not used
+        in the fit (F distribution). n is the size of the fit, n_samples if
+        given, else the model's.
+        """
+        n = self.n_samples if n_samples is None else n_samples
+        if n is None:
+            raise ValueError("The model does not record its number of samples, pass n_samples.")
+        k = self.n_components
+        if n <= k:
+            raise ValueError("T^2 limit needs more frames than components.")
+        return k * (n - 1) * (n + 1) / (n * (n - k)) * f_distribution.ppf(1 - alpha, k, n - k)
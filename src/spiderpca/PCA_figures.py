@@ -2,11 +2,15 @@ import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 
+from .PCA_histograms import compute_score_histograms
+from .PCA_scores import ScoresStore
+
 def plot_explained(explained_ratio, 
                    ax=None, 
                    colour_before=12, 
                    annotate=True, 
-                   xlim_max=None):
+                   xlim_max=None,
+                   show=True):
 
     if ax is None:
         fig, ax = plt.subplots(figsize=(6.7, 3.5))
@@ -32,7 +36,7 @@ def plot_explained(explained_ratio,
     else:
         bar_colour = "#E6E6E6"
 
-    barlist = plt.bar(range(0,len(explained_ratio)), np.cumsum(explained_ratio), 
+    barlist = ax.bar(range(0,len(explained_ratio)), np.cumsum(explained_ratio), 
         color = bar_colour, alpha = 0.8, width = 0.6, edgecolor='None',zorder = 2)
 
     for i in range(colour_before):
@@ -74,7 +78,8 @@ def plot_explained(explained_ratio,
 
     ax.grid(True, alpha=0.3)
     
-    plt.show()
+    if show:
+        plt.show()
 
     return ax
 
@@ -93,6 +98,7 @@ def plot_pc_experiment(scores_df,
     scores_df : pandas.DataFrame
         DataFrame containing PCA scores and condition information
         Must have columns: ['time_in_frames', f'PC{pc_number}', 'sq_level']
+        A ScoresStore can be passed instead for faster repeated calls.
     pc_number : int, optional
         Principal component number to plot (default: 1)
     conditions : list, optional
@@ -120,7 +126,7 @@ def plot_pc_experiment(scores_df,
                           sharex=True, sharey=True)
     
     for ii, condition in enumerate(conditions):
-        condition_scores = scores_df[scores_df["sq_level"] == condition]
+        condition_scores = _select_scores(scores_df, sq_level=condition)
         ax[ii].scatter(condition_scores["time_in_frames"], 
                       condition_scores[f"PC{pc_number}"],
                       marker=".", alpha=alpha, s=marker_size)
@@ -138,7 +144,7 @@ def plot_pc_experiment(scores_df,
 
 def plot_pc_histogram(scores_df, pc_number=1, conditions=None, 
                      figsize=(6, 4), alpha=0.5, bins=50, density=True,
-                     ax = None):
+                     ax = None, histograms=None):
     """
     Plot overlaid histograms of PCA scores for different experimental conditions.
     
@@ -147,6 +153,7 @@ def plot_pc_histogram(scores_df, pc_number=1, conditions=None,
     scores_df : pandas.DataFrame
         DataFrame containing PCA scores and condition information
         Must have columns: [f'PC{pc_number}', 'sq_level']
+        A ScoresStore can be passed instead for faster repeated calls.
     pc_number : int, optional
         Principal component number to plot (default: 1)
     conditions : list, optional
@@ -159,6 +166,9 @@ def plot_pc_histogram(scores_df, pc_number=1, conditions=None,
         Number of bins for histogram (default: 50)
     density : bool, optional
         If True, normalize histogram to show density instead of counts (default: True)
+    histograms : ScoreHistograms, optional
+        Precomputed histograms from compute_score_histograms(scores_df). If given,
+        they are drawn with ax.stairs and scores_df and bins are not used.
         
     Returns
     -------
@@ -180,7 +190,15 @@ def plot_pc_histogram(scores_df, pc_number=1, conditions=None,
     colors = ["#e94", "#c66", "#a35", "#817"]
     # Plot histogram for each condition
     for condition, color in zip(conditions, colors):
-        condition_scores = scores_df[scores_df["sq_level"] == condition]
+        if histograms is not None:
+            histograms.stairs(ax, pc_number - 1,
+                              condition=condition,
+                              density=density,
+                              alpha=alpha,
+                              color=color,
+                              label=condition)
+            continue
+        condition_scores = _select_scores(scores_df, sq_level=condition)
         ax.hist(condition_scores[f"PC{pc_number}"], 
                 bins=bins,
                 alpha=alpha,
@@ -200,7 +218,7 @@ def plot_pc_histogram(scores_df, pc_number=1, conditions=None,
 
 
 
-def plot_leg_score_hist(reshaped_scores, pc_number=0, figsize=(6, 4), leg_list=None):
+def plot_leg_score_hist(reshaped_scores, pc_number=0, figsize=(6, 4), leg_list=None, histograms=None):
     """
     Plot histogram distributions of PCA scores for each leg.
     
@@ -212,6 +230,9 @@ def plot_leg_score_hist(reshaped_scores, pc_number=0, figsize=(6, 4), leg_list=N
         Principal component to plot (default: 0)
     figsize : tuple, optional
         Figure size in inches (default: (6, 4))
+    histograms : ScoreHistograms, optional
+        Precomputed histograms from compute_score_histograms(reshaped_scores).
+        If given, they are drawn with ax.stairs and reshaped_scores is not used.
         
     Returns
     -------
@@ -224,13 +245,20 @@ def plot_leg_score_hist(reshaped_scores, pc_number=0, figsize=(6, 4), leg_list=N
                   "#C5C6E8", "#d6e9c3", "#BAF3F1", "#fdc4fb"]
     
     if leg_list is None:
-        leg_list = range(reshaped_scores.shape[1])
+        leg_list = histograms.legs if histograms is not None else range(reshaped_scores.shape[1])
     
     fig, ax = plt.subplots(figsize=figsize)
     
 
     # Plot histogram for each leg
     for leg_idx in leg_list:
+        if histograms is not None:
+            histograms.stairs(ax, pc_number,
+                              leg=leg_idx,
+                              alpha=0.6,
+                              color=colourList[leg_idx],
+                              label=f"Leg {leg_idx+1}")
+            continue
         ax.hist(reshaped_scores[:, leg_idx, pc_number],
                 bins=50,
                 alpha=0.6,
@@ -248,7 +276,7 @@ def plot_leg_score_hist(reshaped_scores, pc_number=0, figsize=(6, 4), leg_list=N
     return fig, ax
 
 
-def plot_leg_score_hist_panelled(reshaped_scores, pc_number=0, figsize=(6, 6), pairings=None):
+def plot_leg_score_hist_panelled(reshaped_scores, pc_number=0, figsize=(6, 6), pairings=None, histograms=None):
     """
     Plot histogram distributions of PCA scores for leg pairings in 2x2 subplots.
     
@@ -262,6 +290,10 @@ def plot_leg_score_hist_panelled(reshaped_scores, pc_number=0, figsize=(6, 6), p
         Figure size in inches (default: (12, 8))
     pairings : list of lists, optional
         List of pairings to highlight in each subplot (default: [[0, 7], [1, 6], [2, 5], [3, 4]])
+    histograms : ScoreHistograms, optional
+        Precomputed histograms from compute_score_histograms(reshaped_scores).
+        If None, the histograms of pc_number are computed once, on one bin grid,
+        and reused by every panel.
         
     Returns
     -------
@@ -284,6 +316,9 @@ def plot_leg_score_hist_panelled(reshaped_scores, pc_number=0, figsize=(6, 6), p
                   "#C5C6E8", "#d6e9c3", "#BAF3F1", "#fdc4fb"]
     gray_color = "#D3D3D3"  # Color for non-highlighted legs
     
+    if histograms is None:
+        histograms = compute_score_histograms(reshaped_scores, components=[pc_number])
+
     # Create a 2x2 grid of subplots
     fig, ax = plt.subplots(2, 2, figsize=figsize, sharex=True, sharey=True)
     ax = ax.flatten()
@@ -292,24 +327,22 @@ def plot_leg_score_hist_panelled(reshaped_scores, pc_number=0, figsize=(6, 6), p
     # Loop through each pairing and create the corresponding subplot
     for i, pairing in enumerate(pairings):
         # Plot gray histograms for all non-highlighted legs first
-        for leg_idx in range(reshaped_scores.shape[1]):
+        for leg_idx in histograms.legs:
             if leg_idx not in pairing:
-                ax[i].hist(
-                    reshaped_scores[:, leg_idx, pc_number],
-                    bins=50,
+                histograms.stairs(
+                    ax[i], pc_number,
+                    leg=leg_idx,
                     alpha=0.4,
                     color=gray_color,
-                    density=True,
                 )
         
         # Plot colorful histograms for the highlighted legs on top
         for leg_idx in pairing:
-            ax[i].hist(
-                reshaped_scores[:, leg_idx, pc_number],
-                bins=50,
+            histograms.stairs(
+                ax[i], pc_number,
+                leg=leg_idx,
                 alpha=1,
                 color=colourList[leg_idx],
-                density=True,
                 label=f"Leg {leg_idx+1}"
             )
         
@@ -336,6 +369,7 @@ def plot_leg_pc_timeseries(scores_df,
     scores_df : pandas.DataFrame
         DataFrame containing scores for all legs with columns:
         'sequenceID', 'time_in_frames', 'leg_number', 'PC1', 'PC2', etc.
+        A ScoresStore can be passed instead for faster repeated calls.
     sequence_id : str
         Sequence ID to plot
     components_list : list, optional
@@ -377,11 +411,14 @@ def plot_leg_pc_timeseries(scores_df,
         ax = [ax]
     
     # Get data for the specified sequence
-    current_seq = scores_df[scores_df["sequenceID"] == sequence_id]
+    if isinstance(scores_df, ScoresStore):
+        current_seq = scores_df
+    else:
+        current_seq = scores_df[scores_df["sequenceID"] == sequence_id]
     
     # Plot each leg's scores
     for leg_idx in leg_list:  # Assuming 8 legs
-        leg_data = current_seq[current_seq["leg_number"] == leg_idx + 1]
+        leg_data = _select_scores(current_seq, sequence_id=sequence_id, leg_number=leg_idx + 1)
         
         for pc_idx in components_list:
             ax[pc_idx].plot(leg_data["time_in_frames"], 
@@ -398,4 +435,19 @@ def plot_leg_pc_timeseries(scores_df,
     
     plt.tight_layout()
     
-    return fig, ax
\ No newline at end of file
+    return fig, ax
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+def _select_scores(scores_df, sq_level=None, sequence_id=None, leg_number=None):
+    """
+    Rows of a scores DataFrame or ScoresStore matching the given keys.
+    """
+    if isinstance(scores_df, ScoresStore):
+        return scores_df.select(sq_level=sq_level, sequence_id=sequence_id, leg_number=leg_number)
+
+    mask = np.ones(len(scores_df), dtype=bool)
+    for column, value in (("sq_level", sq_level), ("sequenceID", sequence_id), ("leg_number", leg_number)):
+        if value is not None:
+            mask &= (scores_df[column] == value).to_numpy()
+    return scores_df[mask]
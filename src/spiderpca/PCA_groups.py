@@ -0,0 +1,235 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .PCA import run_PCA
+from .PCA_model import PCAModel
+
+# Same pairings as plot_leg_score_hist_panelled: front, back, mid front, mid back
+LEG_PAIRINGS = [[0, 7], [3, 4], [1, 6], [2, 5]]
+
+
+def run_grouped_PCA(all_legs,
+                    spider_data_df=None,
+                    leg_groups=None,
+                    by=None,
+                    n_components=None,
+                    executor="thread",
+                    n_jobs=None):
+    """
+    Fit a separate PCA for every (leg group, metadata group) combination in parallel.
+
+    Each leg group's markers are stacked as rows, so the PCA input of a group is
+    [n_frames_in_group * n_legs_in_group, n_keypoints * 3], ordered frame by
+    frame and then leg by leg.
+
+    With executor="process" the leg tensor and the group codes are placed in
+    shared memory once (or, for a np.memmap, reopened from its file) and the
+    workers read them from there, so the data is never pickled.
+
+    Parameters
+    ----------
+    all_legs : numpy.ndarray
+        Leg tensor [n_frames, n_legs, n_keypoints, 3], e.g. from make_coxa_origin.
+    spider_data_df : pandas.DataFrame, optional
+        Metadata with one row per frame. Needed if by is given.
+    leg_groups : list of list of int, str or None, optional
+        Legs (0-based) fitted together. "each" fits every leg separately,
+        "pairs" uses LEG_PAIRINGS, None fits all legs together (default: None).
+    by : str or list of str, optional
+        Metadata column(s) to split frames by, e.g. "sq_level" or
+        ["species", "sq_level"] (default: None, no split).
+    n_components : int or float, optional
+        Passed to run_PCA.
+    executor : str, optional
+        "thread" (default) or "process".
+    n_jobs : int, optional
+        Number of workers (default: os.cpu_count()).
+
+    Returns
+    -------
+    dict
+        Keyed by (leg group tuple, metadata group key or None), each value is a
+        tuple of (PCAModel, scores, frame indices).
+    """
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Invalid executor: {executor}")
+
+    n_frames, n_legs = all_legs.shape[:2]
+    leg_groups = _get_leg_groups(leg_groups, n_legs)
+    frame_codes, group_keys = _get_frame_groups(spider_data_df, by, n_frames)
+
+    tasks = [(tuple(legs), code) for legs in leg_groups for code in range(len(group_keys))]
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(tasks))
+
+    if executor == "thread":
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            results = list(pool.map(
+                lambda task: _fit_group_arrays(all_legs, frame_codes, *task, n_components), tasks))
+    else:
+        with (_SharedArrays(all_legs, frame_codes) as (legs_spec, codes_spec),
+              ProcessPoolExecutor(max_workers=n_jobs,
+                                  initializer=_attach_worker_arrays,
+                                  initargs=(legs_spec, codes_spec)) as pool):
+            task_legs = [legs for legs, _ in tasks]
+            task_codes = [code for _, code in tasks]
+            results = list(pool.map(_fit_group, task_legs, task_codes, [n_components] * len(tasks)))
+
+    grouped = {}
+    for (legs, code), result in zip(tasks, results, strict=True):
+        components, mean, explained_variance, explained_variance_ratio, scores, frames = result
+        key = (legs, group_keys[code])
+        preprocessing = {"legs": list(legs)}
+        if by is not None:
+            preprocessing["by"] = by
+            preprocessing["group"] = _to_json_value(group_keys[code])
+        model = PCAModel(components, mean, explained_variance, explained_variance_ratio,
+                         preprocessing=preprocessing, n_samples=scores.shape[0])
+        grouped[key] = (model, scores, frames)
+
+    return grouped
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+# Arrays attached from shared memory (or a memmap file) in each worker process
+_WORKER_ARRAYS = {}
+_SHARED_BLOCKS = []
+
+
+def _attach_worker_arrays(legs_spec, codes_spec):
+    _WORKER_ARRAYS["all_legs"] = _open_shared(legs_spec)
+    _WORKER_ARRAYS["frame_codes"] = _open_shared(codes_spec)
+
+
+def _fit_group(legs, code, n_components):
+    """
+    Fit one group's PCA in a worker process, from the attached arrays.
+    """
+    return _fit_group_arrays(_WORKER_ARRAYS["all_legs"], _WORKER_ARRAYS["frame_codes"],
+                             legs, code, n_components)
+
+
+def _fit_group_arrays(all_legs, frame_codes, legs, code, n_components):
+    """
+    Fit one group's PCA. Returns plain arrays so that process results pickle cheaply.
+    """
+    frames = np.flatnonzero(frame_codes == code)
+    group_legs = all_legs[frames][:, list(legs)]
+    n_keypoints, n_dims = group_legs.shape[2:]
+
+    # [frames * legs, keypoints, dims], one row per leg per frame
+    principal_components, scores, pca = run_PCA(group_legs.reshape(-1, n_keypoints, n_dims),
+                                                n_components=n_components)
+
+    return (principal_components, pca.mean_, pca.explained_variance_,
+            pca.explained_variance_ratio_, scores, frames)
+
+
+def _get_leg_groups(leg_groups, n_legs):
+    if leg_groups is None:
+        return [list(range(n_legs))]
+    if leg_groups == "each":
+        return [[leg] for leg in range(n_legs)]
+    if leg_groups == "pairs":
+        n_paired = max(max(legs) for legs in LEG_PAIRINGS) + 1
+        if n_legs < n_paired:
+            raise ValueError(f"leg_groups='pairs' needs {n_paired} legs, all_legs has {n_legs}.")
+        leg_groups = LEG_PAIRINGS
+    for legs in leg_groups:
+        if not legs or any(leg < 0 or leg >= n_legs for leg in legs):
+            raise ValueError(f"Invalid leg group: {legs}")
+    return leg_groups
+
+
+def _get_frame_groups(spider_data_df, by, n_frames):
+    """
+    Group code of every frame (-1 for frames in no group) and the key of each code.
+    """
+    if by is None:
+        return np.zeros(n_frames, dtype=np.int32), [None]
+
+    if spider_data_df is None:
+        raise ValueError("spider_data_df is needed to group by metadata.")
+    if spider_data_df.shape[0] != n_frames:
+        raise ValueError("spider_data_df must have one row per frame.")
+
+    grouper = spider_data_df.reset_index(drop=True).groupby(by, sort=True, observed=True)
+    frame_codes = grouper.ngroup().fillna(-1).to_numpy(dtype=np.int32)
+    group_keys = grouper.size().index.tolist()
+
+    return frame_codes, group_keys
+
+
+def _to_json_value(value):
+    if isinstance(value, tuple):
+        return [_to_json_value(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if pd.isna(value):
+        return None
+    return value
+
+
+class _SharedArrays:
+    """
+    Context manager exposing arrays to worker processes without pickling them.
+
+    A contiguous np.memmap is shared by its file name; other arrays are copied
+    once into a shared memory block, which is unlinked on exit.
+    """
+
+    def __init__(self, *arrays):
+        self.arrays = arrays
+        self.blocks = []
+
+    def __enter__(self):
+        specs = []
+        for array in self.arrays:
+            if _is_shareable_memmap(array):
+                array.flush()
+                specs.append(("memmap", array.filename, array.shape, array.dtype.str, _file_offset(array)))
+                continue
+
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            self.blocks.append(block)
+            shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            shared[...] = array
+            specs.append(("shm", block.name, array.shape, array.dtype.str))
+        return specs
+
+    def __exit__(self, *exc):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+
+def _is_shareable_memmap(array):
+    return (isinstance(array, np.memmap)
+            and array.flags.c_contiguous
+            and array.filename is not None
+            and os.path.exists(array.filename))
+
+
+def _file_offset(array):
+    """
+    Position in its file of the first element of a (possibly sliced) memmap.
+    """
+    root = array
+    while isinstance(root.base, np.memmap):
+        root = root.base
+    return root.offset + (array.__array_interface__["data"][0] - root.__array_interface__["data"][0])
+
+
+def _open_shared(spec):
+    if spec[0] == "memmap":
+        _, file_name, shape, dtype, offset = spec
+        return np.memmap(file_name, mode="r", dtype=dtype, shape=shape, offset=offset)
+
+    _, name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    # Keep the block open for the life of the worker
+    _SHARED_BLOCKS.append(block)
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf)
@@ -0,0 +1,268 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from .data_memmap import DEFAULT_CHUNK_SIZE, frame_chunks
+
+
+def compute_score_histograms(scores,
+                             conditions=None,
+                             bins=50,
+                             components=None,
+                             score_range=None,
+                             chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Histogram the scores of every (PC, leg, condition) combination in one pass.
+
+    Each PC gets one bin grid shared by all legs and conditions, so the counts
+    of any leg or condition can be summed or compared directly. The scores
+    are binned chunk by chunk, and all combinations are counted in a single
+    bincount per chunk.
+
+    Parameters
+    ----------
+    scores : numpy.ndarray or pandas.DataFrame
+        Scores [n_frames, n_legs, n_components] or [n_frames, n_components], or a
+        wide scores DataFrame with PC1, PC2, ... columns (legs are taken from
+        its leg_number column, if any).
+    conditions : array-like, optional
+        Condition label of every frame, e.g. spider_data_df["sq_level"]. For a
+        DataFrame this defaults to its sq_level column (default: None, one condition).
+    bins : int, optional
+        Number of bins per PC (default: 50)
+    components : list of int, optional
+        0-based indices of the PCs to histogram (default: all)
+    score_range : tuple, optional
+        (min, max) of the bin grid for every PC. Scores outside it are not
+        counted (default: min and max of each PC)
+    chunk_size : int, optional
+        Rows binned per step
+
+    Returns
+    -------
+    ScoreHistograms
+    """
+    values, leg_codes, legs, condition_codes, condition_labels = _histogram_input(scores, conditions)
+
+    if components is None:
+        components = list(range(values.shape[1]))
+    components = list(components)
+
+    n_pcs, n_legs, n_conditions = len(components), len(legs), len(condition_labels)
+
+    if score_range is None:
+        low = np.full(n_pcs, np.inf)
+        high = np.full(n_pcs, -np.inf)
+        for rows in frame_chunks(values.shape[0], chunk_size):
+            chunk = values[rows][:, components]
+            low = np.fmin(low, np.nanmin(chunk, axis=0))
+            high = np.fmax(high, np.nanmax(chunk, axis=0))
+    else:
+        low = np.full(n_pcs, float(score_range[0]))
+        high = np.full(n_pcs, float(score_range[1]))
+
+    # Same convention as np.histogram for an empty range
+    same = low == high
+    low[same] -= 0.5
+    high[same] += 0.5
+
+    edges = np.linspace(low, high, bins + 1, axis=1)
+    counts = np.zeros(n_pcs * n_legs * n_conditions * bins, dtype=np.int64)
+
+    pc_offset = np.arange(n_pcs) * n_legs
+    for rows in frame_chunks(values.shape[0], chunk_size):
+        chunk = values[rows][:, components]
+        bin_idx = bin_index(chunk, edges)
+        valid = bin_idx >= 0
+
+        group = (pc_offset + leg_codes[rows, np.newaxis]) * n_conditions + condition_codes[rows, np.newaxis]
+        flat = group * bins + bin_idx
+        counts += np.bincount(flat[valid], minlength=counts.shape[0])
+
+    return ScoreHistograms(edges=edges,
+                           counts=counts.reshape(n_pcs, n_legs, n_conditions, bins),
+                           components=components,
+                           legs=legs,
+                           conditions=condition_labels)
+
+
+class ScoreHistograms:
+    """
+    Fixed-edge score counts for every (PC, leg, condition) combination.
+
+    Attributes
+    ----------
+    edges : numpy.ndarray, shape (n_pcs, n_bins + 1)
+        Bin edges of each PC, shared by all legs and conditions.
+    counts : numpy.ndarray, shape (n_pcs, n_legs, n_conditions, n_bins)
+        Number of scores in each bin.
+    components : list of int
+        0-based index of the PC in each row of counts.
+    legs : list
+        Leg of each leg row: 0-based leg indices for arrays, leg_number for DataFrames.
+    conditions : list
+        Condition label of each condition row, [None] when there are no conditions.
+    """
+
+    def __init__(self, edges, counts, components, legs, conditions):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.components = list(components)
+        self.legs = list(legs)
+        self.conditions = list(conditions)
+
+        self._pc_index = {pc: ii for ii, pc in enumerate(self.components)}
+        self._leg_index = {leg: ii for ii, leg in enumerate(self.legs)}
+        self._condition_index = {condition: ii for ii, condition in enumerate(self.conditions)}
+
+    def get(self, pc, leg=None, condition=None, density=False):
+        """
+        Counts (or density) of one PC, summed over all legs and conditions not given.
+
+        Parameters
+        ----------
+        pc : int
+            0-based PC index
+        leg, condition : optional
+            Leg and condition labels; None sums over all of them.
+        density : bool, optional
+            Normalise to a probability density, as ax.hist(density=True).
+
+        Returns
+        -------
+        values : numpy.ndarray, shape (n_bins,)
+        edges : numpy.ndarray, shape (n_bins + 1,)
+        """
+        if pc not in self._pc_index:
+            raise ValueError(f"PC index {pc} was not histogrammed.")
+        if leg is not None and leg not in self._leg_index:
+            raise ValueError(f"Leg {leg!r} was not histogrammed, the legs are {self.legs}.")
+        if condition is not None and condition not in self._condition_index:
+            raise ValueError(f"Condition {condition!r} was not histogrammed, "
+                             f"the conditions are {self.conditions}.")
+        pc_idx = self._pc_index[pc]
+        counts = self.counts[pc_idx]
+
+        counts = counts.sum(axis=0) if leg is None else counts[self._leg_index[leg]]
+        counts = counts.sum(axis=0) if condition is None else counts[self._condition_index[condition]]
+
+        edges = self.edges[pc_idx]
+        if not density:
+            return counts, edges
+
+        total = counts.sum()
+        if total == 0:
+            return np.zeros(counts.shape[0]), edges
+        return counts / (total * np.diff(edges)), edges
+
+    def stairs(self, ax, pc, leg=None, condition=None, density=True, fill=True, **kwargs):
+        """
+        Draw one histogram on ax with ax.stairs. Extra keyword arguments go to ax.stairs.
+        """
+        values, edges = self.get(pc, leg=leg, condition=condition, density=density)
+        return ax.stairs(values, edges, fill=fill, **kwargs)
+
+    def save(self, file_path):
+        """
+        Save the histograms to a compressed .npz file (no pickling).
+        """
+        labels = {"components": self.components,
+                  "legs": [_to_json_label(leg) for leg in self.legs],
+                  "conditions": [_to_json_label(condition) for condition in self.conditions]}
+        with open(file_path, "wb") as f:
+            np.savez_compressed(f, edges=self.edges, counts=self.counts,
+                                labels=np.array(json.dumps(labels)))
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Load histograms saved with ScoreHistograms.save.
+        """
+        with np.load(file_path, allow_pickle=False) as data:
+            labels = json.loads(str(data["labels"]))
+            return cls(edges=data["edges"], counts=data["counts"], **labels)
+
+    def __repr__(self):
+        n_pcs, n_legs, n_conditions, n_bins = self.counts.shape
+        return (f"ScoreHistograms(n_pcs={n_pcs}, n_legs={n_legs}, "
+                f"n_conditions={n_conditions}, n_bins={n_bins})")
+
+
+def bin_index(values, edges):
+    """
+    Bin of every value with np.histogram's rules (last bin closed), -1 if outside or NaN.
+
+    Inputs:
+        values: np.ndarray, shape (..., n_columns)
+        edges: np.ndarray, shape (n_columns, n_bins + 1), evenly spaced edges of each column
+
+    Returns:
+        np.ndarray of np.intp, the shape of values
+    """
+    n_bins = edges.shape[1] - 1
+    low, high = edges[:, 0], edges[:, -1]
+
+    with np.errstate(invalid="ignore"):
+        inside = (values >= low) & (values <= high)
+        bin_idx = np.floor((values - low) * (n_bins / (high - low)))
+    bin_idx = np.where(inside, bin_idx, 0).astype(np.intp)
+    np.clip(bin_idx, 0, n_bins - 1, out=bin_idx)
+
+    # Correct rounding at the edges, as np.histogram does
+    columns = np.arange(edges.shape[0])
+    bin_idx -= inside & (values < edges[columns, bin_idx])
+    bin_idx += inside & (values >= edges[columns, bin_idx + 1]) & (bin_idx != n_bins - 1)
+
+    bin_idx[~inside] = -1
+    return bin_idx
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+def _histogram_input(scores, conditions):
+    """
+    Scores as rows [n_rows, n_components] with the leg and condition code of every row.
+    """
+    if isinstance(scores, pd.DataFrame):
+        pc_columns = [column for column in scores.columns
+                      if column.startswith("PC") and column[2:].isdigit()]
+        pc_columns.sort(key=lambda column: int(column[2:]))
+        values = scores[pc_columns].to_numpy()
+
+        if "leg_number" in scores.columns:
+            leg_codes, legs = pd.factorize(scores["leg_number"], sort=True)
+            legs = list(legs)
+        else:
+            leg_codes, legs = np.zeros(values.shape[0], dtype=np.intp), [None]
+
+        if conditions is None and "sq_level" in scores.columns:
+            conditions = scores["sq_level"]
+        row_conditions = conditions
+    else:
+        values = scores
+        if values.ndim == 3:
+            n_frames, n_legs = values.shape[:2]
+            values = values.reshape(n_frames * n_legs, -1)
+            leg_codes, legs = np.tile(np.arange(n_legs), n_frames), list(range(n_legs))
+            row_conditions = None if conditions is None else np.repeat(np.asarray(conditions), n_legs)
+        else:
+            leg_codes, legs = np.zeros(values.shape[0], dtype=np.intp), [None]
+            row_conditions = conditions
+
+    if row_conditions is None:
+        condition_codes, condition_labels = np.zeros(values.shape[0], dtype=np.intp), [None]
+    else:
+        condition_codes, condition_labels = pd.factorize(np.asarray(row_conditions), sort=True)
+        if condition_codes.shape[0] != values.shape[0]:
+            raise ValueError("conditions must have one label per frame.")
+        if np.any(condition_codes < 0):
+            raise ValueError("conditions must not contain missing labels.")
+        condition_labels = list(condition_labels)
+
+    return values, np.asarray(leg_codes), legs, condition_codes, condition_labels
+
+
+def _to_json_label(label):
+    if isinstance(label, np.generic):
+        return label.item()
+    return label
@@ -0,0 +1,183 @@
+import json
+
+import numpy as np
+
+from .data_memmap import DEFAULT_CHUNK_SIZE, allocate_like, frame_chunks
+from .PCA import get_PCA_input
+
+MODEL_FORMAT_VERSION = 1
+
+
+class PCAModel:
+    """
+    A fitted PCA basis that can be saved, loaded and reused without refitting.
+
+    Bundles the principal components, mean pose, explained variance, marker
+    names and the preprocessing settings used before the fit, e.g.
+    {"coxa_origin": True, "reflect": True, "rescale_metres": True}.
+
+    Parameters
+    ----------
+    components : numpy.ndarray, shape (n_components, n_markers * 3)
+        The principal components.
+    mean : numpy.ndarray, shape (n_markers * 3,)
+        The mean that was subtracted before fitting.
+    explained_variance : numpy.ndarray, shape (n_components,)
+        Variance explained by each component.
+    explained_variance_ratio : numpy.ndarray, shape (n_components,)
+        Fraction of the total variance explained by each component.
+    marker_names : list of str, optional
+        Names of the markers in the order of the PCA input.
+    preprocessing : dict, optional
+        JSON-serialisable preprocessing settings used at fit time.
+    n_samples : int, optional
+        Number of samples (rows) the basis was fitted on.
+    """
+
+    def __init__(self, components, mean, explained_variance, explained_variance_ratio,
+                 marker_names=None, preprocessing=None, n_samples=None):
+        components = np.ascontiguousarray(components, dtype=np.float64)
+        mean = np.asarray(mean, dtype=np.float64).reshape(-1)
+
+        if components.ndim != 2:
+            raise ValueError("components must be 2d.")
+        if mean.shape[0] != components.shape[1]:
+            raise ValueError("mean must have one value per column of components.")
+        if components.shape[1] % 3 != 0:
+            raise ValueError("components must have n_markers*3 columns.")
+
+        self.components = components
+        self.mean = mean
+        self.explained_variance = np.asarray(explained_variance, dtype=np.float64)
+        self.explained_variance_ratio = np.asarray(explained_variance_ratio, dtype=np.float64)
+        self.marker_names = list(marker_names) if marker_names is not None else None
+        self.preprocessing = dict(preprocessing) if preprocessing is not None else {}
+        self.n_samples = int(n_samples) if n_samples is not None else None
+
+        self._components_T = np.ascontiguousarray(components.T)
+
+    @classmethod
+    def from_pca(cls, pca, marker_names=None, preprocessing=None):
+        """
+        Build a model from a fitted PCA object, e.g. the one returned by run_PCA.
+        """
+        # IncrementalPCA counts its samples as n_samples_seen_
+        n_samples = getattr(pca, "n_samples_", getattr(pca, "n_samples_seen_", None))
+        return cls(components=pca.components_,
+                   mean=pca.mean_,
+                   explained_variance=pca.explained_variance_,
+                   explained_variance_ratio=pca.explained_variance_ratio_,
+                   marker_names=marker_names,
+                   preprocessing=preprocessing,
+                   n_samples=n_samples)
+
+    @property
+    def n_components(self):
+        return self.components.shape[0]
+
+    @property
+    def n_markers(self):
+        return self.components.shape[1] // 3
+
+    @property
+    def mu(self):
+        """
+        The mean pose, shape (1, n_markers, 3), as used by reconstruct.
+        """
+        return self.mean.reshape(1, -1, 3)
+
+    def transform(self, markers, chunk_size=DEFAULT_CHUNK_SIZE, out=None):
+        """
+        Project markers onto the components.
+
+        Parameters
+        ----------
+        markers : numpy.ndarray
+            Marker data, shape (n_frames, n_markers, 3) or (n_frames, n_markers*3).
+            A np.memmap is scored chunk by chunk into a np.memmap.
+        chunk_size : int, optional
+            Frames scored per matmul.
+        out : numpy.ndarray, optional
+            Preallocated (n_frames, n_components) buffer for the scores.
+
+        Returns
+        -------
+        numpy.ndarray, shape (n_frames, n_components)
+            The scores.
+        """
+        pca_input = get_PCA_input(markers) if markers.ndim > 2 else markers
+        if pca_input.shape[1] != self.components.shape[1]:
+            raise ValueError(f"markers have {pca_input.shape[1]} values per frame, "
+                             f"the model expects {self.components.shape[1]}.")
+
+        if out is None:
+            out = allocate_like(pca_input, (pca_input.shape[0], self.n_components), dtype=np.float64)
+
+        for rows in frame_chunks(pca_input.shape[0], chunk_size):
+            # Centre before projecting, in float64, as sklearn does; taking
+            # mean @ C.T off afterwards loses precision far from the origin
+            centred = np.subtract(pca_input[rows], self.mean, dtype=np.float64)
+            np.matmul(centred, self._components_T, out=out[rows])
+
+        return out
+
+    def inverse_transform(self, scores, components_list=None):
+        """
+        Reconstruct frames from scores.
+
+        Parameters
+        ----------
+        scores : numpy.ndarray, shape (n_frames, n_components)
+            The PC scores.
+        components_list : list, optional
+            Indices of components to use. If None, all components are used.
+
+        Returns
+        -------
+        numpy.ndarray, shape (n_frames, n_markers, 3)
+            The reconstructed frames.
+        """
+        if components_list is None:
+            reconstruction = scores @ self.components
+        else:
+            reconstruction = scores[:, components_list] @ self.components[components_list]
+
+        reconstruction += self.mean
+        return reconstruction.reshape(scores.shape[0], -1, 3)
+
+    def save(self, file_path):
+        """
+        Save the model to a compressed .npz file (no pickling).
+        """
+        metadata = {"version": MODEL_FORMAT_VERSION,
+                    "marker_names": self.marker_names,
+                    "preprocessing": self.preprocessing,
+                    "n_samples": self.n_samples}
+        with open(file_path, "wb") as f:
+            np.savez_compressed(f,
+                                components=self.components,
+                                mean=self.mean,
+                                explained_variance=self.explained_variance,
+                                explained_variance_ratio=self.explained_variance_ratio,
+                                metadata=np.array(json.dumps(metadata)))
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Load a model saved with PCAModel.save.
+        """
+        with np.load(file_path, allow_pickle=False) as data:
+            metadata = json.loads(str(data["metadata"]))
+            if metadata.get("version", 0) > MODEL_FORMAT_VERSION:
+                raise ValueError(f"{file_path} was saved by a newer version of spiderpca.")
+            return cls(components=data["components"],
+                       mean=data["mean"],
+                       explained_variance=data["explained_variance"],
+                       explained_variance_ratio=data["explained_variance_ratio"],
+                       marker_names=metadata["marker_names"],
+                       preprocessing=metadata["preprocessing"],
+                       n_samples=metadata.get("n_samples"))
+
+    def __repr__(self):
+        return (f"PCAModel(n_components={self.n_components}, n_markers={self.n_markers}, "
+                f"preprocessing={self.preprocessing})")
@@ -0,0 +1,189 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .data_columnar import ColumnarWriter
+from .data_legs import get_leg_marker_schema, normalise_legs
+from .data_loading import iter_spider_data_chunks
+from .data_rotation import undo_body_rotation
+
+# Settings that decide what is projected; the model or the caller must give them
+REQUIRED_PREPROCESSING = ("undo_rotation", "legs")
+
+# Used for any other setting a model's preprocessing does not record
+DEFAULT_PREPROCESSING = {"rescale_metres": True,
+                         "rotation_axis": "z",
+                         "num_legs": 8,
+                         "coxa_origin": True,
+                         "reflect": True}
+
+# Metadata columns stored with the scores, and their names in the output
+DEFAULT_KEEP_COLUMNS = {"sq_level": "sq_level",
+                        "filename": "sequenceID",
+                        "time_in_frames": "time_in_frames"}
+
+
+def project_recordings(file_paths,
+                       model,
+                       output_path:str,
+                       species:str = None,
+                       chunksize:int = 100_000,
+                       n_components:int = None,
+                       dtype = np.float32,
+                       keep_columns:dict = None,
+                       append:bool = True,
+                       **preprocessing):
+    """
+    Stream recordings from disk, preprocess them as at fit time, and score them
+    against a frozen PCA basis.
+
+    Only the marker columns, the columns in keep_columns and the body angle
+    are parsed. Frames with a NaN marker or body angle are skipped; missing
+    metadata values are stored as missing. Each CSV chunk goes through the
+    model's preprocessing (rescaling, body rotation undo, leg extraction, coxa
+    origin and reflection) and is scored with one matmul against the stored components. Its scores are then
+    appended to an on-disk column store (see read_columnar). Buffers are
+    reused between chunks, so memory is bounded by chunksize whatever the
+    size of the recordings.
+
+    Inputs:
+        file_paths: str or list of str, CSV recordings to score
+        model: PCAModel, the frozen basis. Its preprocessing dict gives the
+            settings it was fitted with. undo_rotation and legs must be
+            recorded there or passed as keyword arguments; other settings
+            fall back to DEFAULT_PREPROCESSING.
+        output_path: str, directory of the column store
+        species: str, optional, species to filter by (default: None)
+        chunksize: int, CSV rows per chunk (default: 100000)
+        n_components: int, optional, keep only the first n_components scores
+        dtype: numpy dtype of the stored scores (default: np.float32)
+        keep_columns: dict, optional, metadata column -> stored name
+            (default: DEFAULT_KEEP_COLUMNS, those present in the file)
+        append: bool, append to an existing store (default: True)
+        **preprocessing: overrides of the model's preprocessing settings
+
+    Returns:
+        dict of throughput metrics: frames, rows, chunks, bytes read, seconds,
+        frames per second, MB per second and seconds per stage
+    """
+    if isinstance(file_paths, (str, os.PathLike)):
+        file_paths = [file_paths]
+
+    known = set(DEFAULT_PREPROCESSING) | set(REQUIRED_PREPROCESSING)
+    settings = dict(DEFAULT_PREPROCESSING)
+    settings.update({key: value for key, value in model.preprocessing.items() if key in known})
+    settings.update(preprocessing)
+    missing = [key for key in REQUIRED_PREPROCESSING if key not in settings]
+    if missing:
+        raise ValueError(f"The model does not record {', '.join(missing)} in its preprocessing; "
+                         "pass them to project_recordings.")
+    if settings["legs"] and not settings["coxa_origin"]:
+        raise ValueError("Leg projection needs coxa_origin=True, as in normalise_legs.")
+
+    n_components = model.n_components if n_components is None else min(n_components, model.n_components)
+    pc_names = [f"PC{i+1}" for i in range(n_components)]
+
+    writer = ColumnarWriter(output_path, append=append)
+    stats = {"files": len(file_paths), "frames": 0, "rows": 0, "chunks": 0, "bytes_read": 0}
+    stage_seconds = {"read": 0.0, "preprocess": 0.0, "project": 0.0, "write": 0.0}
+    start_time = time.perf_counter()
+
+    for file_path in file_paths:
+        header = _read_header(file_path)
+        keep = {column: name for column, name in (keep_columns or DEFAULT_KEEP_COLUMNS).items()
+                if keep_columns is not None or column in header}
+        metadata_columns = list(keep)
+        if settings["undo_rotation"]:
+            metadata_columns.append("whole_body_angle")
+
+        # Only the markers and these columns are parsed. NaN rows are dropped
+        # below from the markers and body angle only, so missing metadata is kept
+        chunks = iter_spider_data_chunks(file_path,
+                                         species=species,
+                                         remove_nan=False,
+                                         rescale_metres=settings["rescale_metres"],
+                                         metadata_columns=list(dict.fromkeys(metadata_columns)),
+                                         chunksize=chunksize)
+        legs_buffer = None
+        scores_buffer = None
+
+        while True:
+            tic = time.perf_counter()
+            chunk = next(chunks, None)
+            stage_seconds["read"] += time.perf_counter() - tic
+            if chunk is None:
+                break
+            markers, marker_columns, metadata = chunk
+
+            tic = time.perf_counter()
+            complete = ~np.isnan(markers).any(axis=(1, 2))
+            if settings["undo_rotation"]:
+                complete &= metadata["whole_body_angle"].notna().to_numpy()
+            if not complete.all():
+                markers = markers[complete]
+                metadata = metadata[complete]
+            n_frames = markers.shape[0]
+            if n_frames == 0:
+                stage_seconds["preprocess"] += time.perf_counter() - tic
+                continue
+
+            if settings["undo_rotation"]:
+                undo_body_rotation(markers, metadata["whole_body_angle"].to_numpy(),
+                                   which_axis=settings["rotation_axis"], out=markers)
+
+            if settings["legs"]:
+                marker_names = [column[:-2] for column in marker_columns[::3]]
+                schema = get_leg_marker_schema(marker_names, settings["num_legs"])
+                legs_shape = (n_frames, schema.n_legs, schema.n_keypoints, 3)
+                if legs_buffer is None or legs_buffer.shape[0] < n_frames:
+                    legs_buffer = np.empty(legs_shape)
+                all_legs = schema.gather(markers, out=legs_buffer[:n_frames])
+                # Rows are (frame, leg); the order does not change the scores
+                pca_input, _ = normalise_legs(all_legs, n_groups=schema.n_legs,
+                                              reflect=settings["reflect"],
+                                              layout="interleaved", flat=True, out=all_legs)
+                rows_per_frame = schema.n_legs
+            else:
+                pca_input = markers.reshape(n_frames, -1)
+                rows_per_frame = 1
+            stage_seconds["preprocess"] += time.perf_counter() - tic
+
+            tic = time.perf_counter()
+            n_rows = pca_input.shape[0]
+            if scores_buffer is None or scores_buffer.shape[0] < n_rows:
+                scores_buffer = np.empty((n_rows, model.n_components))
+            scores = model.transform(pca_input, chunk_size=n_rows, out=scores_buffer[:n_rows])
+            stage_seconds["project"] += time.perf_counter() - tic
+
+            tic = time.perf_counter()
+            columns = {name: scores[:, ii].astype(dtype) for ii, name in enumerate(pc_names)}
+            for column, name in keep.items():
+                columns[name] = np.repeat(metadata[column].to_numpy(), rows_per_frame)
+            if rows_per_frame > 1:
+                columns["leg_number"] = np.tile(np.arange(1, rows_per_frame + 1, dtype=np.int8), n_frames)
+            writer.append(columns)
+            stage_seconds["write"] += time.perf_counter() - tic
+
+            stats["frames"] += n_frames
+            stats["rows"] += n_rows
+            stats["chunks"] += 1
+
+        stats["bytes_read"] += os.path.getsize(file_path)
+
+    seconds = time.perf_counter() - start_time
+    stats["seconds"] = seconds
+    stats["frames_per_second"] = stats["frames"] / seconds if seconds > 0 else float("inf")
+    stats["MB_per_second"] = stats["bytes_read"] / 1e6 / seconds if seconds > 0 else float("inf")
+    stats["stage_seconds"] = stage_seconds
+
+    print(f"Projected {stats['frames']} frames ({stats['rows']} rows) from {stats['files']} files "
+          f"in {seconds:.1f} s, {stats['frames_per_second']:.0f} frames/s.")
+
+    return stats
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+def _read_header(file_path):
+    return list(pd.read_csv(file_path, nrows=0).columns)
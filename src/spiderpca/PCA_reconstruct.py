@@ -1,5 +1,10 @@
+from collections import Counter
+
 import numpy as np
 
+# Rank-1 updates of a running subset sum before it is recomputed from scratch
+REBUILD_INTERVAL = 32
+
 
 def reconstruct(score_frames, principal_components, mu, components_list=None):
     """
@@ -33,7 +38,7 @@ def reconstruct(score_frames, principal_components, mu, components_list=None):
     """
 
     if components_list is None:
-        components_list = range(principal_components.shape[1])
+        components_list = range(principal_components.shape[0])
 
     if not isinstance(score_frames, np.ndarray):
         raise TypeError("score_frames must be a numpy array.")
@@ -41,13 +46,17 @@ def reconstruct(score_frames, principal_components, mu, components_list=None):
     if len(score_frames.shape) != 2:
         raise ValueError("score_frames must be 2d.")
     
-    assert score_frames.shape[1] == principal_components.shape[0], "score_frames must have the same number of columns as components_list."
-    assert len(components_list) <= principal_components.shape[1], "components_list must not exceed the number of principal components."
-    assert len(mu.shape)==3, "mu must be a 3d array: [1,nMarkers,3]."
+    if score_frames.shape[1] != principal_components.shape[0]:
+        raise ValueError("score_frames must have one column per principal component.")
+    if len(components_list) > principal_components.shape[0]:
+        raise ValueError("components_list must not exceed the number of principal components.")
+    if len(mu.shape) != 3:
+        raise ValueError("mu must be a 3d array: [1,nMarkers,3].")
+    if principal_components.shape[1] != mu.shape[1] * mu.shape[2]:
+        raise ValueError("principal_components must have one column per coordinate of mu.")
 
     n_markers = mu.shape[1]
     n_dims = mu.shape[2]
-    n_frames = score_frames.shape[0]
 
     # Select principal components and scores based on the provided list
     selected_PCs = principal_components[components_list,:] # principal_components is [n_components, n_markers*3]
@@ -58,9 +67,116 @@ def reconstruct(score_frames, principal_components, mu, components_list=None):
 
     reconstructed_frames = mu + reconstruction  # Broadcasting [1, n_markers, 3] over [n_frames, n_markers, 3]
 
-    assert reconstructed_frames.shape[0] == n_frames, "Reconstructed frames do not match the number of frames."
-    assert reconstructed_frames.shape[1] == n_markers, "Reconstructed frames do not match the number of markers."
-    assert reconstructed_frames.shape[2] == n_dims, "Reconstructed frames do not match the number of dimensions."
-
     return reconstructed_frames
 
+
+def reconstruct_subsets(score_frames, principal_components, mu, subsets=None, cumulative_k=None, lazy=False):
+    """
+    Reconstruct frames for many component subsets at once, sharing partial sums between them.
+
+    The subsets are evaluated in order, each from the previous one: the rank-1
+    contributions of components added to the subset are summed in, and those
+    of components removed are subtracted. A cumulative sweep (k = 1, 2, 3, ...)
+    therefore costs one rank-1 update per step instead of a fresh k-component
+    product. When a subset shares less with the previous one than it would cost
+    to update, or after REBUILD_INTERVAL updates, it is computed directly.
+
+    Parameters
+    ----------
+    score_frames : numpy.ndarray, shape (n_frames, n_components)
+        The PC scores.
+    principal_components : numpy.ndarray, shape (n_components, n_markers * 3)
+        The principal components.
+    mu : numpy.ndarray, shape (1, n_markers, 3)
+        The mean pose.
+    subsets : list of lists, optional
+        Component indices of each reconstruction, e.g. [[0], [0, 1], [2, 3]].
+        As in reconstruct, a repeated index adds its component once per repeat.
+    cumulative_k : int or list of int, optional
+        Instead of subsets, reconstruct with the first k components for each k
+        (an int K means k = 1, ..., K). If neither is given, all cumulative
+        subsets are used.
+    lazy : bool, optional
+        Return a generator that yields one reconstruction at a time
+        instead of the stacked array (default: False).
+
+    Returns
+    -------
+    numpy.ndarray, shape (n_subsets, n_frames, n_markers, 3), or a generator
+        of numpy.ndarray, shape (n_frames, n_markers, 3)
+        The reconstructed frames of each subset, as reconstruct(score_frames,
+        principal_components, mu, components_list=subset) returns them.
+    """
+    if not isinstance(score_frames, np.ndarray):
+        raise TypeError("score_frames must be a numpy array.")
+    if len(score_frames.shape) != 2:
+        raise ValueError("score_frames must be 2d.")
+    if score_frames.shape[1] != principal_components.shape[0]:
+        raise ValueError("score_frames must have one column per principal component.")
+    if subsets is not None and cumulative_k is not None:
+        raise ValueError("Give either subsets or cumulative_k, not both.")
+
+    n_components = principal_components.shape[0]
+    if subsets is None:
+        if cumulative_k is None:
+            cumulative_k = n_components
+        if np.isscalar(cumulative_k):
+            cumulative_k = range(1, cumulative_k + 1)
+        subsets = [range(k) for k in cumulative_k]
+    subsets = [list(subset) for subset in subsets]
+
+    for subset in subsets:
+        if any(component < 0 or component >= n_components for component in subset):
+            raise ValueError(f"Invalid components in subset {subset}.")
+
+    n_frames = score_frames.shape[0]
+    mean_pose = mu.reshape(-1)
+    subset_sums = _iter_subset_sums(score_frames, principal_components, subsets)
+
+    if lazy:
+        return ((subset_sum + mean_pose).reshape(n_frames, -1, mu.shape[2]) for subset_sum in subset_sums)
+
+    dtype = np.result_type(score_frames, principal_components, mu)
+    out = np.empty((len(subsets), n_frames) + mu.shape[1:], dtype=dtype)
+    for ii, subset_sum in enumerate(subset_sums):
+        np.add(subset_sum, mean_pose, out=out[ii].reshape(n_frames, -1))
+    return out
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+def _iter_subset_sums(score_frames, principal_components, subsets):
+    """
+    Yield the summed rank-1 contributions of each subset, [n_frames, n_markers*3].
+    The same buffer is updated and yielded every time. Subsets are multisets:
+    a repeated index adds its component once per repeat, as in reconstruct.
+
+    Every update rounds the running sum again, so its error grows with the
+    number of updates since it was last computed directly. The sum is
+    recomputed after REBUILD_INTERVAL updates, which keeps the error within
+    about sqrt(REBUILD_INTERVAL) times that of reconstruct, however long the sweep.
+    """
+    dtype = np.result_type(score_frames, principal_components)
+    running = np.zeros((score_frames.shape[0], principal_components.shape[1]), dtype=dtype)
+    current = Counter()
+    n_updates = 0
+
+    for subset in subsets:
+        target = Counter(subset)
+        added = sorted((target - current).elements())
+        removed = sorted((current - target).elements())
+        n_changes = len(added) + len(removed)
+
+        if n_changes >= len(subset) or n_updates + n_changes > REBUILD_INTERVAL:
+            # Cheaper to start again than to update, or due to drop the accumulated rounding
+            selected = sorted(target.elements())
+            running[...] = score_frames[:, selected] @ principal_components[selected]
+            n_updates = 0
+        else:
+            if added:
+                running += score_frames[:, added] @ principal_components[added]
+            if removed:
+                running -= score_frames[:, removed] @ principal_components[removed]
+            n_updates += n_changes
+        current = target
+
+        yield running
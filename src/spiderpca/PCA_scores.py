@@ -16,16 +16,26 @@ def get_score_range(scores, num_frames=30):
     min_score = np.mean(scores, axis=0) - (2 * np.std(scores, axis=0))
     max_score = np.mean(scores, axis=0) + (2 * np.std(scores, axis=0))
 
-    # Create a triangle wave for the time series
-    half_length = num_frames // 2 + 1
-    triangle_wave = np.linspace(0, 1, half_length)
-    triangle_wave = np.concatenate([triangle_wave, triangle_wave[-2:0:-1]])
-
-    score_frames = min_score + (max_score - min_score) * triangle_wave[:, np.newaxis]
+    score_frames = min_score + (max_score - min_score) * triangle_wave(num_frames)[:, np.newaxis]
 
     return score_frames
 
 
+def triangle_wave(num_frames):
+    """
+    Generate a looping 0 -> 1 -> 0 ramp for animations.
+
+    Parameters:
+    - num_frames (int): Number of frames, rounded down to an even number.
+
+    Returns:
+    - numpy.ndarray: The ramp, starting at 0 and peaking at 1 halfway.
+    """
+    half_length = num_frames // 2 + 1
+    ramp = np.linspace(0, 1, half_length)
+    return np.concatenate([ramp, ramp[-2:0:-1]])
+
+
 def create_scores_dataframe(scores, spider_data_df, time_column='time_in_frames', filename_column='filename', sq_level_column='sq_level', leg_number=None):
     """
     Create a DataFrame containing PCA scores, metadata, and leg information.
@@ -62,4 +72,234 @@ def create_scores_dataframe(scores, spider_data_df, time_column='time_in_frames'
     if leg_number is not None:
         scores_df["leg_number"] = leg_number
     
-    return scores_df
\ No newline at end of file
+    return scores_df
+
+
+def create_leg_scores_dataframe(scores,
+                                spider_data_df,
+                                n_components=None,
+                                layout="wide",
+                                dtype=None,
+                                row_order="frame",
+                                n_legs=8,
+                                n_groups=2,
+                                time_column='time_in_frames',
+                                filename_column='filename',
+                                sq_level_column='sq_level'):
+    """
+    Create one scores DataFrame for all legs at once, with compact dtypes.
+
+    The score block wraps the scores array without copying it when possible
+    (all components, same dtype and layout="wide"). sq_level, sequenceID and
+    leg_number are categorical, so metadata costs a few bytes per row.
+
+    Parameters
+    ----------
+    scores : numpy.ndarray
+        Either [n_frames, n_legs, n_components], or the flat leg-agnostic
+        scores [n_frames * n_legs, n_components] in the row order given by row_order.
+    spider_data_df : pandas.DataFrame
+        DataFrame containing metadata, one row per frame
+    n_components : int, optional
+        Keep only the first n_components PCs (default: all)
+    layout : str, optional
+        "wide" for one row per (frame, leg) and one column per PC, or "long"
+        for one row per (frame, leg, PC) with "PC" and "score" columns (default: "wide")
+    dtype : numpy dtype, optional
+        dtype of the scores, e.g. np.float32 to halve their memory (default: unchanged)
+    row_order : str, optional
+        Row order of flat scores: "frame" for (frame, leg), as from
+        normalise_legs(layout="interleaved") or a reshaped 3D array, or
+        "blocked" for (leg group, frame, leg in group), as from
+        normalise_legs(layout="blocked") or combine_legs (default: "frame")
+    n_legs : int, optional
+        Number of legs, for flat scores (default: 8)
+    n_groups : int, optional
+        Number of leg groups, for row_order="blocked" (default: 2)
+    time_column, filename_column, sq_level_column : str, optional
+        Names of the metadata columns in spider_data_df
+    
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame containing PCA scores, metadata, and leg information
+    """
+    if layout not in ("wide", "long"):
+        raise ValueError(f"Invalid layout: {layout}")
+    if row_order not in ("frame", "blocked"):
+        raise ValueError(f"Invalid row_order: {row_order}")
+
+    n_frames = spider_data_df.shape[0]
+    if scores.ndim == 3:
+        if row_order != "frame":
+            raise ValueError("3D scores are always in frame order.")
+        n_legs = scores.shape[1]
+        scores = scores.reshape(-1, scores.shape[2])
+
+    if scores.shape[0] != n_frames * n_legs:
+        raise ValueError(f"scores has {scores.shape[0]} rows, expected n_frames * n_legs = {n_frames * n_legs}.")
+
+    # Frame and leg of every score row
+    rows = np.arange(scores.shape[0])
+    if row_order == "frame":
+        frame_idx = rows // n_legs
+        leg_idx = rows % n_legs
+    else:
+        legs_per_group = n_legs // n_groups
+        frame_idx = (rows // legs_per_group) % n_frames
+        leg_idx = (rows // (legs_per_group * n_frames)) * legs_per_group + rows % legs_per_group
+
+    if n_components is not None:
+        scores = scores[:, :n_components]
+    if dtype is not None:
+        scores = scores.astype(dtype, copy=False)
+    pc_names = [f"PC{i+1}" for i in range(scores.shape[1])]
+
+    metadata = {
+        "sq_level": _take_categorical(spider_data_df[sq_level_column], frame_idx),
+        "sequenceID": _take_categorical(spider_data_df[filename_column], frame_idx),
+        "time_in_frames": spider_data_df[time_column].to_numpy()[frame_idx],
+        "leg_number": pd.Categorical.from_codes(leg_idx.astype(np.int8), categories=range(1, n_legs + 1)),
+    }
+
+    if layout == "wide":
+        # Zero-copy wrap of the score block when scores needed no conversion
+        scores_df = pd.DataFrame(scores, columns=pc_names, copy=False)
+        for column, values in metadata.items():
+            scores_df[column] = values
+        return scores_df
+
+    n_pcs = scores.shape[1]
+    long_df = pd.DataFrame({column: _repeat_rows(values, n_pcs) for column, values in metadata.items()})
+    long_df["PC"] = pd.Categorical.from_codes(np.tile(np.arange(n_pcs, dtype=np.int16), scores.shape[0]),
+                                              categories=pc_names)
+    long_df["score"] = scores.reshape(-1)
+    return long_df
+
+class ScoresStore:
+    """
+    Scores DataFrame sorted once by (sq_level, sequenceID, leg_number, time_in_frames)
+    for fast repeated lookups.
+
+    Every (sq_level, sequenceID, leg_number) group is a contiguous block of rows
+    in time order. A lookup finds its blocks in a dictionary and returns them as
+    a row slice instead of masking the whole DataFrame. The dictionary for each
+    combination of keys is built on first use.
+
+    Parameters
+    ----------
+    scores_df : pandas.DataFrame
+        DataFrame from create_scores_dataframe or create_leg_scores_dataframe.
+        The leg_number column is optional.
+    """
+
+    def __init__(self, scores_df, sq_level_column='sq_level', sequence_column='sequenceID',
+                 leg_column='leg_number', time_column='time_in_frames'):
+        self.key_columns = [sq_level_column, sequence_column]
+        if leg_column in scores_df.columns:
+            self.key_columns.append(leg_column)
+        self.time_column = time_column
+
+        # Missing keys get their own code (sorted last) instead of the -1 sentinel,
+        # which would index the last category
+        codes, uniques = [], []
+        for column in self.key_columns:
+            column_codes, column_uniques = pd.factorize(scores_df[column], sort=True,
+                                                        use_na_sentinel=False)
+            codes.append(column_codes)
+            uniques.append(list(column_uniques))
+
+        # lexsort sorts by the last key first
+        order = np.lexsort((scores_df[time_column].to_numpy(), *reversed(codes)))
+        self.data = scores_df.iloc[order].reset_index(drop=True)
+
+        sorted_codes = np.stack([column_codes[order] for column_codes in codes], axis=1)
+        starts = np.flatnonzero(np.r_[True, np.any(sorted_codes[1:] != sorted_codes[:-1], axis=1)])
+        stops = np.r_[starts[1:], len(order)]
+
+        self._groups = [(tuple(column_uniques[code]
+                               for column_uniques, code in zip(uniques, sorted_codes[start], strict=True)),
+                         start, stop)
+                        for start, stop in zip(starts, stops, strict=True)]
+        self._uniques = dict(zip(self.key_columns, uniques, strict=True))
+        self._ranges = {}
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def conditions(self):
+        return self._uniques[self.key_columns[0]]
+
+    @property
+    def sequence_ids(self):
+        return self._uniques[self.key_columns[1]]
+
+    @property
+    def leg_numbers(self):
+        return self._uniques.get(self.key_columns[2]) if len(self.key_columns) > 2 else None
+
+    def select(self, sq_level=None, sequence_id=None, leg_number=None):
+        """
+        Rows matching the given keys, in (sq_level, sequenceID, leg_number, time) order.
+
+        Keys left as None match everything. Rows with a missing (NaN) key are
+        only returned by queries that leave that key as None, as with boolean
+        masking. A result that is one contiguous block
+        (e.g. one condition, one sequence, or one leg of one sequence) is a row
+        slice of the sorted DataFrame.
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        query = (sq_level, sequence_id, leg_number)[:len(self.key_columns)]
+        if len(self.key_columns) < 3 and leg_number is not None:
+            raise ValueError("scores have no leg_number column.")
+
+        pattern = tuple(value is not None for value in query)
+        if pattern not in self._ranges:
+            self._ranges[pattern] = self._build_ranges(pattern)
+
+        key = tuple(value for value in query if value is not None)
+        ranges = self._ranges[pattern].get(key, [])
+
+        if len(ranges) == 1:
+            start, stop = ranges[0]
+            return self.data.iloc[start:stop]
+        if not ranges:
+            return self.data.iloc[0:0]
+        return self.data.iloc[np.concatenate([np.arange(start, stop) for start, stop in ranges])]
+
+    def _build_ranges(self, pattern):
+        """
+        Row ranges of every key combination of the queried columns, adjacent ranges merged.
+        """
+        ranges = {}
+        for group_key, start, stop in self._groups:
+            key = tuple(value for value, used in zip(group_key, pattern, strict=True) if used)
+            key_ranges = ranges.setdefault(key, [])
+            if key_ranges and key_ranges[-1][1] == start:
+                key_ranges[-1] = (key_ranges[-1][0], stop)
+            else:
+                key_ranges.append((start, stop))
+        return ranges
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+def _take_categorical(column, frame_idx):
+    """
+    Categorical of column's values at frame_idx, gathering only the integer codes.
+    """
+    categorical = pd.Categorical(column.to_numpy())
+    return pd.Categorical.from_codes(categorical.codes[frame_idx], categories=categorical.categories)
+
+
+def _repeat_rows(values, repeats):
+    """
+    Repeat every row of a metadata column, e.g. once per PC for the long layout.
+    """
+    if isinstance(values, pd.Categorical):
+        return pd.Categorical.from_codes(np.repeat(values.codes, repeats), categories=values.categories)
+    return np.repeat(values, repeats)
+
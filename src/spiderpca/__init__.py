@@ -4,38 +4,90 @@ spiderpca: Running PCA on spider biomechanics data
 
 from __future__ import annotations
 
-from .data_loading import load_and_process_spider_data
-from .data_rotation import undo_body_rotation
-from .data_legs import get_all_legs_markers, put_legs_back, make_coxa_origin, unmake_coxa_origin, reflect_legs, combine_legs, restore_leg_positions
-from .plot_legs import plot_leg_overlay
-from .PCA import run_PCA
+from .data_loading import load_and_process_spider_data, load_spider_data_chunked, iter_spider_data_chunks
+from .data_cache import load_and_process_spider_data_cached, evict_cache, clear_cache
+from .data_memmap import create_memmap
+from .data_columnar import ColumnarWriter, read_columnar
+from .data_rotation import (undo_body_rotation, apply_rotations, axis_rotation_matrices,
+                            euler_rotation_matrices, quaternion_rotation_matrices)
+from .data_legs import LegMarkerSchema, get_leg_marker_schema, get_all_legs_markers, LegScatterPlan, get_leg_scatter_plan, put_legs_back, make_coxa_origin, unmake_coxa_origin, reflect_legs, combine_legs, restore_leg_positions, normalise_legs, denormalise_legs
+from .plot_legs import plot_leg_overlay, compute_leg_density, plot_leg_density
+from .PCA import run_PCA, run_PCA_incremental, CovariancePCA
+from .PCA_model import PCAModel
+from .PCA_project import project_recordings
+from .PCA_groups import run_grouped_PCA
+from .PCA_bootstrap import bootstrap_PCA, BootstrapResult
 from .PCA_figures import (plot_explained, plot_pc_experiment, plot_pc_histogram, 
                          plot_leg_score_hist, plot_leg_score_hist_panelled,
                          plot_leg_pc_timeseries)
-from .PCA_scores import get_score_range, create_scores_dataframe
-from .PCA_reconstruct import reconstruct
+from .plot_batch import render_figures
+from .PCA_histograms import compute_score_histograms, ScoreHistograms
+from .PCA_scores import get_score_range, triangle_wave, create_scores_dataframe, create_leg_scores_dataframe, ScoresStore
+from .PCA_reconstruct import reconstruct, reconstruct_subsets
+from .PCA_errors import reconstruction_errors, ReconstructionErrors
+from .PCA_animation import reconstruct_pc_sweeps, PoseRenderer, save_animation, animate_pc_sweeps
 
 from importlib.metadata import version
 
 __all__ = ("__version__", 
            "load_and_process_spider_data",
+           "load_spider_data_chunked",
+           "iter_spider_data_chunks",
+           "load_and_process_spider_data_cached",
+           "evict_cache",
+           "clear_cache",
+           "create_memmap",
+           "ColumnarWriter",
+           "read_columnar",
            "undo_body_rotation",
+           "apply_rotations",
+           "axis_rotation_matrices",
+           "euler_rotation_matrices",
+           "quaternion_rotation_matrices",
            "reflect_legs",
            "combine_legs",
+           "normalise_legs",
+           "denormalise_legs",
            "restore_leg_positions",
            "get_all_legs_markers",
+           "LegMarkerSchema",
+           "get_leg_marker_schema",
            "put_legs_back",
+           "LegScatterPlan",
+           "get_leg_scatter_plan",
            "make_coxa_origin",
            "unmake_coxa_origin",
            "run_PCA",
+           "run_PCA_incremental",
+           "CovariancePCA",
+           "PCAModel",
+           "project_recordings",
+           "run_grouped_PCA",
+           "bootstrap_PCA",
+           "BootstrapResult",
            "plot_explained",
            "get_score_range",
+           "triangle_wave",
            "create_scores_dataframe",
+           "create_leg_scores_dataframe",
+           "ScoresStore",
+           "compute_score_histograms",
+           "ScoreHistograms",
            "plot_pc_experiment",
            "reconstruct",
+           "reconstruct_subsets",
+           "reconstruction_errors",
+           "ReconstructionErrors",
+           "reconstruct_pc_sweeps",
+           "PoseRenderer",
+           "save_animation",
+           "animate_pc_sweeps",
            "plot_pc_histogram",
            "plot_leg_overlay",
+           "compute_leg_density",
+           "plot_leg_density",
             "plot_leg_score_hist",
            "plot_leg_score_hist_panelled",
-           "plot_leg_pc_timeseries")
+           "plot_leg_pc_timeseries",
+           "render_figures")
 __version__ = version(__name__)
@@ -0,0 +1,321 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from .data_loading import load_and_process_spider_data
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "spiderpca")
+DEFAULT_MAX_CACHE_BYTES = 10 * 1024**3  # 10 GB
+CACHE_KEY_LENGTH = 32
+
+
+def load_and_process_spider_data_cached(file_path:str,
+                                        species:str = None,
+                                        exclude_center:bool = True,
+                                        remove_nan:bool = True,
+                                        rescale_metres:bool = True,
+                                        chunksize:int = None,
+                                        cache_dir:str = None,
+                                        max_cache_bytes:int = DEFAULT_MAX_CACHE_BYTES,
+                                        mmap_mode:str = None,
+                                        nan_over_all_columns:bool = False):
+    """
+    Load and process spider data, using a binary cache of the processed output.
+
+    On the first load the CSV is parsed with load_and_process_spider_data and
+    the marker tensor (.npy), marker columns and metadata frame (.npz) are
+    written to the cache. Later loads read the cache instead.
+
+    Entries are keyed on the source file's path, mtime, size and content hash
+    and on the loader arguments. When the source file changes, the old entries
+    for it are removed. After each write, least recently used entries are
+    evicted until the cache is under max_cache_bytes.
+
+    Inputs:
+        file_path: str, path to the CSV file containing spider data
+        species, exclude_center, remove_nan, rescale_metres, chunksize,
+        nan_over_all_columns: passed to load_and_process_spider_data
+        cache_dir: str, optional, cache directory (default: ~/.cache/spiderpca)
+        max_cache_bytes: int, size limit of the cache directory (default: 10 GB)
+        mmap_mode: str, optional, e.g. 'r', to memory-map the cached marker
+            tensor instead of reading it into memory (default: None)
+
+    Returns:
+        numpy array of marker coordinates [n_frames, n_markers, 3]
+        list of marker column names
+        DataFrame of spider data with nan values removed (optional)
+    """
+    if cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+
+    source_path = os.path.abspath(file_path)
+    loader_args = {"species": species,
+                   "exclude_center": exclude_center,
+                   "remove_nan": remove_nan,
+                   "rescale_metres": rescale_metres,
+                   "chunked": chunksize is not None,
+                   "nan_over_all_columns": nan_over_all_columns}
+
+    content_hash = _source_hash(cache_dir, source_path)
+    stat = os.stat(source_path)
+    key = _cache_key(source_path, stat, content_hash, loader_args)
+    entry_dir = os.path.join(cache_dir, key)
+
+    _remove_stale_entries(cache_dir, source_path, loader_args, keep_key=key)
+
+    if os.path.isdir(entry_dir):
+        try:
+            cached = _read_entry(entry_dir, mmap_mode=mmap_mode)
+        except (OSError, ValueError, KeyError):
+            # Corrupt or partial entry, rebuild it
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        else:
+            _touch(entry_dir)
+            print(f"Loaded cached spider data from {entry_dir}.")
+            return cached
+
+    marker_data, marker_columns, spider_data_df = load_and_process_spider_data(
+        file_path,
+        species=species,
+        exclude_center=exclude_center,
+        remove_nan=remove_nan,
+        rescale_metres=rescale_metres,
+        chunksize=chunksize,
+        nan_over_all_columns=nan_over_all_columns)
+
+    info = {"version": CACHE_VERSION,
+            "source_path": source_path,
+            "source_mtime_ns": stat.st_mtime_ns,
+            "source_size": stat.st_size,
+            "source_hash": content_hash,
+            "loader_args": loader_args}
+    _write_entry(cache_dir, key, marker_data, marker_columns, spider_data_df, info)
+    evict_cache(cache_dir, max_cache_bytes, keep_keys=[key])
+
+    if mmap_mode is not None:
+        marker_data = np.load(os.path.join(entry_dir, "markers.npy"), mmap_mode=mmap_mode)
+
+    return marker_data, marker_columns, spider_data_df
+
+
+def evict_cache(cache_dir:str = None,
+                max_cache_bytes:int = DEFAULT_MAX_CACHE_BYTES,
+                keep_keys:list = None) -> list:
+    """
+    Remove least recently used cache entries until the cache fits in max_cache_bytes.
+
+    Inputs:
+        cache_dir: str, optional, cache directory (default: ~/.cache/spiderpca)
+        max_cache_bytes: int, size limit of the cache directory
+        keep_keys: list, optional, entry keys that must not be evicted
+
+    Returns:
+        list of evicted entry keys
+    """
+    if cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+    keep_keys = set(keep_keys or [])
+
+    entries = []
+    for key, entry_dir in _list_entries(cache_dir):
+        entries.append((os.path.getmtime(entry_dir), _dir_size(entry_dir), key, entry_dir))
+
+    total_bytes = sum(size for _, size, _, _ in entries)
+    evicted = []
+
+    # Oldest access first
+    for _, size, key, entry_dir in sorted(entries):
+        if total_bytes <= max_cache_bytes:
+            break
+        if key in keep_keys:
+            continue
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total_bytes -= size
+        evicted.append(key)
+
+    return evicted
+
+
+def clear_cache(cache_dir:str = None):
+    """
+    Remove every cache entry and the hash index from the cache directory.
+    Other files and folders in it are left alone.
+    """
+    if cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+    for _, entry_dir in _list_entries(cache_dir):
+        shutil.rmtree(entry_dir, ignore_errors=True)
+    index_path = os.path.join(cache_dir, "hashes.json")
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+
+def atomic_write_json(path:str, data):
+    """
+    Write data to path as JSON through a temporary file, so readers never see a partial file.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+def _cache_key(source_path, stat, content_hash, loader_args):
+    key_data = json.dumps({"version": CACHE_VERSION,
+                           "source_path": source_path,
+                           "source_mtime_ns": stat.st_mtime_ns,
+                           "source_size": stat.st_size,
+                           "source_hash": content_hash,
+                           "loader_args": loader_args}, sort_keys=True)
+    return hashlib.sha256(key_data.encode()).hexdigest()[:CACHE_KEY_LENGTH]
+
+
+def _source_hash(cache_dir, source_path, block_size=1 << 20):
+    """
+    Content hash of the source file, remembered per (path, mtime, size)
+    so that an unchanged file is only hashed once.
+    """
+    stat = os.stat(source_path)
+    index_path = os.path.join(cache_dir, "hashes.json")
+
+    index = {}
+    if os.path.exists(index_path):
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+
+    known = index.get(source_path)
+    if (known is not None
+            and known["mtime_ns"] == stat.st_mtime_ns
+            and known["size"] == stat.st_size):
+        return known["hash"]
+
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(source_path, "rb") as f:
+        while block := f.read(block_size):
+            hasher.update(block)
+    content_hash = hasher.hexdigest()
+
+    index[source_path] = {"mtime_ns": stat.st_mtime_ns,
+                          "size": stat.st_size,
+                          "hash": content_hash}
+    atomic_write_json(index_path, index)
+
+    return content_hash
+
+
+def _remove_stale_entries(cache_dir, source_path, loader_args, keep_key):
+    """
+    Remove entries for the same source file and arguments under a different key,
+    i.e. entries built from an older version of the file.
+    """
+    for key, entry_dir in _list_entries(cache_dir):
+        if key == keep_key:
+            continue
+        info = _read_info(entry_dir)
+        if info is None:
+            continue
+        if (info.get("source_path") == source_path
+                and info.get("loader_args") == loader_args):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+
+def _write_entry(cache_dir, key, marker_data, marker_columns, spider_data_df, info):
+    entry_dir = os.path.join(cache_dir, key)
+    tmp_dir = os.path.join(cache_dir, f".{key}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    np.save(os.path.join(tmp_dir, "markers.npy"), np.ascontiguousarray(marker_data))
+
+    metadata = {"__marker_columns__": np.asarray(marker_columns, dtype=str),
+                "__columns__": np.asarray(spider_data_df.columns, dtype=str),
+                "__index__": spider_data_df.index.to_numpy()}
+    for ii, col in enumerate(spider_data_df.columns):
+        values, na_mask = _column_to_array(spider_data_df[col])
+        metadata[f"col{ii}"] = values
+        if na_mask is not None:
+            metadata[f"na{ii}"] = na_mask
+    np.savez(os.path.join(tmp_dir, "metadata.npz"), **metadata)
+
+    with open(os.path.join(tmp_dir, "info.json"), "w") as f:
+        json.dump(info, f)
+
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.rename(tmp_dir, entry_dir)
+
+
+def _read_entry(entry_dir, mmap_mode=None):
+    marker_data = np.load(os.path.join(entry_dir, "markers.npy"), mmap_mode=mmap_mode)
+
+    with np.load(os.path.join(entry_dir, "metadata.npz"), allow_pickle=False) as metadata:
+        marker_columns = metadata["__marker_columns__"].tolist()
+        columns = metadata["__columns__"].tolist()
+        data = {}
+        for ii, col in enumerate(columns):
+            values = metadata[f"col{ii}"]
+            if values.dtype.kind == "U":
+                values = values.astype(object)
+                if f"na{ii}" in metadata:
+                    values[metadata[f"na{ii}"]] = np.nan
+            data[col] = values
+        spider_data_df = pd.DataFrame(data, index=metadata["__index__"], columns=columns)
+
+    return marker_data, marker_columns, spider_data_df
+
+
+def _column_to_array(column):
+    """
+    Convert a DataFrame column to an array that np.savez can store without pickling.
+    """
+    if column.dtype.kind in "biufcmM":
+        return column.to_numpy(), None
+
+    na_mask = column.isna().to_numpy()
+    values = column.astype(str).to_numpy(dtype=str)
+    return values, (na_mask if na_mask.any() else None)
+
+
+def _read_info(entry_dir):
+    try:
+        with open(os.path.join(entry_dir, "info.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _list_entries(cache_dir):
+    """
+    Cache entries in cache_dir: directories named like a cache key that hold an info.json.
+    Anything else, e.g. user folders in a shared directory, is never listed and never removed.
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+    return [(name, os.path.join(cache_dir, name))
+            for name in os.listdir(cache_dir)
+            if _is_cache_key(name)
+            and os.path.isfile(os.path.join(cache_dir, name, "info.json"))]
+
+
+def _is_cache_key(name):
+    return (len(name) == CACHE_KEY_LENGTH
+            and all(char in "0123456789abcdef" for char in name))
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def _touch(entry_dir):
+    now = time.time()
+    os.utime(entry_dir, (now, now))
@@ -0,0 +1,168 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .data_cache import atomic_write_json
+
+COLUMNAR_VERSION = 1
+
+
+class ColumnarWriter:
+    """
+    Append-only on-disk column store: one raw binary file per column plus schema.json.
+
+    Numeric columns are stored as-is. Text and categorical columns are stored as
+    int32 codes, with their categories kept in the schema; missing values are
+    stored as code -1 and read back as NaN. schema.json is
+    rewritten after every append and holds the number of committed rows, so
+    an interrupted append never shows up as partial rows.
+
+    A directory that has no schema.json is only used if it is empty, so
+    existing files are never overwritten or removed. Replacing a store
+    (append=False) removes only the files its schema names.
+
+    Inputs:
+        path: str, directory of the store (created if needed)
+        append: bool, add to an existing store instead of replacing it (default: True)
+    """
+
+    def __init__(self, path:str, append:bool = True):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        schema_path = os.path.join(path, "schema.json")
+        if not os.path.exists(schema_path):
+            # Never write into, or clear, a directory that is not a store
+            if os.listdir(path):
+                raise ValueError(f"{path} is not empty and has no schema.json, "
+                                 "so it is not a column store.")
+            self.schema = _empty_schema()
+            self._write_schema()
+            return
+
+        with open(schema_path) as f:
+            schema = json.load(f)
+        if schema.get("version", 0) > COLUMNAR_VERSION:
+            raise ValueError(f"{path} was written by a newer version of spiderpca.")
+
+        if append:
+            self.schema = schema
+            # Drop bytes of an append that was never committed
+            for column in self.schema["columns"]:
+                n_bytes = self.schema["n_rows"] * np.dtype(column["dtype"]).itemsize
+                with open(self._column_path(column["name"]), "ab") as f:
+                    f.truncate(n_bytes)
+        else:
+            # Only remove the files of the old store
+            for column in schema["columns"]:
+                column_path = self._column_path(column["name"])
+                if os.path.exists(column_path):
+                    os.remove(column_path)
+            self.schema = _empty_schema()
+            self._write_schema()
+
+    @property
+    def n_rows(self):
+        return self.schema["n_rows"]
+
+    def append(self, columns:dict):
+        """
+        Append rows, given as a dict of column name -> 1-D array of equal length.
+        """
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("All columns must have the same number of rows.")
+
+        if not self.schema["columns"]:
+            self.schema["columns"] = [_column_schema(name, values) for name, values in columns.items()]
+            # Record the columns before their files exist, so an interrupted
+            # first append is truncated like any other
+            self._write_schema()
+        elif [column["name"] for column in self.schema["columns"]] != list(columns):
+            raise ValueError("Appended columns do not match the store's columns.")
+
+        for column in self.schema["columns"]:
+            values = columns[column["name"]]
+            if "categories" in column:
+                values = _encode_categories(values, column["categories"])
+            values = np.ascontiguousarray(values, dtype=column["dtype"])
+            with open(self._column_path(column["name"]), "ab") as f:
+                f.write(values.tobytes())
+
+        self.schema["n_rows"] += lengths.pop()
+        self._write_schema()
+
+    def _write_schema(self):
+        atomic_write_json(os.path.join(self.path, "schema.json"), self.schema)
+
+    def _column_path(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+
+def read_columnar(path:str, columns:list = None, as_frame:bool = True):
+    """
+    Read a store written by ColumnarWriter.
+
+    Numeric columns are memory-mapped, so as_frame=False opens stores of any
+    size without reading them.
+
+    Inputs:
+        path: str, directory of the store
+        columns: list, optional, columns to read (default: all)
+        as_frame: bool, return a DataFrame (default) or a dict of arrays
+
+    Returns:
+        pandas DataFrame, or dict of np.memmap / pandas Categorical per column
+    """
+    with open(os.path.join(path, "schema.json")) as f:
+        schema = json.load(f)
+
+    n_rows = schema["n_rows"]
+    data = {}
+    for column in schema["columns"]:
+        if columns is not None and column["name"] not in columns:
+            continue
+        file_path = os.path.join(path, f"{column['name']}.bin")
+        if n_rows == 0:
+            values = np.empty(0, dtype=column["dtype"])
+        else:
+            values = np.memmap(file_path, mode="r", dtype=column["dtype"], shape=(n_rows,))
+        if "categories" in column:
+            values = pd.Categorical.from_codes(np.asarray(values), categories=column["categories"])
+        data[column["name"]] = values
+
+    if not as_frame:
+        return data
+    return pd.DataFrame({name: (values if isinstance(values, pd.Categorical) else np.asarray(values))
+                         for name, values in data.items()})
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+def _empty_schema():
+    return {"version": COLUMNAR_VERSION, "n_rows": 0, "columns": []}
+
+
+def _column_schema(name, values):
+    if isinstance(values, pd.Categorical) or isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        return {"name": name, "dtype": "<i4", "categories": []}
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        return {"name": name, "dtype": values.dtype.newbyteorder("<").str}
+    return {"name": name, "dtype": "<i4", "categories": []}
+
+
+def _encode_categories(values, categories):
+    """
+    int32 codes of values, adding unseen values to categories in place.
+
+    Missing values get code -1, which reads back as NaN.
+    """
+    values = pd.Series(np.asarray(values, dtype=object))
+    present = values.notna()
+    values[present] = values[present].astype(str)
+    known = set(categories)
+    new = [value for value in pd.unique(values[present]) if value not in known]
+    categories.extend(new)
+    return pd.Categorical(values, categories=categories).codes.astype(np.int32)
@@ -1,5 +1,112 @@
+import functools
+import re
+
 import numpy as np
 
+from .data_memmap import DEFAULT_CHUNK_SIZE, allocate_like, frame_chunks, is_memmap
+
+
+class LegMarkerSchema:
+    """
+    Precomputed leg/keypoint index parsed from marker names.
+
+    Marker names are parsed as <keypoint><leg number>, e.g. "tibiametatarsus3"
+    or "claw10". Names without a trailing leg number (e.g. "center") are
+    non-leg markers.
+
+    Attributes:
+        leg_ids (list of int): Leg numbers, in order.
+        keypoints (list of str): Keypoint names, in the order of the first leg.
+        index (ndarray): Marker index of each [leg, keypoint], shape (n_legs, n_keypoints).
+        names (list of list of str): Marker name of each [leg][keypoint].
+        non_leg_indices (ndarray): Indices of markers that belong to no leg.
+    """
+
+    def __init__(self, marker_names, num_legs=None):
+        marker_names = list(marker_names)
+        parsed = {}
+        for marker_idx, name in enumerate(marker_names):
+            match = _LEG_MARKER_PATTERN.match(name)
+            if match is None:
+                continue
+            leg_id = int(match.group("leg"))
+            parsed.setdefault(leg_id, []).append((match.group("keypoint"), marker_idx))
+
+        if num_legs is None:
+            leg_ids = sorted(parsed)
+        else:
+            leg_ids = list(range(1, num_legs + 1))
+            missing = [leg_id for leg_id in leg_ids if leg_id not in parsed]
+            if missing:
+                raise ValueError(f"No markers found for legs {missing}.")
+
+        if not leg_ids:
+            raise ValueError("No leg markers found in marker_names.")
+
+        keypoints = [keypoint for keypoint, _ in parsed[leg_ids[0]]]
+        index = np.empty((len(leg_ids), len(keypoints)), dtype=np.intp)
+        for leg_idx, leg_id in enumerate(leg_ids):
+            leg_keypoints = dict(parsed[leg_id])
+            if sorted(leg_keypoints) != sorted(keypoints):
+                raise ValueError(f"Leg {leg_id} has keypoints {sorted(leg_keypoints)}, "
+                                 f"expected {sorted(keypoints)}.")
+            index[leg_idx] = [leg_keypoints[keypoint] for keypoint in keypoints]
+
+        self.marker_names = marker_names
+        self.leg_ids = leg_ids
+        self.keypoints = keypoints
+        self.index = index
+        self.names = [[marker_names[marker_idx] for marker_idx in leg_index] for leg_index in index]
+        self.non_leg_indices = np.setdiff1d(np.arange(len(marker_names)), index.ravel())
+        self._strides = _affine_strides(index)
+
+    @property
+    def n_legs(self):
+        return self.index.shape[0]
+
+    @property
+    def n_keypoints(self):
+        return self.index.shape[1]
+
+    def gather(self, markers, out=None):
+        """
+        Gather [frames, markers, dims] into [frames, legs, keypoints, dims] with one fancy index.
+        """
+        # mode="clip" skips the buffered copy np.take makes with out= (indices are valid)
+        return np.take(markers, self.index, axis=1, out=out, mode="clip")
+
+    def as_view(self, markers):
+        """
+        Zero-copy [frames, legs, keypoints, dims] view of markers, or None.
+
+        Only possible when the leg markers sit at evenly spaced columns, e.g.
+        when the columns are already ordered by leg. The view shares memory
+        with markers, so writing to one changes the other.
+        """
+        if self._strides is None:
+            return None
+
+        offset, leg_stride, keypoint_stride = self._strides
+        frame_stride, marker_stride, dim_stride = markers.strides
+        first = markers[:, offset:]
+        return np.lib.stride_tricks.as_strided(
+            first,
+            shape=(markers.shape[0], self.n_legs, self.n_keypoints, markers.shape[2]),
+            strides=(frame_stride, leg_stride * marker_stride, keypoint_stride * marker_stride, dim_stride),
+            writeable=markers.flags.writeable)
+
+
+@functools.lru_cache(maxsize=32)
+def _get_leg_marker_schema(marker_names, num_legs):
+    return LegMarkerSchema(marker_names, num_legs)
+
+
+def get_leg_marker_schema(marker_names, num_legs=None):
+    """
+    Build (or fetch the cached) LegMarkerSchema for a list of marker names.
+    """
+    return _get_leg_marker_schema(tuple(marker_names), num_legs)
+
 
 def get_leg_markers(marker_names, markers, leg_id):
     """
@@ -14,24 +121,18 @@ def get_leg_markers(marker_names, markers, leg_id):
         ndarray: Extracted markers for the specified leg of shape (n_instances, n_leg_markers, 3).
         list of str: Names of the extracted markers.
     """
+    schema = get_leg_marker_schema(marker_names)
+    if int(leg_id) not in schema.leg_ids:
+        return markers[:, []], []
 
-    # Make a copy of the markers to avoid modifying the original
-    markers = markers.copy()
+    leg_idx = schema.leg_ids.index(int(leg_id))
 
-    leg_id = str(leg_id)
-
-    # Filter marker names based on the leg identifier
-    leg_markers_names = [name for name in marker_names if f"{leg_id}" in name]
-    
-    # Find the indices of the selected markers
-    leg_markers_indices = [marker_names.index(name) for name in leg_markers_names]
+    # Fancy indexing copies only this leg's markers
+    extracted_leg_markers = markers[:, schema.index[leg_idx], :]
     
-    # Extract the corresponding markers from the dataset
-    extracted_leg_markers = markers[:, leg_markers_indices, :]
-    
-    return extracted_leg_markers, leg_markers_names
+    return extracted_leg_markers, list(schema.names[leg_idx])
 
-def get_all_legs_markers(marker_names, markers, num_legs):
+def get_all_legs_markers(marker_names, markers, num_legs, out=None, allow_view=False):
     """
     Extracts markers for all legs and organizes them into a unified numpy array.
 
@@ -39,39 +140,148 @@ def get_all_legs_markers(marker_names, markers, num_legs):
         marker_names (list of str): List of all marker names.
         markers (ndarray): 3D array of shape (n_instances, n_markers, 3).
         num_legs (int): Total number of legs.
+        out (ndarray, optional): Buffer of shape [frames, leg, keypoints, dims] to gather into.
+        allow_view (bool, optional): Return a zero-copy view of markers when the
+            columns are already ordered by leg (default: False).
 
     Returns:
         ndarray: Markers organized as [frames, leg, keypoints, dims].
         list of list of str: Names of markers for each leg.
+        ndarray: The original markers [frames, markers, dims], unchanged.
+
+    A np.memmap input is gathered in chunks into a file-backed np.memmap output.
     """
+    schema = get_leg_marker_schema(marker_names, num_legs)
+    shape = (markers.shape[0], schema.n_legs, schema.n_keypoints, markers.shape[2])
 
+    all_legs = schema.as_view(markers) if allow_view and out is None else None
 
-    # Make a copy of the markers to avoid modifying the original
-    markers = markers.copy()
+    if all_legs is None:
+        if out is None:
+            out = allocate_like(markers, shape)
+        elif out.shape != shape:
+            raise ValueError(f"out must have shape {shape}.")
+
+        if is_memmap(markers):
+            # Gather chunk by chunk, never loading it all
+            for frames in frame_chunks(markers.shape[0]):
+                schema.gather(markers[frames], out=out[frames])
+        else:
+            schema.gather(markers, out=out)
+        all_legs = out
 
-    all_legs = []
-    all_legs_names = []
-    
-    for leg_id in range(1, num_legs + 1):  # Loop through each leg
-        leg_markers, leg_markers_names = get_leg_markers(marker_names, markers, leg_id)
-        all_legs.append(leg_markers)
-        all_legs_names.append(leg_markers_names)
-    
-    # Stack into a single array with shape [frames, leg, keypoints, dims]
-    all_legs = np.stack(all_legs, axis=1)
     print(f"All legs shape: {all_legs.shape}")
     print(f"Frames: {all_legs.shape[0]}, Legs: {all_legs.shape[1]}, Keypoints: {all_legs.shape[2]}, Dims: {all_legs.shape[3]}")
 
-    # Make a matrix with original dimensions of  [frames, markers, dims]
-    # This is just for testing
-    # Search for index using marker names
-    markers_again = np.zeros((markers.shape[0], markers.shape[1], markers.shape[2]))
-    for index, name in enumerate(marker_names):
-        markers_again[:,index, :] = markers[:, index, :]
-    
+    return all_legs, [list(names) for names in schema.names], markers
 
-    return all_legs, all_legs_names, markers_again
 
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+# <keypoint><leg number>, e.g. "claw1", "tibiametatarsus10"
+_LEG_MARKER_PATTERN = re.compile(r"^(?P<keypoint>.*?\D)(?P<leg>\d+)$")
+
+
+def _affine_strides(index):
+    """
+    (offset, leg stride, keypoint stride) if index[l, k] == offset + l*leg_stride + k*keypoint_stride
+    for non-negative strides, else None.
+    """
+    offset = int(index[0, 0])
+    leg_stride = int(index[1, 0] - offset) if index.shape[0] > 1 else 0
+    keypoint_stride = int(index[0, 1] - offset) if index.shape[1] > 1 else 0
+
+    if leg_stride < 0 or keypoint_stride < 0:
+        return None
+
+    legs, keypoints = np.indices(index.shape)
+    if not np.array_equal(index, offset + legs * leg_stride + keypoints * keypoint_stride):
+        return None
+
+    return offset, leg_stride, keypoint_stride
+
+
+class LegScatterPlan:
+    """
+    Precomputed plan for putting [frames, legs, keypoints, dims] leg markers
+    back into the original [frames, markers, dims] marker order.
+
+    Built once from all_legs_names and original_marker_names, then reused for
+    every reconstruction with put_legs_back(..., plan=plan) or plan.scatter.
+
+    Attributes:
+        leg_targets (ndarray): Original marker index of each leg marker.
+        leg_sources (tuple of ndarray): (leg index, keypoint index) of each leg marker.
+        other_indices (ndarray): Original marker indices that belong to no leg.
+        coxa_indices (ndarray): Original marker indices of markers named "coxa...".
+    """
+
+    def __init__(self, all_legs_names, original_marker_names):
+        original_marker_names = list(original_marker_names)
+        leg_marker_to_aligned_index = {}
+        for leg_idx, leg_marker_names_per_leg in enumerate(all_legs_names):
+            for marker_idx, marker_name in enumerate(leg_marker_names_per_leg):
+                leg_marker_to_aligned_index[marker_name] = (leg_idx, marker_idx)
+
+        leg_targets, leg_legs, leg_keypoints, other_indices = [], [], [], []
+        for marker_idx, marker_name in enumerate(original_marker_names):
+            if marker_name in leg_marker_to_aligned_index:
+                leg_idx, leg_marker_idx = leg_marker_to_aligned_index[marker_name]
+                leg_targets.append(marker_idx)
+                leg_legs.append(leg_idx)
+                leg_keypoints.append(leg_marker_idx)
+            else:
+                other_indices.append(marker_idx)
+
+        self.n_names = len(original_marker_names)
+        self.leg_targets = np.array(leg_targets, dtype=np.intp)
+        self.leg_sources = (np.array(leg_legs, dtype=np.intp), np.array(leg_keypoints, dtype=np.intp))
+        self.other_indices = np.array(other_indices, dtype=np.intp)
+        self.coxa_indices = np.array([marker_idx for marker_idx, name in enumerate(original_marker_names)
+                                      if "coxa" in name], dtype=np.intp)
+
+    def scatter(self, all_legs, spider3d_markers, original_markers=None, out=None):
+        """
+        Reassemble [nframes, nmarkers, 3] markers; see put_legs_back for the arguments.
+        """
+        nframes = all_legs.shape[0]
+        nmarkers = spider3d_markers.shape[1]
+        ndims = all_legs.shape[3]
+
+        if out is None:
+            out = np.empty((nframes, nmarkers, ndims))
+        elif out.shape != (nframes, nmarkers, ndims):
+            raise ValueError(f"out must have shape {(nframes, nmarkers, ndims)}.")
+
+        # Markers that are not named stay zero
+        if nmarkers > self.n_names:
+            out[:, self.n_names:] = 0
+
+        # Leg markers, in one vectorised scatter
+        out[:, self.leg_targets] = all_legs[:, self.leg_sources[0], self.leg_sources[1]]
+
+        # Non-leg markers from the original markers if given, else from spider3d_markers
+        source = original_markers if original_markers is not None else spider3d_markers
+        out[:, self.other_indices] = source[:, self.other_indices]
+
+        # restore the coxa markers
+        if original_markers is None and self.coxa_indices.size:
+            out[:, self.coxa_indices] = spider3d_markers[:, self.coxa_indices]
+
+        return out
+
+
+@functools.lru_cache(maxsize=32)
+def _get_leg_scatter_plan(all_legs_names, original_marker_names):
+    return LegScatterPlan(all_legs_names, original_marker_names)
+
+
+def get_leg_scatter_plan(all_legs_names, original_marker_names):
+    """
+    Build (or fetch the cached) LegScatterPlan for these marker names.
+    """
+    return _get_leg_scatter_plan(tuple(tuple(names) for names in all_legs_names),
+                                 tuple(original_marker_names))
 
 
 def put_legs_back(
@@ -80,6 +290,8 @@ def put_legs_back(
     original_marker_names,
     spider3d_markers,
     original_markers = None,
+    plan = None,
+    out = None,
 ):
     """
     Reconstructs the full markers dataset, combining aligned leg markers with the original non-leg markers.
@@ -93,46 +305,17 @@ def put_legs_back(
         original_markers (ndarray): Original markers array before alignment [nframes, nmarkers, 3].
         spider3d_markers (ndarray, optional): A single frame of markers [nmarkers, 3]. 
             If provided, all non-leg markers will be replaced with these values.
+        plan (LegScatterPlan, optional): Precomputed scatter plan for these names.
+            If None, a cached plan is looked up from the names.
+        out (ndarray, optional): Preallocated output of shape [nframes, nmarkers, 3].
 
     Returns:
         ndarray: Full reconstructed markers array with shape [nframes, nmarkers, 3].
     """
-    nframes = all_legs.shape[0]
-    nmarkers = spider3d_markers.shape[1]
-    ndims = all_legs.shape[3]
+    if plan is None:
+        plan = get_leg_scatter_plan(all_legs_names, original_marker_names)
 
-    all_legs = all_legs.copy()
-
-    # Initialize reconstructed markers
-    reconstructed_markers = np.zeros((nframes, nmarkers, ndims))
-
-    # Flatten all leg marker names into a single list for quick lookup
-    leg_marker_names = [name for sublist in all_legs_names for name in sublist]
-    leg_marker_to_aligned_index = {}
-    for leg_idx, leg_marker_names_per_leg in enumerate(all_legs_names):
-        for marker_idx, marker_name in enumerate(leg_marker_names_per_leg):
-            leg_marker_to_aligned_index[marker_name] = (leg_idx, marker_idx)
-
-    # Fill in markers based on their source
-    for marker_idx, marker_name in enumerate(original_marker_names):
-        if marker_name in leg_marker_to_aligned_index:  # If the marker belongs to a leg
-            leg_idx, leg_marker_idx = leg_marker_to_aligned_index[marker_name]
-            reconstructed_markers[:, marker_idx, :] = all_legs[:, leg_idx, leg_marker_idx, :]
-        elif original_markers is not None:  # Use spider3d_markers for non-leg markers
-            reconstructed_markers[:, marker_idx, :] = original_markers[:, marker_idx, :]
-        else:  # Default to original_markers if spider3d_markers is not provided
-            reconstructed_markers[:, marker_idx, :] = spider3d_markers[:, marker_idx, :]
-
-    # restore the coxa markers
-    if original_markers is None:
-        coxa_markers_names = [name for name in original_marker_names if "coxa" in name]
-        coxa_markers_indices = [original_marker_names.index(name) for name in coxa_markers_names]
-        coxa_markers = spider3d_markers[:, coxa_markers_indices, :]
-        reconstructed_markers[:, coxa_markers_indices, :] = coxa_markers
-
-    
-
-    return reconstructed_markers
+    return plan.scatter(all_legs, spider3d_markers, original_markers=original_markers, out=out)
 
 
 def make_coxa_origin(all_legs):
@@ -146,7 +329,17 @@ def make_coxa_origin(all_legs):
     Returns:
         ndarray: Array of same shape with all points translated relative to coxa
         ndarray: Array of shape [nFrames, nLegs, 4, 3] containing the coxa positions
+
+    A np.memmap input is translated in chunks into a file-backed np.memmap output.
     """
+    if is_memmap(all_legs):
+        # Subtract chunk by chunk into a file-backed output
+        coxa = all_legs[..., -1:, :]
+        translated = allocate_like(all_legs, all_legs.shape)
+        for frames in frame_chunks(all_legs.shape[0]):
+            np.subtract(all_legs[frames], coxa[frames], out=translated[frames])
+        return translated, coxa
+
     # Make a copy to avoid modifying the original
     all_legs = all_legs.copy()
     
@@ -172,12 +365,22 @@ def reflect_legs(all_legs):
     
     Returns:
         ndarray: Array of shape [nframes, nlegs, nkeypoints, ndims] with left legs reflected
+
+    A np.memmap input is reflected in chunks into a file-backed np.memmap output.
     """
 
     # Reflect the left legs (y-coordinate)
     # Note: Python 0-based indexing, so legs 5-8 are indices 4-7
 
 
+    if is_memmap(all_legs):
+        # Copy and reflect chunk by chunk into a file-backed output
+        reflected = allocate_like(all_legs, all_legs.shape)
+        for frames in frame_chunks(all_legs.shape[0]):
+            reflected[frames] = all_legs[frames]
+            np.negative(reflected[frames, 4:8, :, 1], out=reflected[frames, 4:8, :, 1])
+        return reflected
+
     all_legs = all_legs.copy()
     all_legs[:, 4:8, :, 1] = -all_legs[:, 4:8, :, 1]
 
@@ -193,7 +396,19 @@ def combine_legs(all_legs):
     Returns:
         ndarray: Array of shape [nframes*2, nlegs//2, nkeypoints, ndims] where frames 
                 dimension now includes both original and reflected legs
+
+    A np.memmap input is combined in chunks into a file-backed np.memmap output.
     """
+    if is_memmap(all_legs):
+        # Fill both halves chunk by chunk into a file-backed output
+        nframes, _, nkeypoints, ndims = all_legs.shape
+        combined_legs = allocate_like(all_legs, (nframes * 2, 4, nkeypoints, ndims))
+        for frames in frame_chunks(nframes):
+            combined_legs[frames] = all_legs[frames, :4]
+            combined_legs[frames.start + nframes:frames.stop + nframes] = all_legs[frames, 4:]
+        print(f"Combined legs shape: {combined_legs.shape}")
+        return combined_legs
+
     # Make a copy to avoid modifying the original
     all_legs = all_legs.copy()
     
@@ -210,9 +425,157 @@ def combine_legs(all_legs):
     return combined_legs
 
 
-def restore_leg_positions(reconstructed_frames, spider3d, all_legs_names):
+def normalise_legs(all_legs, n_groups=2, reflect=True, layout="blocked", flat=False,
+                   out=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Fused coxa origin + reflect + combine stage for leg-agnostic PCA.
+
+    Equivalent to combine_legs(reflect_legs(make_coxa_origin(all_legs)[0])),
+    but computed in one pass over frame chunks straight into the output, with
+    no intermediate copies of the leg tensor.
+
+    Parameters:
+        all_legs (ndarray): Array of shape [nframes, nlegs, nkeypoints, ndims], coxa last.
+        n_groups (int): Number of leg groups k stacked along the frames (default: 2,
+            legs 1-4 then legs 5-8). Use 1 to keep all legs, nlegs for one leg per row.
+        reflect (bool): Whether to reflect the left legs (5-8) as reflect_legs does.
+        layout (str): "blocked" stacks whole groups, like combine_legs: all frames of
+            group 1, then all frames of group 2. "interleaved" orders rows as
+            (frame, group), which is a zero-copy reshape of all_legs and so
+            supports in-place use.
+        flat (bool): Return the flat PCA input [nframes*nlegs, nkeypoints*ndims]
+            (a view of the combined array) instead of the 4D array.
+        out (ndarray, optional): Buffer of shape [nframes*k, nlegs/k, nkeypoints, ndims].
+            With layout="interleaved", out must be C-contiguous, and may be
+            all_legs itself for in-place use.
+        chunk_size (int): Frames processed at a time.
+
+    Returns:
+        ndarray: [nframes*k, nlegs/k, nkeypoints, ndims] legs (or flat PCA input)
+        ndarray: [nframes, nlegs, 1, ndims] coxa positions, for denormalise_legs
+    """
+    nframes, nlegs, nkeypoints, ndims = all_legs.shape
+    if nlegs % n_groups != 0:
+        raise ValueError(f"{nlegs} legs cannot be split into {n_groups} groups.")
+    if layout not in ("blocked", "interleaved"):
+        raise ValueError(f"Invalid layout: {layout}")
+    legs_per_group = nlegs // n_groups
+    shape = (nframes * n_groups, legs_per_group, nkeypoints, ndims)
+
+    in_place = out is not None and np.shares_memory(out, all_legs)
+    if in_place and (layout != "interleaved" or out.size != all_legs.size):
+        raise ValueError("In-place normalisation needs layout='interleaved' and out=all_legs.")
+
+    # Copy the coxa positions first, in case all_legs is overwritten
+    coxa = allocate_like(all_legs, (nframes, nlegs, 1, ndims))
+    for frames in frame_chunks(nframes, chunk_size):
+        coxa[frames] = all_legs[frames, :, -1:, :]
+
+    if out is None:
+        out = allocate_like(all_legs, shape)
+    elif in_place:
+        out = all_legs
+    elif out.shape != shape:
+        raise ValueError(f"out must have shape {shape}.")
+
+    if layout == "interleaved":
+        # Rows are written through a reshape, which must be a view of out
+        if not out.flags.c_contiguous:
+            raise ValueError("layout='interleaved' needs a C-contiguous out (or all_legs, in place).")
+        interleaved = out.reshape(nframes, n_groups, legs_per_group, nkeypoints, ndims)
+
+    sign = _leg_reflection(nlegs, ndims, reflect)
+
+    for frames in frame_chunks(nframes, chunk_size):
+        for group in range(n_groups):
+            legs = slice(group * legs_per_group, (group + 1) * legs_per_group)
+            if layout == "blocked":
+                target = out[group * nframes + frames.start:group * nframes + frames.stop]
+            else:
+                target = interleaved[frames, group]
+            np.subtract(all_legs[frames, legs], coxa[frames, legs], out=target)
+            if sign is not None and np.any(sign[legs] < 0):
+                np.multiply(target, sign[legs], out=target)
+
+    if in_place:
+        out = out.reshape(shape)
+
+    if flat:
+        out = out.reshape(-1, nkeypoints * ndims)
+
+    return out, coxa
+
+
+def denormalise_legs(combined_legs, coxa, n_groups=2, reflect=True, layout="blocked",
+                     out=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Inverse of normalise_legs: un-combine, un-reflect and move legs back to their coxae.
+
+    Parameters:
+        combined_legs (ndarray): [nframes*k, nlegs/k, nkeypoints, ndims] legs, or the
+            flat [nframes*nlegs, nkeypoints*ndims] PCA input / reconstruction.
+        coxa (ndarray): [nframes, nlegs, 1, ndims] coxa positions from normalise_legs.
+        n_groups, reflect, layout: As passed to normalise_legs.
+        out (ndarray, optional): Buffer of shape [nframes, nlegs, nkeypoints, ndims].
+        chunk_size (int): Frames processed at a time.
+
+    Returns:
+        ndarray: Array of shape [nframes, nlegs, nkeypoints, ndims]
+    """
+    nframes, nlegs, _, ndims = coxa.shape
+    legs_per_group = nlegs // n_groups
+    combined_legs = combined_legs.reshape(nframes * n_groups, legs_per_group, -1, ndims)
+    nkeypoints = combined_legs.shape[2]
+    shape = (nframes, nlegs, nkeypoints, ndims)
+
+    if out is None:
+        out = allocate_like(combined_legs, shape)
+    elif out.shape != shape:
+        raise ValueError(f"out must have shape {shape}.")
+
+    if layout == "interleaved":
+        # Reshaped once: a non-contiguous input would be copied on every reshape
+        interleaved = combined_legs.reshape(nframes, n_groups, legs_per_group, nkeypoints, ndims)
+
+    sign = _leg_reflection(nlegs, ndims, reflect)
+
+    for frames in frame_chunks(nframes, chunk_size):
+        for group in range(n_groups):
+            legs = slice(group * legs_per_group, (group + 1) * legs_per_group)
+            if layout == "blocked":
+                source = combined_legs[group * nframes + frames.start:group * nframes + frames.stop]
+            else:
+                source = interleaved[frames, group]
+            target = out[frames, legs]
+            if sign is not None and np.any(sign[legs] < 0):
+                np.multiply(source, sign[legs], out=target)
+                target += coxa[frames, legs]
+            else:
+                np.add(source, coxa[frames, legs], out=target)
+
+    return out
+
+
+def _leg_reflection(nlegs, ndims, reflect):
+    """
+    Per-leg sign [nlegs, 1, ndims] that reflects the left legs (5-8) in y, or None.
+    """
+    if not reflect:
+        return None
+    sign = np.ones((nlegs, 1, ndims))
+    sign[4:8, :, 1] = -1
+    return sign
+
+
+def restore_leg_positions(reconstructed_frames, spider3d, all_legs_names, out=None,
+                          chunk_size=DEFAULT_CHUNK_SIZE):
     """
     Transform reconstructed leg movements back to original coordinate space.
+
+    The reconstructed leg is broadcast to every leg, reflected for the left
+    legs, moved to each coxa and scattered into the full marker layout in one
+    fused step, frame chunk by frame chunk, without building repeated
+    [n_frames, nLegs, n_keypoints, 3] intermediates.
     
     Parameters
     ----------
@@ -220,10 +583,12 @@ def restore_leg_positions(reconstructed_frames, spider3d, all_legs_names):
         Reconstructed frames from PCA, shape (n_frames, n_markers, 3)
     spider3d : Spider3D
         Spider3D object containing marker information
-    nLegs : int
-        Number of legs
     all_legs_names : list
         List of marker names for each leg
+    out : ndarray, optional
+        Preallocated output, shape (n_frames, n_all_markers, 3)
+    chunk_size : int, optional
+        Frames processed at a time, which bounds the temporary memory
     
     Returns
     -------
@@ -236,24 +601,43 @@ def restore_leg_positions(reconstructed_frames, spider3d, all_legs_names):
 
     coxa_names = [f"coxa{i}" for i in range(1, nLegs + 1)]
     coxa_indices = spider3d.skeleton_definition.get_marker_indices(coxa_names)
-    
-    # Add leg dimension and repeat for each leg
-    reconstructed_frames = np.expand_dims(reconstructed_frames, axis=1)
-    reconstructed_frames = np.repeat(reconstructed_frames, nLegs, axis=1)
-    
-    # Prepare coxa positions
-    original_coxa_positions = spider3d.markers[:, coxa_indices, :]
-    original_coxa_positions = np.repeat(original_coxa_positions, reconstructed_frames.shape[0], axis=0)
-    original_coxa_positions = np.expand_dims(original_coxa_positions, axis=2)
-    
-    # Transform back to original coordinate space
-    restored_legs = reflect_legs(reconstructed_frames)
-    restored_legs = unmake_coxa_origin(restored_legs, original_coxa_positions)
-    restored_legs = put_legs_back(
-        all_legs=restored_legs,
-        all_legs_names=all_legs_names,
-        spider3d_markers=spider3d.markers.reshape(1, -1, 3),
-        original_marker_names=spider3d.marker_names,
-    )
-    
-    return restored_legs
\ No newline at end of file
+
+    spider3d_markers = spider3d.markers.reshape(1, -1, 3)
+    plan = get_leg_scatter_plan(all_legs_names, spider3d.marker_names)
+
+    n_frames = reconstructed_frames.shape[0]
+    n_markers = spider3d_markers.shape[1]
+    if out is None:
+        out = np.empty((n_frames, n_markers, 3))
+    elif out.shape != (n_frames, n_markers, 3):
+        raise ValueError(f"out must have shape {(n_frames, n_markers, 3)}.")
+
+    # Per leg marker: the reflection of its leg (left legs 5-8 mirror y)
+    # and the coxa position it is translated to, both [n_leg_markers, 3]
+    reflection = np.ones((nLegs, 3))
+    reflection[4:8, 1] = -1
+    leg_idx, keypoint_idx = plan.leg_sources
+    marker_reflection = reflection[leg_idx]
+    marker_coxa = spider3d_markers[0, coxa_indices, :][leg_idx]
+
+    # put_legs_back restores coxa markers from spider3d, so skip them here
+    is_moving = ~np.isin(plan.leg_targets, plan.coxa_indices)
+    moving_targets = plan.leg_targets[is_moving]
+    moving_keypoints = keypoint_idx[is_moving]
+    marker_reflection = marker_reflection[is_moving]
+    marker_coxa = marker_coxa[is_moving]
+
+    # Markers that are the same in every frame: broadcast, no per-frame copies
+    static_indices = np.union1d(plan.other_indices, plan.coxa_indices).astype(np.intp)
+    out[:, static_indices] = spider3d_markers[:, static_indices]
+    if n_markers > plan.n_names:
+        out[:, plan.n_names:] = 0
+
+    # Reflect + translate + scatter the moving leg markers
+    for frames in frame_chunks(n_frames, chunk_size):
+        leg_markers = reconstructed_frames[frames][:, moving_keypoints]
+        leg_markers *= marker_reflection
+        leg_markers += marker_coxa
+        out[frames, moving_targets] = leg_markers
+
+    return out
@@ -1,12 +1,17 @@
 import numpy as np
 import pandas as pd
 
+from .data_memmap import create_memmap, frame_chunks, open_memmap
+
 
 def load_and_process_spider_data(file_path:str, 
                                  species:str = None ,
                                  exclude_center:bool = True,
                                  remove_nan:bool = True,
-                                 rescale_metres:bool = True) -> pd.DataFrame:
+                                 rescale_metres:bool = True,
+                                 chunksize:int = None,
+                                 memmap_path:str = None,
+                                 nan_over_all_columns:bool = False) -> pd.DataFrame:
     """
     Load and process spider data from a CSV file.
     Steps:
@@ -20,17 +25,35 @@ def load_and_process_spider_data(file_path:str,
     Inputs:
         file_path: str, path to the CSV file containing spider data
         species: str, optional, species to filter by (default: None)
+        chunksize: int, optional, read the CSV in chunks of this many rows
+            with load_spider_data_chunked to reduce peak memory (default: None)
+        memmap_path: str, optional, file to back the marker array with a
+            np.memmap instead of holding it in memory (default: None)
+        nan_over_all_columns: bool, with chunksize, drop rows with a NaN in any
+            column of the file, as the in-memory loader does, instead of only in
+            the parsed columns (default: False)
 
     Returns:
         numpy array of marker coordinates [n_frames, n_markers, 3]
         DataFrame of spider data with nan values removed (optional)
     """
+    if chunksize is not None:
+        return load_spider_data_chunked(file_path,
+                                        species=species,
+                                        exclude_center=exclude_center,
+                                        remove_nan=remove_nan,
+                                        rescale_metres=rescale_metres,
+                                        chunksize=chunksize,
+                                        memmap_path=memmap_path,
+                                        nan_over_all_columns=nan_over_all_columns)
+
     spider_data = load_spider_data(file_path, species)
     marker_columns = get_marker_columns(spider_data, exclude_center=exclude_center)
     marker_data, marker_columns, spider_data_df = get_marker_data(spider_data, 
                                                   marker_columns, 
                                                   remove_nan=remove_nan, 
-                                                  rescale_metres=rescale_metres)
+                                                  rescale_metres=rescale_metres,
+                                                  memmap_path=memmap_path)
     
     return marker_data, marker_columns, spider_data_df
 
@@ -77,7 +100,9 @@ def get_marker_columns(data: pd.DataFrame,
 def get_marker_data(spider_data_df: pd.DataFrame, 
                      marker_columns: list, 
                      remove_nan: bool = True,
-                     rescale_metres: bool = True) -> np.ndarray:
+                     rescale_metres: bool = True,
+                     memmap_path: str = None,
+                     chunk_size: int = 100_000) -> np.ndarray:
     """
     Get marker data from spider dataframe.
     
@@ -86,6 +111,9 @@ def get_marker_data(spider_data_df: pd.DataFrame,
         marker_columns: list of column names to extract
         remove_nan: bool, whether to remove nan values (default: True)
         rescale_metres: bool, whether to rescale to metres (default: True)
+        memmap_path: str, optional, file to back the marker array with a
+            np.memmap, filled chunk_size rows at a time (default: None)
+        chunk_size: int, rows copied per chunk when memmap_path is given
     
     Returns:
         numpy array of marker coordinates [n_frames, n_markers, 3]
@@ -104,15 +132,251 @@ def get_marker_data(spider_data_df: pd.DataFrame,
                 f" Now {length_after} rows."
             )
 
+    if memmap_path is not None:
+        n_frames = spider_data_df.shape[0]
+        marker_data = create_memmap(memmap_path, (n_frames, len(marker_columns) // 3, 3))
+        for rows in frame_chunks(n_frames, chunk_size):
+            chunk = spider_data_df.iloc[rows][marker_columns].to_numpy()
+            chunk = chunk.reshape(chunk.shape[0], -1, 3)
+            if rescale_metres:
+                np.divide(chunk, 1000, out=marker_data[rows])
+            else:
+                marker_data[rows] = chunk
+        marker_data.flush()
+        if rescale_metres:
+            print("Marker data rescaled to metres.")
+        return marker_data, marker_columns, spider_data_df
+
     # Reshape to 3D
-    marker_data = spider_data_df[marker_columns].to_numpy()
+    marker_data = spider_data_df[marker_columns].to_numpy(dtype=float, copy=True)
     marker_data = marker_data.reshape(spider_data_df.shape[0], -1, 3)
 
-    # Rescale to metres
+    # Rescale to metres, in place to avoid another full copy
+    if rescale_metres:
+        marker_data /= 1000
+        print("Marker data rescaled to metres.")
+
+    return marker_data, marker_columns, spider_data_df
+
+
+def load_spider_data_chunked(file_path:str,
+                             species:str = None,
+                             exclude_center:bool = True,
+                             remove_nan:bool = True,
+                             rescale_metres:bool = True,
+                             metadata_columns:list = None,
+                             dtype = np.float64,
+                             chunksize:int = 100_000,
+                             memmap_path:str = None,
+                             nan_over_all_columns:bool = False):
+    """
+    Stream spider data from a CSV file in chunks, straight into a marker array.
+
+    Only the marker columns, the requested metadata columns and (if filtering)
+    the species column are parsed. Each chunk is filtered by species and has
+    rows with a NaN in those columns removed before its markers are written
+    into a preallocated [n_frames, n_markers, 3] array, so peak memory follows
+    the output size rather than the size of the CSV.
+
+    Inputs:
+        file_path: str, path to the CSV file containing spider data
+        species: str, optional, species to filter by (default: None)
+        exclude_center: bool, whether to drop 'center' markers (default: True)
+        remove_nan: bool, whether to remove rows with nan values in the
+            parsed columns (default: True)
+        rescale_metres: bool, whether to rescale to metres (default: True)
+        metadata_columns: list, optional, non-marker columns to keep.
+            If None, all non-marker columns are kept (default: None)
+        dtype: numpy dtype of the marker array, e.g. np.float32 (default: np.float64)
+        chunksize: int, number of CSV rows read per chunk (default: 100000)
+        memmap_path: str, optional, file to back the marker array with a
+            np.memmap instead of holding it in memory (default: None)
+        nan_over_all_columns: bool, parse every column and drop rows with a NaN
+            in any of them, as load_and_process_spider_data does without
+            chunksize (default: False)
+
+    Returns:
+        numpy array of marker coordinates [n_frames, n_markers, 3]
+        list of marker column names
+        DataFrame of metadata columns for the kept rows
+    """
+    marker_columns, metadata_columns, read_columns_set = _resolve_read_columns(
+        file_path, species, exclude_center, metadata_columns,
+        all_columns=remove_nan and nan_over_all_columns)
+
+    n_markers = len(marker_columns) // 3
+    if memmap_path is not None:
+        # Frames are appended to the file chunk by chunk and the file is mapped
+        # once at the end, so it never holds more than the kept frames
+        marker_file = open(memmap_path, "wb")  # noqa: SIM115
+        marker_data = None
+    else:
+        # Upper bound on the number of frames; untouched pages of an np.empty
+        # buffer are never committed, and the buffer is shrunk in place at the end
+        marker_file = None
+        capacity = max(_count_data_rows(file_path), 1)
+        marker_data = np.empty((capacity, n_markers, 3), dtype=dtype)
+
+    metadata_chunks = []
+    n_rows_species = 0
+    n_frames = 0
+
+    try:
+        for csv_chunk in pd.read_csv(file_path,
+                                     usecols=lambda col: col in read_columns_set,
+                                     chunksize=chunksize):
+            species_chunk = _select_species(csv_chunk, species)
+            n_rows_species += species_chunk.shape[0]
+
+            chunk = species_chunk.dropna() if remove_nan else species_chunk
+
+            n_chunk = chunk.shape[0]
+            if marker_file is not None:
+                out = np.empty((n_chunk, n_markers, 3), dtype=dtype)
+            else:
+                if n_frames + n_chunk > marker_data.shape[0]:
+                    # Only happens if the line count underestimated (e.g. quoted newlines)
+                    new_capacity = max(2 * marker_data.shape[0], n_frames + n_chunk)
+                    marker_data.resize((new_capacity, n_markers, 3), refcheck=False)
+                out = marker_data[n_frames:n_frames + n_chunk]
+
+            chunk_markers = chunk[marker_columns].to_numpy().reshape(n_chunk, n_markers, 3)
+            if rescale_metres:
+                np.divide(chunk_markers, 1000, out=out)
+            else:
+                out[...] = chunk_markers
+            if marker_file is not None:
+                out.tofile(marker_file)
+
+            metadata_chunks.append(chunk[metadata_columns])
+            n_frames += n_chunk
+    finally:
+        if marker_file is not None:
+            marker_file.close()
+
+    if memmap_path is not None:
+        marker_data = open_memmap(memmap_path, (n_frames, n_markers, 3), dtype=dtype)
+    else:
+        marker_data.resize((n_frames, n_markers, 3), refcheck=False)
+
+    if metadata_chunks:
+        spider_data_df = pd.concat(metadata_chunks)
+    else:
+        spider_data_df = pd.DataFrame(columns=metadata_columns)
+
+    if species is not None:
+        print(f"Filtered for {species} spider data.")
+    if remove_nan and n_frames < n_rows_species:
+        print(
+            f"{n_rows_species - n_frames}"
+            f" rows with NaN values were removed."
+            f" Now {n_frames} rows."
+        )
     if rescale_metres:
-        marker_data = marker_data / 1000
         print("Marker data rescaled to metres.")
 
     return marker_data, marker_columns, spider_data_df
 
 
+def iter_spider_data_chunks(file_path:str,
+                            species:str = None,
+                            exclude_center:bool = True,
+                            remove_nan:bool = True,
+                            rescale_metres:bool = True,
+                            metadata_columns:list = None,
+                            dtype = np.float64,
+                            chunksize:int = 100_000,
+                            nan_over_all_columns:bool = False):
+    """
+    Yield spider data from a CSV file one chunk at a time, without keeping it.
+
+    Chunks are filtered and rescaled as in load_spider_data_chunked, so
+    memory is bounded by chunksize whatever the size of the file.
+
+    Inputs:
+        file_path, species, exclude_center, remove_nan, rescale_metres,
+        metadata_columns, dtype, chunksize, nan_over_all_columns:
+            as for load_spider_data_chunked
+
+    Yields:
+        numpy array of marker coordinates [n_chunk_frames, n_markers, 3]
+        list of marker column names
+        DataFrame of metadata columns for the chunk's rows
+    """
+    marker_columns, metadata_columns, read_columns_set = _resolve_read_columns(
+        file_path, species, exclude_center, metadata_columns,
+        all_columns=remove_nan and nan_over_all_columns)
+    n_markers = len(marker_columns) // 3
+
+    for csv_chunk in pd.read_csv(file_path,
+                                 usecols=lambda col: col in read_columns_set,
+                                 chunksize=chunksize):
+        chunk = _select_species(csv_chunk, species)
+        if remove_nan:
+            chunk = chunk.dropna()
+
+        chunk_markers = chunk[marker_columns].to_numpy().reshape(chunk.shape[0], n_markers, 3)
+        if rescale_metres:
+            chunk_markers = chunk_markers / 1000
+
+        yield chunk_markers.astype(dtype, copy=False), marker_columns, chunk[metadata_columns]
+
+
+def _resolve_read_columns(file_path:str, species:str, exclude_center:bool, metadata_columns:list,
+                          all_columns:bool):
+    """
+    Marker columns, metadata columns and the set of all columns to parse from a CSV header.
+
+    With all_columns every column is parsed, e.g. for a NaN mask over the whole file.
+    """
+    header_df = pd.read_csv(file_path, nrows=0)
+    header = list(header_df.columns)
+    all_marker_columns = [col for col in header if col.endswith(("_x", "_y", "_z"))]
+    marker_columns = get_marker_columns(header_df, exclude_center=exclude_center)
+
+    if len(marker_columns) % 3 != 0:
+        raise ValueError("Marker columns must come in _x, _y, _z triples.")
+
+    if metadata_columns is None:
+        metadata_columns = [col for col in header if col not in all_marker_columns]
+
+    missing = [col for col in metadata_columns if col not in header]
+    if missing:
+        raise ValueError(f"Metadata columns not found in {file_path}: {missing}")
+
+    read_columns = marker_columns + [col for col in metadata_columns if col not in marker_columns]
+    if species is not None and "species" not in read_columns:
+        read_columns.append("species")
+    if all_columns:
+        read_columns = header
+
+    return marker_columns, metadata_columns, set(read_columns)
+
+
+def _select_species(chunk:pd.DataFrame, species:str) -> pd.DataFrame:
+    """
+    Rows of a CSV chunk for the given species, or the whole chunk if species is None.
+    """
+    if species is None:
+        return chunk
+    return chunk[chunk["species"] == species]
+
+
+def _count_data_rows(file_path:str, block_size:int = 1 << 20) -> int:
+    """
+    Count the data rows of a CSV file from its line breaks, without parsing it.
+    """
+    n_lines = 0
+    last_block = b""
+    with open(file_path, "rb") as f:
+        while block := f.read(block_size):
+            n_lines += block.count(b"\n")
+            last_block = block
+
+    # Last line may have no trailing newline
+    if last_block and not last_block.endswith(b"\n"):
+        n_lines += 1
+
+    # Minus the header
+    return max(n_lines - 1, 0)
+
@@ -0,0 +1,111 @@
+import os
+import tempfile
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def create_memmap(file_path:str, shape, dtype=np.float64) -> np.memmap:
+    """
+    Create a new, writable memory-mapped array backed by file_path.
+
+    Inputs:
+        file_path: str, path of the file to create (overwritten if it exists)
+        shape: tuple, shape of the array, e.g. (n_frames, n_markers, 3)
+        dtype: numpy dtype (default: np.float64)
+
+    Returns:
+        np.memmap of the given shape and dtype
+    """
+    shape = tuple(shape)
+    if _is_empty(shape):
+        # A zero-byte file cannot be mapped
+        open(file_path, "wb").close()
+        return _empty_memmap(shape, dtype)
+    return np.memmap(file_path, mode="w+", dtype=dtype, shape=shape)
+
+
+def open_memmap(file_path:str, shape, dtype=np.float64, mode:str = "r+") -> np.memmap:
+    """
+    Map an existing raw array file, e.g. one written with ndarray.tofile.
+
+    Inputs:
+        file_path: str, path of the file to map
+        shape: tuple, shape of the array stored in the file
+        dtype: numpy dtype (default: np.float64)
+        mode: str, np.memmap mode, 'r' or 'r+' (default: 'r+')
+
+    Returns:
+        np.memmap of the given shape and dtype
+    """
+    shape = tuple(shape)
+    if _is_empty(shape):
+        return _empty_memmap(shape, dtype)
+    return np.memmap(file_path, mode=mode, dtype=dtype, shape=shape)
+
+
+def allocate_like(template, shape, dtype=None):
+    """
+    Allocate an output array of the given shape, backed by a file if template is.
+
+    If template is a np.memmap, the output is a new np.memmap in a temporary
+    file next to the template's file, so results of out-of-core arrays stay
+    out of core. Otherwise a normal in-memory array is returned. On POSIX
+    systems the temporary file is unlinked straight away and its space is
+    freed once the array is garbage collected.
+
+    Inputs:
+        template: np.ndarray or np.memmap
+        shape: tuple, shape of the output
+        dtype: numpy dtype, optional (default: template's dtype)
+
+    Returns:
+        np.ndarray or np.memmap
+    """
+    if dtype is None:
+        dtype = template.dtype
+
+    if not is_memmap(template):
+        return np.empty(shape, dtype=dtype)
+
+    directory = None
+    if getattr(template, "filename", None) is not None:
+        directory = os.path.dirname(template.filename)
+
+    fd, file_path = tempfile.mkstemp(suffix=".mmap", dir=directory)
+    os.close(fd)
+    out = create_memmap(file_path, shape, dtype=dtype)
+
+    if os.name == "posix":
+        os.unlink(file_path)
+
+    return out
+
+
+def is_memmap(array) -> bool:
+    """
+    Whether array is, or is a view of, a np.memmap.
+    """
+    return isinstance(array, np.memmap)
+
+
+def frame_chunks(n_frames:int, chunk_size:int = DEFAULT_CHUNK_SIZE):
+    """
+    Yield slices covering range(n_frames) in blocks of chunk_size frames.
+    """
+    for start in range(0, n_frames, chunk_size):
+        yield slice(start, min(start + chunk_size, n_frames))
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+def _is_empty(shape):
+    return any(size == 0 for size in shape)
+
+
+def _empty_memmap(shape, dtype):
+    """
+    Zero-size stand-in for a memmap: np.memmap cannot map an empty file,
+    but the result is still a np.memmap so is_memmap and flush work.
+    """
+    return np.empty(shape, dtype=dtype).view(np.memmap)
@@ -1,7 +1,7 @@
 import numpy as np
 
 
-def undo_body_rotation(markers, whole_body_angle, degrees=True, which_axis='z'):
+def undo_body_rotation(markers, whole_body_angle, degrees=True, which_axis='z', out=None):
 
     """
     Undo the rotation of the spider's body.
@@ -10,6 +10,8 @@ def undo_body_rotation(markers, whole_body_angle, degrees=True, which_axis='z'):
         markers: np.ndarray, shape (n_frames, n_markers, 3)
         whole_body_angle: in degrees,np.ndarray, shape (n_frames,1)
         which_axis: str, the axis of rotation ('x', 'y', 'z')
+        out: np.ndarray, optional, buffer of shape (n_frames, n_markers, 3) to
+            write the result into. Pass markers itself to rotate in place.
 
     Returns:
         np.ndarray, shape (n_frames, n_markers, 3)
@@ -18,47 +20,215 @@ def undo_body_rotation(markers, whole_body_angle, degrees=True, which_axis='z'):
     # Check that the input arrays have the correct shapes
     if markers.shape[0] != whole_body_angle.shape[0]:
         raise ValueError("The number of frames in markers and whole_body_angle must match.")
-    
-    if degrees:     
-        # Convert body pitch angles from degrees to radians
-        body_pitch_rad = np.radians(whole_body_angle)
+
+    if which_axis not in _AXIS_ROTATIONS:
+        print(f"Invalid axis: {which_axis}")
+        return markers
+
+    # Build every frame's rotation matrix at once, [n_frames, 3, 3]
+    rotation_matrices = axis_rotation_matrices(whole_body_angle,
+                                               which_axis=which_axis,
+                                               degrees=degrees)
+
+    # Apply the inverse rotation to each marker (by applying the rotation matrix)
+    return apply_rotations(markers, rotation_matrices, out=out)
+
+
+# ------------------------- ROTATION ENGINE -----------------------------
+
+def axis_rotation_matrices(angles, which_axis='z', degrees=True):
+    """
+    Build one rotation matrix per frame for a rotation about a single axis.
+
+    Uses the same axis convention as undo_body_rotation.
+
+    Inputs:
+        angles: np.ndarray, shape (n_frames,) or (n_frames, 1)
+        which_axis: str, the axis of rotation ('x', 'y', 'z')
+        degrees: bool, whether the angles are in degrees (default: True)
+
+    Returns:
+        np.ndarray, shape (n_frames, 3, 3)
+    """
+    if which_axis not in _AXIS_ROTATIONS:
+        raise ValueError(f"Invalid axis: {which_axis}")
+
+    angles = np.asarray(angles, dtype=float).reshape(-1)
+    if degrees:
+        angles = np.radians(angles)
+
+    cos = np.cos(angles)
+    sin = np.sin(angles)
+
+    rotation_matrices = np.zeros((angles.shape[0], 3, 3))
+    _AXIS_ROTATIONS[which_axis](rotation_matrices, cos, sin)
+
+    return rotation_matrices
+
+
+def euler_rotation_matrices(euler_angles, order='xyz', degrees=True):
+    """
+    Build one rotation matrix per frame from Euler angle triples.
+
+    The rotations are about the fixed (extrinsic) x, y and z axes and are
+    applied in the given order, so order='xyz' gives R = Rz @ Ry @ Rx.
+
+    Inputs:
+        euler_angles: np.ndarray, shape (n_frames, 3), one angle per letter of order
+        order: str, three letters from 'x', 'y', 'z' (default: 'xyz')
+        degrees: bool, whether the angles are in degrees (default: True)
+
+    Returns:
+        np.ndarray, shape (n_frames, 3, 3)
+    """
+    euler_angles = np.asarray(euler_angles, dtype=float)
+
+    if euler_angles.ndim != 2 or euler_angles.shape[1] != 3:
+        raise ValueError("euler_angles must have shape (n_frames, 3).")
+    if len(order) != 3 or any(axis not in "xyz" for axis in order):
+        raise ValueError(f"Invalid Euler order: {order}")
+
+    if degrees:
+        euler_angles = np.radians(euler_angles)
+
+    rotation_matrices = np.broadcast_to(np.eye(3), (euler_angles.shape[0], 3, 3))
+    for ii, axis in enumerate(order):
+        axis_matrices = _standard_axis_matrices(euler_angles[:, ii], axis)
+        rotation_matrices = np.matmul(axis_matrices, rotation_matrices)
+
+    return rotation_matrices
+
+
+def quaternion_rotation_matrices(quaternions, scalar_first=True):
+    """
+    Build one rotation matrix per frame from quaternions.
+
+    Quaternions are normalised before use, so they do not need to be unit length.
+
+    Inputs:
+        quaternions: np.ndarray, shape (n_frames, 4)
+        scalar_first: bool, whether quaternions are (w, x, y, z) rather
+            than (x, y, z, w) (default: True)
+
+    Returns:
+        np.ndarray, shape (n_frames, 3, 3)
+    """
+    quaternions = np.asarray(quaternions, dtype=float)
+
+    if quaternions.ndim != 2 or quaternions.shape[1] != 4:
+        raise ValueError("quaternions must have shape (n_frames, 4).")
+
+    norms = np.linalg.norm(quaternions, axis=1, keepdims=True)
+    if np.any(norms == 0):
+        raise ValueError("quaternions must be non-zero.")
+    quaternions = quaternions / norms
+
+    if scalar_first:
+        w, x, y, z = quaternions.T
     else:
-        body_pitch_rad = whole_body_angle
-    
-    # Prepare an array to hold the corrected markers
+        x, y, z, w = quaternions.T
+
+    rotation_matrices = np.empty((quaternions.shape[0], 3, 3))
+    rotation_matrices[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    rotation_matrices[:, 0, 1] = 2 * (x * y - z * w)
+    rotation_matrices[:, 0, 2] = 2 * (x * z + y * w)
+    rotation_matrices[:, 1, 0] = 2 * (x * y + z * w)
+    rotation_matrices[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    rotation_matrices[:, 1, 2] = 2 * (y * z - x * w)
+    rotation_matrices[:, 2, 0] = 2 * (x * z - y * w)
+    rotation_matrices[:, 2, 1] = 2 * (y * z + x * w)
+    rotation_matrices[:, 2, 2] = 1 - 2 * (x * x + y * y)
+
+    return rotation_matrices
+
+
+def apply_rotations(markers, rotation_matrices, out=None, chunk_size=100_000):
+    """
+    Rotate every frame's markers by that frame's rotation matrix.
+
+    Computes markers[i] @ rotation_matrices[i].T for all frames with a batched
+    matmul. Frames are processed in chunks so that rotating in place
+    (out=markers) only needs a chunk-sized temporary. The result has the
+    dtype of markers (float64 for integer markers).
+
+    Inputs:
+        markers: np.ndarray, shape (n_frames, n_markers, 3)
+        rotation_matrices: np.ndarray, shape (n_frames, 3, 3) or (3, 3)
+        out: np.ndarray, optional, buffer of shape (n_frames, n_markers, 3).
+            May be markers itself to rotate in place.
+        chunk_size: int, number of frames per batched matmul (default: 100000)
+
+    Returns:
+        np.ndarray, shape (n_frames, n_markers, 3)
+    """
+    rotation_matrices = np.asarray(rotation_matrices)
+    if rotation_matrices.ndim == 2:
+        rotation_matrices = np.broadcast_to(rotation_matrices, (markers.shape[0], 3, 3))
+
+    if rotation_matrices.shape != (markers.shape[0], 3, 3):
+        raise ValueError("rotation_matrices must have shape (n_frames, 3, 3).")
+    if markers.ndim != 3 or markers.shape[2] != 3:
+        raise ValueError("markers must have shape (n_frames, n_markers, 3).")
+
+    if out is None:
+        # Keep the markers' precision; the matmul itself runs in float64
+        dtype = markers.dtype if np.issubdtype(markers.dtype, np.floating) else np.float64
+        out = np.empty(markers.shape, dtype=dtype)
+    elif out.shape != markers.shape:
+        raise ValueError("out must have the same shape as markers.")
+
+    # Transposed view, no copy
+    rotation_matrices_T = rotation_matrices.transpose(0, 2, 1)
+
     n_frames = markers.shape[0]
-    corrected_markers = np.empty_like(markers)
-    
-    # Iterate over each instance
-    for i in range(n_frames):
-        # Get the current pitch angle
-        pitch = body_pitch_rad[i]
-        
-        if which_axis == 'z':
-            # Compute the rotation matrix to undo the pitch rotation
-            rotation_matrix = np.array([
-                [1, 0, 0],
-                [0, np.cos(pitch), -np.sin(pitch)],
-                [0, np.sin(pitch), np.cos(pitch)]
-            ])
-        elif which_axis == 'x':
-            rotation_matrix = np.array([
-                [np.cos(pitch), 0, np.sin(pitch)],
-                [0, 1, 0],
-                [-np.sin(pitch), 0, np.cos(pitch)]
-            ])
-        elif which_axis == 'y':
-            rotation_matrix = np.array([
-                [np.cos(pitch), -np.sin(pitch), 0],
-                [np.sin(pitch), np.cos(pitch), 0],
-                [0, 0, 1]
-            ])
-        else:
-            print(f"Invalid axis: {which_axis}")
-            return markers
-        
-        # Apply the inverse rotation to each marker (by applying the rotation matrix)
-        corrected_markers[i] = markers[i] @ rotation_matrix.T
-    
-    return corrected_markers
+    for start in range(0, n_frames, chunk_size):
+        stop = min(start + chunk_size, n_frames)
+        np.matmul(markers[start:stop], rotation_matrices_T[start:stop], out=out[start:stop])
+
+    return out
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+def _fill_z_rotation(rotation_matrices, cos, sin):
+    rotation_matrices[:, 0, 0] = 1
+    rotation_matrices[:, 1, 1] = cos
+    rotation_matrices[:, 1, 2] = -sin
+    rotation_matrices[:, 2, 1] = sin
+    rotation_matrices[:, 2, 2] = cos
+
+
+def _fill_x_rotation(rotation_matrices, cos, sin):
+    rotation_matrices[:, 0, 0] = cos
+    rotation_matrices[:, 0, 2] = sin
+    rotation_matrices[:, 1, 1] = 1
+    rotation_matrices[:, 2, 0] = -sin
+    rotation_matrices[:, 2, 2] = cos
+
+
+def _fill_y_rotation(rotation_matrices, cos, sin):
+    rotation_matrices[:, 0, 0] = cos
+    rotation_matrices[:, 0, 1] = -sin
+    rotation_matrices[:, 1, 0] = sin
+    rotation_matrices[:, 1, 1] = cos
+    rotation_matrices[:, 2, 2] = 1
+
+
+# Same axis naming as the original undo_body_rotation loop
+_AXIS_ROTATIONS = {
+    'z': _fill_z_rotation,
+    'x': _fill_x_rotation,
+    'y': _fill_y_rotation,
+}
+
+
+def _standard_axis_matrices(angles, axis):
+    """
+    Right-handed rotation matrices about the named coordinate axis.
+    """
+    # The undo_body_rotation convention names the axes differently
+    fill = {'x': _fill_z_rotation, 'y': _fill_x_rotation, 'z': _fill_y_rotation}[axis]
+
+    rotation_matrices = np.zeros((angles.shape[0], 3, 3))
+    fill(rotation_matrices, np.cos(angles), np.sin(angles))
 
+    return rotation_matrices
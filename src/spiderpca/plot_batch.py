@@ -0,0 +1,141 @@
+import inspect
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.figure import Figure
+
+from . import PCA_figures
+
+# Figure functions that specs can name
+FIGURE_FUNCTIONS = {name: getattr(PCA_figures, name) for name in (
+    "plot_explained",
+    "plot_pc_experiment",
+    "plot_pc_histogram",
+    "plot_leg_score_hist",
+    "plot_leg_score_hist_panelled",
+    "plot_leg_pc_timeseries",
+)}
+
+
+def render_figures(specs,
+                   output_dir,
+                   data=None,
+                   n_jobs=None,
+                   dpi=150,
+                   savefig_kwargs=None,
+                   max_tasks_per_child=None):
+    """
+    Render many figures headless, in parallel worker processes, and save them to disk.
+
+    Each worker switches matplotlib to the Agg backend, draws its figures,
+    saves them and closes them straight away, so memory does not grow with
+    the number of figures. Large inputs such as a scores DataFrame are passed
+    once per worker through data, and specs refer to them by name.
+
+    Inputs:
+        specs: list of dict, one per figure, with keys
+            "function": name in FIGURE_FUNCTIONS, or a module-level plotting function
+            "filename": output path relative to output_dir; the extension sets the format
+            "kwargs": dict, optional, keyword arguments of the function
+            "data": dict, optional, maps argument names to keys of data,
+                e.g. {"scores_df": "scores"}
+        output_dir: str, directory for the figures (created if needed)
+        data: dict, optional, shared inputs referred to by the specs
+        n_jobs: int, optional, number of worker processes (default: os.cpu_count())
+        dpi: int, resolution of saved figures (default: 150)
+        savefig_kwargs: dict, optional, extra arguments of Figure.savefig
+        max_tasks_per_child: int, optional, restart workers after this many
+            figures (Python 3.11+)
+
+    Returns:
+        list of saved file paths, in the order of specs
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    for spec in specs:
+        _check_spec(spec, data)
+
+    savefig_kwargs = dict(savefig_kwargs or {})
+    savefig_kwargs.setdefault("dpi", dpi)
+    tasks = [(spec, os.path.join(output_dir, spec["filename"])) for spec in specs]
+
+    pool_kwargs = {}
+    if max_tasks_per_child is not None:
+        pool_kwargs["max_tasks_per_child"] = max_tasks_per_child
+
+    n_jobs = max(1, min(n_jobs or os.cpu_count() or 1, len(tasks)))
+    with ProcessPoolExecutor(max_workers=n_jobs,
+                             initializer=_init_worker,
+                             initargs=(data or {}, savefig_kwargs),
+                             **pool_kwargs) as pool:
+        return list(pool.map(_render_one, tasks))
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+# Shared inputs and savefig arguments of each worker process
+_WORKER_STATE = {}
+
+
+def _init_worker(data, savefig_kwargs):
+    mpl.use("Agg", force=True)
+    plt.ioff()
+    _WORKER_STATE["data"] = data
+    _WORKER_STATE["savefig_kwargs"] = savefig_kwargs
+
+
+def _check_spec(spec, data):
+    if "filename" not in spec:
+        raise ValueError(f"Figure spec has no filename: {spec}")
+    function = spec.get("function")
+    if isinstance(function, str) and function not in FIGURE_FUNCTIONS:
+        raise ValueError(f"Unknown figure function: {function}")
+    if not isinstance(function, str) and not callable(function):
+        raise ValueError(f"Figure spec has no function: {spec}")
+    for key in spec.get("data", {}).values():
+        if data is None or key not in data:
+            raise ValueError(f"Figure spec refers to missing data: {key}")
+
+
+def _render_one(task):
+    spec, file_path = task
+    function = spec["function"]
+    if isinstance(function, str):
+        function = FIGURE_FUNCTIONS[function]
+
+    kwargs = dict(spec.get("kwargs", {}))
+    for name, key in spec.get("data", {}).items():
+        kwargs[name] = _WORKER_STATE["data"][key]
+    if "show" in inspect.signature(function).parameters:
+        kwargs.setdefault("show", False)
+
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    try:
+        figure = _find_figure(function(**kwargs))
+        figure.savefig(file_path, **_WORKER_STATE["savefig_kwargs"])
+    finally:
+        plt.close("all")
+
+    return file_path
+
+
+def _find_figure(result):
+    """
+    The figure of a plotting function's return value (figure, axes or a tuple of them).
+    """
+    items = result if isinstance(result, tuple) else (result,)
+    for item in items:
+        if isinstance(item, Figure):
+            return item
+        first = item
+        if isinstance(item, np.ndarray) and item.size:
+            first = item.flat[0]
+        elif isinstance(item, (list, tuple)) and item:
+            first = item[0]
+        if hasattr(first, "figure"):
+            return first.figure
+    return plt.gcf()
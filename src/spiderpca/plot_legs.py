@@ -1,7 +1,15 @@
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import numpy as np
 
-def plot_leg_overlay(new_legs, num_samples=100, title="Overlay of Random Frames for All Aligned Legs (Interactive 3D)"):
+from .data_memmap import DEFAULT_CHUNK_SIZE, frame_chunks
+from .PCA_histograms import bin_index
+
+# Axis indices of each 2-D projection
+PROJECTIONS = {"xy": (0, 1), "xz": (0, 2), "yz": (1, 2)}
+
+def plot_leg_overlay(new_legs, num_samples=100, title="Overlay of Random Frames for All Aligned Legs (Interactive 3D)",
+                     mode="traces", seed=None):
     """
     Create an interactive 3D plot showing random frames of spider leg movements.
     
@@ -9,10 +17,24 @@ def plot_leg_overlay(new_legs, num_samples=100, title="Overlay of Random Frames
         new_legs (np.ndarray): Array of leg positions with shape (frames, legs, points, coordinates)
         num_samples (int): Number of random frames to sample (default: 100)
         title (str): Plot title
+        mode (str): "traces" draws two traces per leg per frame. "merged" draws
+            one trace per leg holding all its frames, separated by NaNs, and one
+            end-marker trace per leg, so 10k+ frames stay interactive. "density"
+            bins every frame into per-leg voxel grids and draws them as isosurfaces,
+            see compute_leg_density and plot_leg_density (default: "traces")
+        seed (int): Seed for sampling the frames, for reproducible figures
+            (default: None, numpy's global random state)
     
     Returns:
         go.Figure: The plotly figure object
     """
+    if mode not in ("traces", "merged", "density"):
+        raise ValueError(f"Invalid mode: {mode}")
+
+    if mode == "density":
+        counts, edges = compute_leg_density(new_legs)
+        return plot_leg_density(counts, edges, title=title)
+
     # Create a new figure
     fig = go.Figure()
 
@@ -30,33 +52,40 @@ def plot_leg_overlay(new_legs, num_samples=100, title="Overlay of Random Frames
 
     # Randomly select frame indices from the available frames
     total_frames = new_legs.shape[0]
-    random_frames = np.random.choice(total_frames, size=min(num_samples, total_frames), replace=False)
+    if seed is None:
+        random_frames = np.random.choice(total_frames, size=min(num_samples, total_frames), replace=False)
+    else:
+        rng = np.random.default_rng(seed)
+        random_frames = rng.choice(total_frames, size=min(num_samples, total_frames), replace=False)
 
-    for leg_idx in range(num_legs):
-        color = colourList[leg_idx % len(colourList)]
+    if mode == "merged":
+        fig.add_traces(_merged_leg_traces(new_legs, random_frames, colourList))
+    else:
+        for leg_idx in range(num_legs):
+            color = colourList[leg_idx % len(colourList)]
 
-        # Iterate over the randomly selected frames for the current leg
-        for frame_idx in random_frames:
-            aligned_scatter_leg = go.Scatter3d(
-                x=new_legs[frame_idx, leg_idx, :, 0],
-                y=new_legs[frame_idx, leg_idx, :, 1],
-                z=new_legs[frame_idx, leg_idx, :, 2],
-                mode="markers+lines",
-                marker=dict(size=2, color=color, opacity=0.5),
-                line=dict(color=color, width=1),
-                name=f"Aligned Leg {leg_idx + 1} - Frame {frame_idx + 1}"
-            )
-            fig.add_trace(aligned_scatter_leg)
-
-            # Make the end of the leg black x marker
-            end_scatter = go.Scatter3d(
-                x=[new_legs[frame_idx, leg_idx, 0, 0]],
-                y=[new_legs[frame_idx, leg_idx, 0, 1]],
-                z=[new_legs[frame_idx, leg_idx, 0, 2]],
-                mode="markers",
-                marker=dict(size=1, color="black"),
-            )
-            fig.add_trace(end_scatter)
+            # Iterate over the randomly selected frames for the current leg
+            for frame_idx in random_frames:
+                aligned_scatter_leg = go.Scatter3d(
+                    x=new_legs[frame_idx, leg_idx, :, 0],
+                    y=new_legs[frame_idx, leg_idx, :, 1],
+                    z=new_legs[frame_idx, leg_idx, :, 2],
+                    mode="markers+lines",
+                    marker=dict(size=2, color=color, opacity=0.5),
+                    line=dict(color=color, width=1),
+                    name=f"Aligned Leg {leg_idx + 1} - Frame {frame_idx + 1}"
+                )
+                fig.add_trace(aligned_scatter_leg)
+
+                # Make the end of the leg black x marker
+                end_scatter = go.Scatter3d(
+                    x=[new_legs[frame_idx, leg_idx, 0, 0]],
+                    y=[new_legs[frame_idx, leg_idx, 0, 1]],
+                    z=[new_legs[frame_idx, leg_idx, 0, 2]],
+                    mode="markers",
+                    marker=dict(size=1, color="black"),
+                )
+                fig.add_trace(end_scatter)
 
     # Update layout
     fig.update_layout(
@@ -69,4 +98,178 @@ def plot_leg_overlay(new_legs, num_samples=100, title="Overlay of Random Frames
         showlegend=False  # Hide legend to avoid clutter
     )
 
-    return fig
\ No newline at end of file
+    return fig
+
+def compute_leg_density(new_legs, bins=40, extent=None, projection=None, keypoints=None,
+                        chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Count leg keypoint positions in per-leg occupancy grids, chunk by chunk.
+
+    All legs share one grid, so their densities can be compared directly. The
+    frames are streamed in chunks (one extra pass finds the extent if it is not
+    given), so a np.memmap leg tensor never has to fit in memory.
+
+    Args:
+        new_legs (np.ndarray): Aligned legs with shape (frames, legs, points, coordinates),
+            e.g. from make_coxa_origin
+        bins (int): Number of bins along each axis (default: 40)
+        extent (tuple): ((min, max) per gridded axis); positions outside are not counted
+            (default: the range of the data)
+        projection (str): None for 3-D voxels, or "xy", "xz" or "yz" for a 2-D projection
+        keypoints (list of int): Keypoints to count (default: all but the last, the
+            coxa, which is the origin after make_coxa_origin)
+        chunk_size (int): Frames binned per step
+
+    Returns:
+        np.ndarray: Counts with shape (legs, bins, bins[, bins])
+        list of np.ndarray: Bin edges of each gridded axis
+    """
+    if projection is not None and projection not in PROJECTIONS:
+        raise ValueError(f"Invalid projection: {projection}")
+    axes = list(PROJECTIONS[projection]) if projection is not None else [0, 1, 2]
+    if keypoints is None:
+        keypoints = list(range(new_legs.shape[2] - 1))
+    keypoints = list(keypoints)
+
+    num_frames, num_legs = new_legs.shape[:2]
+
+    if extent is None:
+        low = np.full(len(axes), np.inf)
+        high = np.full(len(axes), -np.inf)
+        for frames in frame_chunks(num_frames, chunk_size):
+            points = new_legs[frames][:, :, keypoints][..., axes].reshape(-1, len(axes))
+            low = np.fmin(low, np.nanmin(points, axis=0))
+            high = np.fmax(high, np.nanmax(points, axis=0))
+    else:
+        low, high = np.asarray(extent, dtype=np.float64).T
+    high = np.where(high > low, high, low + 1e-9)
+
+    edges = np.linspace(low, high, bins + 1, axis=1)
+    grid_size = bins ** len(axes)
+    counts = np.zeros(num_legs * grid_size, dtype=np.int64)
+
+    # Grid offset of each leg, broadcast over frames and keypoints
+    leg_offset = (np.arange(num_legs) * grid_size)[:, np.newaxis]
+
+    for frames in frame_chunks(num_frames, chunk_size):
+        points = new_legs[frames][:, :, keypoints][..., axes]
+
+        # Same edge rules as np.histogramdd
+        bin_idx = bin_index(points, edges)
+        inside = np.all(bin_idx >= 0, axis=-1)
+        bin_idx[~inside] = 0
+
+        flat = leg_offset + np.ravel_multi_index(tuple(np.moveaxis(bin_idx, -1, 0)), (bins,) * len(axes))
+        counts += np.bincount(flat[inside], minlength=counts.shape[0])
+
+    return counts.reshape((num_legs,) + (bins,) * len(axes)), list(edges)
+
+
+def plot_leg_density(counts, edges, title="Density of All Aligned Legs", log_scale=False,
+                     surface_count=4, opacity=0.15):
+    """
+    Plot per-leg occupancy grids from compute_leg_density.
+
+    3-D grids are drawn as one isosurface trace per leg, 2-D projections as one
+    heatmap per leg.
+
+    Args:
+        counts (np.ndarray): Counts with shape (legs, bins, bins[, bins])
+        edges (list of np.ndarray): Bin edges of each gridded axis
+        title (str): Plot title
+        log_scale (bool): Show log(1 + counts) (default: False)
+        surface_count (int): Number of isosurfaces per leg (default: 4)
+        opacity (float): Opacity of the isosurfaces (default: 0.15)
+
+    Returns:
+        go.Figure: The plotly figure object
+    """
+    colourList = ["#e84855", "#FF9B71", "#FFFD82", "#1B998B",
+                  "#86EADE","#FFFEC2","#FFB899","#F2929A"]
+
+    num_legs = counts.shape[0]
+    values = np.log1p(counts) if log_scale else counts.astype(np.float64)
+    centres = [(axis_edges[:-1] + axis_edges[1:]) / 2 for axis_edges in edges]
+
+    if counts.ndim == 4:
+        x, y, z = np.meshgrid(*centres, indexing="ij")
+        fig = go.Figure()
+        for leg_idx in range(num_legs):
+            leg_values = values[leg_idx]
+            peak = leg_values.max()
+            if peak == 0:
+                continue
+            color = colourList[leg_idx % len(colourList)]
+            fig.add_trace(go.Isosurface(
+                x=x.ravel(), y=y.ravel(), z=z.ravel(),
+                value=leg_values.ravel() / peak,
+                isomin=0.05, isomax=1,
+                surface_count=surface_count,
+                opacity=opacity,
+                colorscale=[[0, color], [1, color]],
+                showscale=False,
+                caps=dict(x_show=False, y_show=False, z_show=False),
+                name=f"Leg {leg_idx + 1}"
+            ))
+        fig.update_layout(
+            scene=dict(
+                xaxis_title="X",
+                yaxis_title="Y",
+                zaxis_title="Z",
+            ),
+            title=title,
+            showlegend=False
+        )
+        return fig
+
+    num_cols = int(np.ceil(num_legs / 2))
+    fig = make_subplots(rows=2, cols=num_cols, shared_xaxes=True, shared_yaxes=True,
+                        subplot_titles=[f"Leg {leg_idx + 1}" for leg_idx in range(num_legs)])
+    for leg_idx in range(num_legs):
+        fig.add_trace(go.Heatmap(
+            x=centres[0], y=centres[1],
+            # Heatmap rows are y
+            z=values[leg_idx].T,
+            coloraxis="coloraxis"
+        ), row=leg_idx // num_cols + 1, col=leg_idx % num_cols + 1)
+    fig.update_layout(title=title, coloraxis=dict(colorscale="Viridis"))
+    return fig
+
+# ------------------------- HELPER FUNCTIONS -----------------------------
+
+def _merged_leg_traces(new_legs, frames, colourList):
+    """
+    One polyline trace (frames separated by NaNs) and one end-marker trace per leg.
+    """
+    num_points = new_legs.shape[2]
+
+    # [legs, frames, points + 1 separator, coordinates]
+    paths = np.full((new_legs.shape[1], len(frames), num_points + 1, 3), np.nan)
+    paths[:, :, :num_points] = new_legs[frames].transpose(1, 0, 2, 3)
+    paths = paths.reshape(new_legs.shape[1], -1, 3)
+
+    # [legs, frames, coordinates]
+    ends = new_legs[frames, :, 0].transpose(1, 0, 2)
+
+    traces = []
+    for leg_idx in range(new_legs.shape[1]):
+        color = colourList[leg_idx % len(colourList)]
+        traces.append(go.Scatter3d(
+            x=paths[leg_idx, :, 0],
+            y=paths[leg_idx, :, 1],
+            z=paths[leg_idx, :, 2],
+            mode="markers+lines",
+            marker=dict(size=2, color=color, opacity=0.5),
+            line=dict(color=color, width=1),
+            connectgaps=False,
+            name=f"Aligned Leg {leg_idx + 1}"
+        ))
+        traces.append(go.Scatter3d(
+            x=ends[leg_idx, :, 0],
+            y=ends[leg_idx, :, 1],
+            z=ends[leg_idx, :, 2],
+            mode="markers",
+            marker=dict(size=1, color="black"),
+            name=f"Leg {leg_idx + 1} ends"
+        ))
+    return traces
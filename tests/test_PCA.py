@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+
+from spiderpca import CovariancePCA, create_memmap, run_PCA, run_PCA_incremental
+from spiderpca.PCA import get_svd_solver
+
+N_FRAMES = 2000
+N_MARKERS = 6
+
+
+def make_markers(seed=0):
+    """
+    Markers with well separated variances, so every component is well defined.
+    """
+    rng = np.random.default_rng(seed)
+    scales = np.geomspace(3, 0.05, N_MARKERS * 3)
+    rotation = np.linalg.qr(rng.normal(size=(N_MARKERS * 3, N_MARKERS * 3)))[0]
+    data = (rng.normal(size=(N_FRAMES, N_MARKERS * 3)) * scales) @ rotation + 5.0
+    return data.reshape(N_FRAMES, N_MARKERS, 3)
+
+
+def align_signs(components, reference):
+    signs = np.sign(np.sum(components * reference, axis=1))
+    return components * signs[:, np.newaxis], signs
+
+
+# ------------------------- run_PCA_incremental -----------------------------
+
+@pytest.mark.parametrize("source", ["array", "memmap", "callable", "list"])
+def test_incremental_matches_full(source, tmp_path):
+    markers = make_markers()
+    components, scores, pca = run_PCA(markers)
+
+    if source == "array":
+        chunks = markers
+    elif source == "memmap":
+        chunks = create_memmap(tmp_path / "markers.dat", markers.shape)
+        chunks[:] = markers
+    elif source == "callable":
+        def chunks():
+            return (markers[start:start + 300] for start in range(0, N_FRAMES, 300))
+    else:
+        chunks = [markers[start:start + 300] for start in range(0, N_FRAMES, 300)]
+
+    inc_components, inc_scores, inc_pca = run_PCA_incremental(chunks, chunk_size=300)
+
+    inc_components, signs = align_signs(inc_components, components)
+    np.testing.assert_allclose(inc_components, components, atol=1e-8)
+    np.testing.assert_allclose(inc_scores * signs, scores, atol=1e-8)
+    np.testing.assert_allclose(inc_pca.explained_variance_, pca.explained_variance_, rtol=1e-8)
+
+
+def test_incremental_one_shot_iterator():
+    markers = make_markers()
+    with pytest.raises(ValueError, match="one-shot"):
+        run_PCA_incremental(iter([markers[:1000], markers[1000:]]))
+
+    _, scores, _ = run_PCA_incremental(iter([markers[:1000], markers[1000:]]), project_chunks=markers[:10])
+    assert scores.shape == (10, N_MARKERS * 3)
+
+
+def test_run_PCA_incremental_flag():
+    markers = make_markers()
+    components, scores, _ = run_PCA(markers)
+    inc_components, inc_scores, inc_pca = run_PCA(markers, incremental=True, chunk_size=500)
+
+    inc_components, signs = align_signs(inc_components, components)
+    np.testing.assert_allclose(inc_components, components, atol=1e-8)
+    np.testing.assert_allclose(inc_scores * signs, scores, atol=1e-8)
+    assert inc_pca.n_samples_seen_ == N_FRAMES
+
+
+# ------------------------- CovariancePCA -----------------------------
+
+@pytest.mark.parametrize("n_components", [None, 5, 0.9])
+def test_covariance_pca_matches_sklearn(n_components):
+    pca_input = make_markers().reshape(N_FRAMES, -1)
+    reference = PCA(n_components=n_components, svd_solver="full").fit(pca_input)
+    pca = CovariancePCA(n_components=n_components, block_size=300, n_jobs=3).fit(pca_input)
+
+    assert pca.n_components_ == reference.n_components_
+    assert pca.n_samples_ == N_FRAMES
+    # Same sign convention as sklearn, so no alignment is needed
+    np.testing.assert_allclose(pca.components_, reference.components_, atol=1e-8)
+    np.testing.assert_allclose(pca.explained_variance_, reference.explained_variance_, rtol=1e-8)
+    np.testing.assert_allclose(pca.explained_variance_ratio_, reference.explained_variance_ratio_, rtol=1e-8)
+    np.testing.assert_allclose(pca.mean_, reference.mean_)
+    np.testing.assert_allclose(pca.transform(pca_input), reference.transform(pca_input), atol=1e-8)
+
+
+def test_covariance_pca_partial_fit():
+    pca_input = make_markers().reshape(N_FRAMES, -1)
+    pca = CovariancePCA(block_size=300).fit(pca_input)
+
+    partial = CovariancePCA(block_size=300)
+    for start in range(0, N_FRAMES, 700):
+        partial.partial_fit(pca_input[start:start + 700])
+    np.testing.assert_allclose(partial.components_, pca.components_, atol=1e-10)
+    np.testing.assert_allclose(partial.explained_variance_, pca.explained_variance_, rtol=1e-10)
+
+
+def test_run_PCA_covariance_solver():
+    markers = make_markers()
+    components, scores, _ = run_PCA(markers, svd_solver="full")
+    cov_components, cov_scores, pca = run_PCA(markers, svd_solver="covariance")
+
+    assert isinstance(pca, CovariancePCA)
+    np.testing.assert_allclose(cov_components, components, atol=1e-8)
+    np.testing.assert_allclose(cov_scores, scores, atol=1e-8)
+
+
+# ------------------------- get_svd_solver -----------------------------
+
+@pytest.mark.parametrize(("n_components", "n_samples", "n_vars", "expected"), [
+    (None, 2000, 96, "auto"),
+    (None, 10_000_000, 96, "auto"),
+    (4, 10_000_000, 12, "randomized"),
+    (0.9, 10_000_000, 96, "full"),
+    (10, 2000, 96, "randomized"),
+    (10, 2000, 5000, "randomized"),
+    (90, 2000, 96, "full"),
+    (0.9, 2000, 5000, "full"),
+    (10, 300, 40, "full"),
+    (True, 2000, 96, "full"),
+])
+def test_get_svd_solver(n_components, n_samples, n_vars, expected):
+    assert get_svd_solver(n_components, n_samples, n_vars) == expected
+
+
+def test_run_PCA_default_solver():
+    markers = make_markers()
+    # A tall, narrow input still gets sklearn's PCA unless covariance is asked for
+    tall = np.tile(markers, (100, 1, 1))
+    _, _, pca = run_PCA(tall)
+    assert type(pca) is PCA
+    assert pca.svd_solver == "auto"
+
+    _, _, pca = run_PCA(markers, n_components=3)
+    assert type(pca) is PCA
+    assert pca.svd_solver == "randomized"
+
+    _, _, pca = run_PCA(markers, n_components=0.9)
+    assert pca.svd_solver == "full"
@@ -0,0 +1,119 @@
+import os
+
+import matplotlib as mpl
+import numpy as np
+import pytest
+from PIL import Image
+
+from spiderpca import (
+    PCAModel,
+    PoseRenderer,
+    animate_pc_sweeps,
+    reconstruct,
+    reconstruct_pc_sweeps,
+    run_PCA,
+    save_animation,
+)
+
+N_FRAMES = 200
+N_LEGS = 8
+KEYPOINTS = ["claw", "tibiametatarsus", "patella", "coxa"]
+MARKER_NAMES = [f"{keypoint}{leg}" for leg in range(1, N_LEGS + 1) for keypoint in KEYPOINTS]
+FIGSIZE = (2, 2)
+DPI = 40
+
+
+def make_model(seed=0):
+    rng = np.random.default_rng(seed)
+    markers = rng.normal(scale=0.01, size=(N_FRAMES, len(MARKER_NAMES), 3))
+    _, _, pca = run_PCA(markers, n_components=4)
+    return PCAModel.from_pca(pca, marker_names=MARKER_NAMES)
+
+
+def make_frames(n_frames, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, size=(16, 24, 3), dtype=np.uint8) for _ in range(n_frames)]
+
+
+def gif_info(file_path):
+    with Image.open(file_path) as image:
+        return image.n_frames, image.size, image.info
+
+
+def test_save_gif_frame_count(tmp_path):
+    file_path = str(tmp_path / "sweep.gif")
+
+    assert save_animation(iter(make_frames(7)), file_path, fps=20) == file_path
+
+    n_frames, size, info = gif_info(file_path)
+    assert n_frames == 7
+    assert size == (24, 16)
+    assert info["duration"] == 50
+    assert info["loop"] == 0
+
+
+def test_save_invalid_format(tmp_path):
+    with pytest.raises(ValueError, match="Invalid animation format"):
+        save_animation(make_frames(2), str(tmp_path / "sweep.avi"))
+
+
+@pytest.mark.parametrize("extension", ["gif", "mp4"])
+def test_save_no_frames(tmp_path, extension):
+    with pytest.raises(ValueError, match="No frames"):
+        save_animation(iter([]), str(tmp_path / f"sweep.{extension}"))
+
+
+def test_save_mp4_reports_ffmpeg_error(tmp_path, monkeypatch):
+    # Stands in for an ffmpeg that rejects its arguments without reading the frames
+    ffmpeg = tmp_path / "ffmpeg"
+    ffmpeg.write_text("#!/bin/sh\necho 'Unrecognized option' >&2\nexit 1\n")
+    ffmpeg.chmod(0o755)
+    monkeypatch.setitem(mpl.rcParams, "animation.ffmpeg_path", str(ffmpeg))
+
+    frames = (np.zeros((200, 200, 3), dtype=np.uint8) for _ in range(50))
+    with pytest.raises(ValueError, match="Unrecognized option"):
+        save_animation(frames, str(tmp_path / "sweep.mp4"))
+
+
+def test_sweeps_match_reconstruct():
+    model = make_model()
+    score_frames = np.random.default_rng(1).normal(size=(5, model.n_components))
+    sweeps = reconstruct_pc_sweeps(score_frames, model.components, model.mu, components=[0, 2])
+
+    for sweep, pc in zip(sweeps, [0, 2], strict=True):
+        expected = reconstruct(score_frames, model.components, model.mu, components_list=[pc])
+        np.testing.assert_allclose(sweep, expected.reshape(sweep.shape), atol=1e-12)
+
+
+def test_renderer_frames():
+    model = make_model()
+    renderer = PoseRenderer(MARKER_NAMES, figsize=FIGSIZE, dpi=DPI)
+    poses = model.mu.reshape(1, -1, 3) + np.zeros((3, 1, 1))
+    poses[1:] += 0.02
+
+    frames = list(renderer.frames(poses))
+
+    assert len(frames) == 3
+    assert frames[0].shape == (FIGSIZE[1] * DPI, FIGSIZE[0] * DPI, 3)
+    assert frames[0].dtype == np.uint8
+    assert not np.array_equal(frames[0], frames[1])
+
+
+def test_animate_pc_sweeps(tmp_path):
+    model = make_model()
+
+    paths = animate_pc_sweeps(model, str(tmp_path), components=[0, 2], num_frames=8,
+                              n_jobs=2, figsize=FIGSIZE, dpi=DPI)
+
+    assert paths == [os.path.join(str(tmp_path), name) for name in ["PC01.gif", "PC03.gif"]]
+    for path in paths:
+        n_frames, size, _ = gif_info(path)
+        assert n_frames == 8
+        assert size == (FIGSIZE[0] * DPI, FIGSIZE[1] * DPI)
+
+
+def test_animate_needs_marker_names(tmp_path):
+    model = make_model()
+    model.marker_names = None
+    with pytest.raises(ValueError, match="marker_names"):
+        animate_pc_sweeps(model, str(tmp_path))
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+
+from spiderpca import bootstrap_PCA
+
+N_SEQUENCES = 40
+FRAMES_PER_SEQUENCE = 50
+N_VARS = 12
+
+
+def make_data(seed=0):
+    """
+    Sequences of frames with well separated component variances.
+    """
+    rng = np.random.default_rng(seed)
+    scales = np.geomspace(4, 0.2, N_VARS)
+    rotation = np.linalg.qr(rng.normal(size=(N_VARS, N_VARS)))[0]
+    n_frames = N_SEQUENCES * FRAMES_PER_SEQUENCE
+    data = (rng.normal(size=(n_frames, N_VARS)) * scales) @ rotation + 1.0
+    groups = np.repeat([f"seq{ii}" for ii in range(N_SEQUENCES)], FRAMES_PER_SEQUENCE)
+    return data, groups
+
+
+def align_signs(components, reference):
+    return components * np.sign(np.sum(components * reference, axis=1))[:, np.newaxis]
+
+
+def test_reproducible_for_any_n_jobs():
+    data, groups = make_data()
+    result = bootstrap_PCA(data, groups, n_resamples=40, n_components=4, seed=3, n_jobs=1)
+    again = bootstrap_PCA(data, groups, n_resamples=40, n_components=4, seed=3, n_jobs=4)
+
+    assert result.n_resamples == 40
+    np.testing.assert_array_equal(result.explained_variance_ratio_samples,
+                                  again.explained_variance_ratio_samples)
+    np.testing.assert_array_equal(result.loadings_mean, again.loadings_mean)
+    np.testing.assert_array_equal(result.loadings_std, again.loadings_std)
+
+    other = bootstrap_PCA(data, groups, n_resamples=40, n_components=4, seed=4)
+    assert not np.array_equal(other.explained_variance_ratio_samples,
+                              result.explained_variance_ratio_samples)
+
+
+def test_matches_full_data_PCA():
+    data, groups = make_data()
+    reference = PCA(n_components=4, svd_solver="full").fit(data)
+    result = bootstrap_PCA(data, groups, n_resamples=100, n_components=4)
+
+    np.testing.assert_allclose(result.explained_variance_ratio, reference.explained_variance_ratio_, rtol=1e-8)
+    np.testing.assert_allclose(align_signs(result.components, reference.components_),
+                               reference.components_, atol=1e-8)
+
+    # The aligned resampled components average back to the full-data ones
+    np.testing.assert_allclose(align_signs(result.loadings_mean, reference.components_),
+                               reference.components_, atol=0.02)
+    assert np.all(result.loadings_std < 0.05)
+
+    lower, upper = result.explained_variance_ci()
+    assert np.all(lower <= result.explained_variance_ratio)
+    assert np.all(result.explained_variance_ratio <= upper)
+    lower, upper = result.loadings_ci()
+    assert np.all((lower <= result.loadings_mean) & (result.loadings_mean <= upper))
+
+
+def test_marker_input():
+    data, groups = make_data()
+    flat = bootstrap_PCA(data, groups, n_resamples=16, n_components=3)
+    markers = bootstrap_PCA(data.reshape(-1, N_VARS // 3, 3), groups, n_resamples=16, n_components=3)
+    np.testing.assert_array_equal(markers.loadings_mean, flat.loadings_mean)
+
+
+def test_invalid_groups():
+    data, groups = make_data()
+    with pytest.raises(ValueError, match="one label per frame"):
+        bootstrap_PCA(data, groups[:-1])
+
+    groups = groups.astype(object)
+    groups[3] = None
+    with pytest.raises(ValueError, match="missing labels"):
+        bootstrap_PCA(data, groups)
+
+
+def test_statistics_memory_limit():
+    data, groups = make_data()
+    with pytest.raises(ValueError, match="max_statistics_bytes"):
+        bootstrap_PCA(data, groups, max_statistics_bytes=1000)
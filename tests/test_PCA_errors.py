@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from scipy.stats import f as f_distribution
+from sklearn.decomposition import PCA
+
+from spiderpca import PCAModel, reconstruction_errors
+
+N_FRAMES = 300
+N_MARKERS = 5
+N_COMPONENTS = 4
+
+
+@pytest.fixture
+def fitted():
+    rng = np.random.default_rng(0)
+    markers = rng.normal(size=(N_FRAMES, N_MARKERS, 3))
+    pca = PCA(n_components=N_COMPONENTS).fit(markers.reshape(N_FRAMES, -1))
+    return markers, PCAModel.from_pca(pca)
+
+
+def test_matches_explicit_reconstruction(fitted):
+    markers, model = fitted
+    errors = reconstruction_errors(markers, model, per_marker=True, chunk_size=70)
+
+    scores = model.transform(markers)
+    residual = markers - model.inverse_transform(scores)
+    np.testing.assert_allclose(errors.q, np.sum(residual**2, axis=(1, 2)))
+    np.testing.assert_allclose(errors.marker_errors, np.linalg.norm(residual, axis=2))
+    np.testing.assert_allclose(errors.t2, np.sum(scores**2 / model.explained_variance, axis=1))
+    assert errors.q_outliers[0] == np.argmax(errors.q)
+
+
+def test_t2_limit_uses_fit_size(fitted):
+    markers, model = fitted
+    assert model.n_samples == N_FRAMES
+
+    # Score fewer frames than the fit; the limit depends on the fit only
+    errors = reconstruction_errors(markers[:20], model)
+    n, k = N_FRAMES, N_COMPONENTS
+    expected = k * (n - 1) * (n + 1) / (n * (n - k)) * f_distribution.ppf(0.95, k, n - k)
+    assert errors.t2_limit(0.05) == pytest.approx(expected)
+    assert errors.t2_limit(0.05, n_samples=50) != pytest.approx(expected)
+
+
+def test_t2_limit_needs_fit_size(fitted):
+    markers, model = fitted
+    model.n_samples = None
+    with pytest.raises(ValueError, match="n_samples"):
+        reconstruction_errors(markers, model).t2_limit()
+
+
+def test_model_keeps_n_samples(fitted, tmp_path):
+    _, model = fitted
+    model.save(tmp_path / "model.npz")
+    assert PCAModel.load(tmp_path / "model.npz").n_samples == N_FRAMES
+
+
+@pytest.mark.parametrize("n_components", [0, N_COMPONENTS + 1, 2.0, 2.5, True])
+def test_invalid_n_components(fitted, n_components):
+    markers, model = fitted
+    with pytest.raises(ValueError, match="n_components must be an integer"):
+        reconstruction_errors(markers, model, n_components=n_components)
+
+
+def test_numpy_integer_n_components(fitted):
+    markers, model = fitted
+    errors = reconstruction_errors(markers, model, n_components=np.int64(2))
+    assert errors.n_components == 2
+
+
+def test_q_with_all_but_one_component():
+    # Frames far from the origin with one direction of tiny variance, so ||x||^2 - ||t||^2
+    # would cancel to rounding noise
+    rng = np.random.default_rng(1)
+    n_vars = N_MARKERS * 3
+    scales = np.r_[np.full(n_vars - 1, 1e3), 1e-4]
+    markers = (rng.normal(size=(N_FRAMES, n_vars)) * scales + 1e4).reshape(N_FRAMES, N_MARKERS, 3)
+    model = PCAModel.from_pca(PCA().fit(markers.reshape(N_FRAMES, -1)))
+
+    errors = reconstruction_errors(markers, model, n_components=n_vars - 1, chunk_size=70)
+
+    centred = markers.reshape(N_FRAMES, -1) - model.mean
+    components = model.components[:n_vars - 1]
+    residual = centred - (centred @ components.T) @ components
+    expected = np.sum(residual**2, axis=1)
+    assert np.all(errors.q >= 0)
+    np.testing.assert_allclose(errors.q, expected, rtol=1e-6)
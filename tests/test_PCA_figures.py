@@ -0,0 +1,103 @@
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.patches import StepPatch
+
+from spiderpca import (
+    ScoresStore,
+    compute_score_histograms,
+    plot_leg_score_hist,
+    plot_leg_score_hist_panelled,
+    plot_pc_histogram,
+)
+
+mpl.use("Agg")
+
+N_FRAMES = 300
+N_LEGS = 8
+N_COMPONENTS = 3
+CONDITIONS = ["sq040", "sq060", "sq080", "sq100"]
+
+
+@pytest.fixture(autouse=True)
+def close_figures():
+    yield
+    plt.close("all")
+
+
+def make_scores(seed=0):
+    rng = np.random.default_rng(seed)
+    scores = rng.normal(size=(N_FRAMES, N_LEGS, N_COMPONENTS))
+    conditions = rng.choice(CONDITIONS, size=N_FRAMES)
+    return scores, conditions
+
+
+def make_scores_df(seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"PC1": rng.normal(size=N_FRAMES),
+                         "PC2": rng.normal(size=N_FRAMES),
+                         "sq_level": rng.choice(CONDITIONS, size=N_FRAMES),
+                         "sequenceID": "seq",
+                         "time_in_frames": np.arange(N_FRAMES)})
+
+
+def drawn_histograms(ax):
+    """
+    (values, edges) of every ax.stairs patch, in drawing order.
+    """
+    return [patch.get_data()[:2] for patch in ax.patches if isinstance(patch, StepPatch)]
+
+
+@pytest.mark.parametrize("source", ["dataframe", "store"])
+def test_pc_histogram_from_histograms(source):
+    scores_df = make_scores_df()
+    histograms = compute_score_histograms(scores_df, bins=20)
+    data = scores_df if source == "dataframe" else ScoresStore(scores_df)
+
+    ax = plot_pc_histogram(data, pc_number=2, histograms=histograms)
+    drawn = drawn_histograms(ax)
+    assert len(drawn) == len(CONDITIONS)
+    for (values, edges), condition in zip(drawn, CONDITIONS, strict=True):
+        expected, expected_edges = np.histogram(scores_df.loc[scores_df["sq_level"] == condition, "PC2"],
+                                                bins=histograms.edges[1], density=True)
+        np.testing.assert_allclose(values, expected)
+        np.testing.assert_array_equal(edges, expected_edges)
+
+
+def test_pc_histogram_missing_condition():
+    scores_df = make_scores_df()
+    histograms = compute_score_histograms(scores_df[scores_df["sq_level"] != "sq100"])
+    with pytest.raises(ValueError, match="'sq100'"):
+        plot_pc_histogram(scores_df, histograms=histograms)
+
+
+def test_leg_score_hist_from_histograms():
+    scores, _ = make_scores()
+    histograms = compute_score_histograms(scores, bins=30)
+
+    _, ax = plot_leg_score_hist(None, pc_number=1, histograms=histograms)
+    drawn = drawn_histograms(ax)
+    assert len(drawn) == N_LEGS
+    for leg, (values, edges) in enumerate(drawn):
+        expected, _ = np.histogram(scores[:, leg, 1], bins=edges, density=True)
+        np.testing.assert_allclose(values, expected)
+
+    front_legs = compute_score_histograms(scores[:, :4])
+    with pytest.raises(ValueError, match="Leg 5"):
+        plot_leg_score_hist(None, histograms=front_legs, leg_list=[5])
+
+
+@pytest.mark.parametrize("precomputed", [False, True])
+def test_leg_score_hist_panelled(precomputed):
+    scores, _ = make_scores()
+    histograms = compute_score_histograms(scores, bins=30) if precomputed else None
+
+    _, ax = plot_leg_score_hist_panelled(scores, pc_number=2, histograms=histograms)
+    for panel in ax:
+        drawn = drawn_histograms(panel)
+        # Every leg once per panel: 6 gray, then the highlighted pair
+        assert len(drawn) == N_LEGS
+        for values, edges in drawn:
+            assert np.isclose(np.sum(values * np.diff(edges)), 1)
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.decomposition import PCA
+
+from spiderpca import create_memmap, run_grouped_PCA
+from spiderpca.PCA_groups import LEG_PAIRINGS
+
+N_FRAMES = 240
+N_LEGS = 8
+N_KEYPOINTS = 4
+
+
+def make_inputs(seed=0):
+    rng = np.random.default_rng(seed)
+    scales = np.linspace(2, 0.1, N_KEYPOINTS * 3).reshape(N_KEYPOINTS, 3)
+    all_legs = rng.normal(size=(N_FRAMES, N_LEGS, N_KEYPOINTS, 3)) * scales
+    spider_data_df = pd.DataFrame({"sq_level": rng.choice(["sq040", "sq080", "sq100"], size=N_FRAMES),
+                                   "species": rng.choice(["A", "B"], size=N_FRAMES)})
+    return all_legs, spider_data_df
+
+
+def fit_group(all_legs, frames, legs, n_components=None):
+    """
+    A group's PCA fitted directly with sklearn, with the same row order.
+    """
+    pca_input = all_legs[frames][:, list(legs)].reshape(-1, N_KEYPOINTS * 3)
+    pca = PCA(n_components=n_components, svd_solver="full").fit(pca_input)
+    return pca, pca.transform(pca_input)
+
+
+def assert_matches_sklearn(grouped, all_legs, n_components=None):
+    for (legs, _), (model, scores, frames) in grouped.items():
+        pca, expected_scores = fit_group(all_legs, frames, legs, n_components)
+        assert model.preprocessing["legs"] == list(legs)
+        assert model.n_samples == len(frames) * len(legs)
+        np.testing.assert_allclose(model.components, pca.components_, atol=1e-8)
+        np.testing.assert_allclose(model.explained_variance, pca.explained_variance_, rtol=1e-8)
+        np.testing.assert_allclose(scores, expected_scores, atol=1e-8)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_grouped_matches_sklearn(executor):
+    all_legs, spider_data_df = make_inputs()
+    grouped = run_grouped_PCA(all_legs, spider_data_df, leg_groups="pairs", by="sq_level",
+                              n_components=5, executor=executor, n_jobs=2)
+
+    assert set(grouped) == {(tuple(legs), level) for legs in LEG_PAIRINGS
+                            for level in ["sq040", "sq080", "sq100"]}
+    for (_, level), (model, _, frames) in grouped.items():
+        np.testing.assert_array_equal(frames, np.flatnonzero(spider_data_df["sq_level"] == level))
+        assert model.preprocessing["group"] == level
+    assert_matches_sklearn(grouped, all_legs, n_components=5)
+
+
+def test_thread_and_process_agree():
+    all_legs, spider_data_df = make_inputs()
+    by = ["species", "sq_level"]
+    threaded = run_grouped_PCA(all_legs, spider_data_df, leg_groups="each", by=by, executor="thread")
+    processed = run_grouped_PCA(all_legs, spider_data_df, leg_groups="each", by=by, executor="process")
+
+    assert list(threaded) == list(processed)
+    for key, (model, scores, frames) in threaded.items():
+        other_model, other_scores, other_frames = processed[key]
+        np.testing.assert_array_equal(frames, other_frames)
+        np.testing.assert_allclose(model.components, other_model.components, atol=1e-12)
+        np.testing.assert_allclose(scores, other_scores, atol=1e-12)
+
+
+def test_process_memmap(tmp_path):
+    all_legs, _ = make_inputs()
+    mapped = create_memmap(tmp_path / "legs.mmap", all_legs.shape)
+    mapped[:] = all_legs
+
+    grouped = run_grouped_PCA(mapped, leg_groups=[[0, 1, 2]], executor="process", n_jobs=1)
+    assert list(grouped) == [((0, 1, 2), None)]
+    assert_matches_sklearn(grouped, all_legs)
+
+
+def test_invalid_arguments():
+    all_legs, spider_data_df = make_inputs()
+    with pytest.raises(ValueError, match="Invalid executor"):
+        run_grouped_PCA(all_legs, executor="fork")
+    with pytest.raises(ValueError, match="Invalid leg group"):
+        run_grouped_PCA(all_legs, leg_groups=[[0, N_LEGS]])
+    with pytest.raises(ValueError, match="pairs"):
+        run_grouped_PCA(all_legs[:, :4], leg_groups="pairs")
+    with pytest.raises(ValueError, match="spider_data_df is needed"):
+        run_grouped_PCA(all_legs, by="sq_level")
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from spiderpca import ScoreHistograms, compute_score_histograms
+
+N_FRAMES = 400
+N_LEGS = 4
+N_COMPONENTS = 3
+CONDITIONS = ["sq040", "sq060", "sq080"]
+
+
+def make_scores(seed=0):
+    rng = np.random.default_rng(seed)
+    # Scores on a 0.25 grid land exactly on bin edges
+    scores = rng.integers(-12, 13, size=(N_FRAMES, N_LEGS, N_COMPONENTS)) * 0.25
+    scores[5, 1, 0] = np.nan
+    conditions = rng.choice(CONDITIONS, size=N_FRAMES)
+    return scores, conditions
+
+
+@pytest.mark.parametrize("score_range", [None, (-2.0, 2.0)])
+@pytest.mark.parametrize("bins", [8, 48])
+def test_matches_np_histogram(score_range, bins):
+    scores, conditions = make_scores()
+    histograms = compute_score_histograms(scores, conditions, bins=bins, score_range=score_range,
+                                          chunk_size=70)
+
+    for pc in range(N_COMPONENTS):
+        edges = histograms.edges[pc]
+        if score_range is not None:
+            np.testing.assert_allclose(edges, np.linspace(-2, 2, bins + 1))
+        for leg in range(N_LEGS):
+            for condition in CONDITIONS:
+                values = scores[conditions == condition, leg, pc]
+                expected, _ = np.histogram(values[np.isfinite(values)], bins=edges)
+                counts, _ = histograms.get(pc, leg=leg, condition=condition)
+                np.testing.assert_array_equal(counts, expected)
+
+        values = scores[..., pc].ravel()
+        expected, _ = np.histogram(values[np.isfinite(values)], bins=edges)
+        np.testing.assert_array_equal(histograms.get(pc)[0], expected)
+
+
+def test_density_matches_np_histogram():
+    scores, conditions = make_scores()
+    histograms = compute_score_histograms(scores, conditions, bins=20)
+    values = scores[conditions == "sq060", 2, 1]
+
+    density, edges = histograms.get(1, leg=2, condition="sq060", density=True)
+    np.testing.assert_allclose(density, np.histogram(values, bins=edges, density=True)[0])
+
+
+def test_dataframe_input():
+    scores, conditions = make_scores()
+    scores_df = pd.DataFrame(scores.reshape(-1, N_COMPONENTS), columns=["PC1", "PC2", "PC3"])
+    scores_df["leg_number"] = np.tile(np.arange(1, N_LEGS + 1), N_FRAMES)
+    scores_df["sq_level"] = np.repeat(conditions, N_LEGS)
+
+    from_frame = compute_score_histograms(scores_df, bins=10, components=[0, 2])
+    from_array = compute_score_histograms(scores, conditions, bins=10, components=[0, 2])
+    assert from_frame.legs == [1, 2, 3, 4]
+    assert from_frame.conditions == CONDITIONS
+    np.testing.assert_array_equal(from_frame.counts, from_array.counts)
+    np.testing.assert_array_equal(from_frame.edges, from_array.edges)
+
+
+def test_save_load(tmp_path):
+    scores, conditions = make_scores()
+    histograms = compute_score_histograms(scores, conditions, bins=10)
+    histograms.save(tmp_path / "histograms.npz")
+
+    loaded = ScoreHistograms.load(tmp_path / "histograms.npz")
+    np.testing.assert_array_equal(loaded.counts, histograms.counts)
+    np.testing.assert_array_equal(loaded.edges, histograms.edges)
+    assert loaded.conditions == histograms.conditions
+    np.testing.assert_array_equal(loaded.get(2, leg=3, condition="sq080")[0],
+                                  histograms.get(2, leg=3, condition="sq080")[0])
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from spiderpca import PCAModel, create_memmap, run_PCA, run_PCA_incremental
+
+N_FRAMES = 400
+N_MARKERS = 5
+
+
+def make_markers(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(N_FRAMES, N_MARKERS, 3)) * np.linspace(2, 0.1, N_MARKERS * 3).reshape(N_MARKERS, 3)
+
+
+def test_matches_run_PCA():
+    markers = make_markers()
+    _, scores, pca = run_PCA(markers, n_components=6)
+    model = PCAModel.from_pca(pca)
+
+    assert model.n_components == 6
+    assert model.n_markers == N_MARKERS
+    assert model.n_samples == N_FRAMES
+    np.testing.assert_allclose(model.transform(markers, chunk_size=70), scores, atol=1e-10)
+    np.testing.assert_allclose(model.inverse_transform(scores).reshape(N_FRAMES, -1),
+                               pca.inverse_transform(scores), atol=1e-10)
+    np.testing.assert_allclose(model.inverse_transform(scores, components_list=[0, 2]).reshape(N_FRAMES, -1),
+                               scores[:, [0, 2]] @ pca.components_[[0, 2]] + pca.mean_, atol=1e-10)
+
+
+def test_incremental_sample_count():
+    _, _, pca = run_PCA_incremental(make_markers(), chunk_size=100)
+    assert PCAModel.from_pca(pca).n_samples == N_FRAMES
+
+
+def test_save_load_round_trip(tmp_path):
+    markers = make_markers()
+    _, _, pca = run_PCA(markers)
+    names = [f"marker{ii}" for ii in range(N_MARKERS)]
+    preprocessing = {"coxa_origin": True, "reflect": False, "legs": [0, 1]}
+    model = PCAModel.from_pca(pca, marker_names=names, preprocessing=preprocessing)
+
+    model.save(tmp_path / "model.npz")
+    loaded = PCAModel.load(tmp_path / "model.npz")
+
+    for attribute in ["components", "mean", "explained_variance", "explained_variance_ratio"]:
+        np.testing.assert_array_equal(getattr(loaded, attribute), getattr(model, attribute))
+    assert loaded.marker_names == names
+    assert loaded.preprocessing == preprocessing
+    assert loaded.n_samples == N_FRAMES
+    np.testing.assert_array_equal(loaded.transform(markers), model.transform(markers))
+
+
+def test_transform_memmap(tmp_path):
+    markers = make_markers()
+    _, scores, pca = run_PCA(markers)
+    mapped = create_memmap(tmp_path / "markers.mmap", markers.shape)
+    mapped[:] = markers
+
+    mapped_scores = PCAModel.from_pca(pca).transform(mapped, chunk_size=70)
+    assert isinstance(mapped_scores, np.memmap)
+    np.testing.assert_allclose(mapped_scores, scores, atol=1e-10)
+
+
+def test_rejects_mismatched_markers():
+    _, _, pca = run_PCA(make_markers())
+    with pytest.raises(ValueError, match="the model expects"):
+        PCAModel.from_pca(pca).transform(np.zeros((3, N_MARKERS + 1, 3)))
+
+
+def test_rejects_newer_format(tmp_path):
+    _, _, pca = run_PCA(make_markers())
+    PCAModel.from_pca(pca).save(tmp_path / "model.npz")
+    with np.load(tmp_path / "model.npz") as data:
+        arrays = dict(data)
+    arrays["metadata"] = np.array('{"version": 99, "marker_names": null, "preprocessing": {}}')
+    np.savez(tmp_path / "newer.npz", **arrays)
+
+    with pytest.raises(ValueError, match="newer version"):
+        PCAModel.load(tmp_path / "newer.npz")
+
+
+def test_float32_far_from_origin():
+    # Raw millimetre coordinates: small movements on a large offset
+    markers = (make_markers() + 2e4).astype(np.float32)
+    _, scores, pca = run_PCA(markers, n_components=6)
+    model = PCAModel.from_pca(pca)
+
+    transformed = model.transform(markers, chunk_size=70)
+
+    centred = markers.reshape(N_FRAMES, -1).astype(np.float64) - model.mean
+    np.testing.assert_allclose(transformed, centred @ model.components.T, rtol=0, atol=1e-12)
+    # sklearn scores float32 input in float32
+    np.testing.assert_allclose(transformed, scores, rtol=0, atol=0.05)
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from spiderpca import (
+    PCAModel,
+    get_all_legs_markers,
+    load_and_process_spider_data,
+    make_coxa_origin,
+    project_recordings,
+    read_columnar,
+    reflect_legs,
+    run_PCA,
+    undo_body_rotation,
+)
+
+N_ROWS = 150
+N_LEGS = 8
+KEYPOINTS = ["claw", "tibiametatarsus", "patella", "coxa"]
+
+
+def write_recording(path, seed=0):
+    """
+    Eight legs of four keypoints, a center marker, body angle and metadata, with a NaN marker row.
+    """
+    rng = np.random.default_rng(seed)
+    data = {f"{keypoint}{leg}_{axis}": rng.normal(size=N_ROWS) * 10 + 5 * leg
+            for leg in range(1, N_LEGS + 1) for keypoint in KEYPOINTS for axis in "xyz"}
+    data.update({f"center_{axis}": rng.normal(size=N_ROWS) for axis in "xyz"})
+    data["whole_body_angle"] = rng.uniform(-180, 180, size=N_ROWS)
+    data["sq_level"] = rng.choice(["sq040", "sq100"], size=N_ROWS)
+    data["filename"] = np.where(np.arange(N_ROWS) < 80, "seq_a", "seq_b")
+    data["time_in_frames"] = np.arange(N_ROWS)
+
+    df = pd.DataFrame(data)
+    df.loc[[12, 97], "patella3_y"] = np.nan
+    df.to_csv(path, index=False)
+    return path
+
+
+def in_memory_pca_input(path):
+    """
+    The fit-time pipeline: load, undo the rotation, extract the legs, coxa origin, reflect.
+    """
+    markers, marker_columns, spider_df = load_and_process_spider_data(path)
+    markers = undo_body_rotation(markers, spider_df["whole_body_angle"].to_numpy(), which_axis="z")
+    marker_names = [column[:-2] for column in marker_columns[::3]]
+    all_legs = get_all_legs_markers(marker_names, markers, N_LEGS)[0]
+    all_legs = reflect_legs(make_coxa_origin(all_legs)[0])
+    # Rows are (frame, leg), as stored by project_recordings
+    return all_legs.reshape(-1, len(KEYPOINTS), 3), spider_df
+
+
+@pytest.mark.parametrize("chunksize", [23, 1000])
+def test_matches_model_transform(tmp_path, chunksize):
+    source = write_recording(tmp_path / "recording.csv")
+    pca_input, spider_df = in_memory_pca_input(source)
+    _, _, pca = run_PCA(pca_input, n_components=5)
+    model = PCAModel.from_pca(pca, preprocessing={"undo_rotation": True, "legs": True})
+
+    stats = project_recordings(source, model, tmp_path / "scores", chunksize=chunksize,
+                               dtype=np.float64)
+
+    n_frames = len(spider_df)
+    assert stats["frames"] == n_frames
+    assert stats["rows"] == n_frames * N_LEGS
+
+    scores = read_columnar(tmp_path / "scores")
+    expected = model.transform(pca_input)
+    np.testing.assert_allclose(scores[[f"PC{i + 1}" for i in range(5)]].to_numpy(), expected,
+                               atol=1e-10)
+    np.testing.assert_array_equal(scores["leg_number"], np.tile(np.arange(1, N_LEGS + 1), n_frames))
+    np.testing.assert_array_equal(scores["time_in_frames"],
+                                  np.repeat(spider_df["time_in_frames"].to_numpy(), N_LEGS))
+    assert list(scores["sequenceID"]) == list(np.repeat(spider_df["filename"].to_numpy(), N_LEGS))
+    assert list(scores["sq_level"]) == list(np.repeat(spider_df["sq_level"].to_numpy(), N_LEGS))
+
+
+def test_needs_required_preprocessing(tmp_path):
+    source = write_recording(tmp_path / "recording.csv")
+    pca_input, _ = in_memory_pca_input(source)
+    _, _, pca = run_PCA(pca_input, n_components=2)
+
+    with pytest.raises(ValueError, match="undo_rotation, legs"):
+        project_recordings(source, PCAModel.from_pca(pca), tmp_path / "scores")
+
+
+def test_parses_needed_columns_and_keeps_missing_metadata(tmp_path, monkeypatch):
+    source = write_recording(tmp_path / "recording.csv")
+    pca_input, spider_df = in_memory_pca_input(source)
+    _, _, pca = run_PCA(pca_input, n_components=3)
+    model = PCAModel.from_pca(pca, preprocessing={"undo_rotation": True, "legs": True})
+
+    # copy() consolidates the frame, so adding a column does not warn about fragmentation
+    df = pd.read_csv(source).copy().assign(unused="x")
+    df["sq_level"] = df["sq_level"].where(df.index != 30)
+    df.to_csv(source, index=False)
+
+    parsed = []
+    read_csv = pd.read_csv
+
+    def recording_read_csv(*args, **kwargs):
+        if "chunksize" in kwargs:
+            parsed.append({col for col in df.columns if kwargs["usecols"](col)})
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", recording_read_csv)
+    project_recordings(source, model, tmp_path / "scores", chunksize=40)
+
+    marker_columns = {col for col in df.columns if col.endswith(("_x", "_y", "_z"))
+                      and not col.startswith("center")}
+    assert parsed == [marker_columns | {"whole_body_angle", "sq_level", "filename", "time_in_frames"}]
+
+    scores = read_columnar(tmp_path / "scores")
+    # Only the NaN marker rows are skipped; the frame without sq_level is kept
+    assert len(scores) == len(spider_df) * N_LEGS
+    missing = scores["sq_level"].isna().to_numpy()
+    assert missing.sum() == N_LEGS
+    np.testing.assert_array_equal(scores["time_in_frames"][missing], 30)
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from spiderpca import reconstruct, reconstruct_subsets
+
+N_FRAMES = 50
+N_MARKERS = 6
+N_COMPONENTS = 5
+
+
+def make_inputs(dtype=np.float64, seed=0):
+    rng = np.random.default_rng(seed)
+    scores = rng.normal(size=(N_FRAMES, N_COMPONENTS)).astype(dtype)
+    components = rng.normal(size=(N_COMPONENTS, N_MARKERS * 3)).astype(dtype)
+    mu = rng.normal(size=(1, N_MARKERS, 3)).astype(dtype)
+    return scores, components, mu
+
+
+SUBSETS = [[0], [0, 1], [0, 1, 2], [2, 3], [4], [1, 3, 4], [], [0, 1, 2, 3, 4]]
+
+
+def test_stacked_matches_reconstruct():
+    scores, components, mu = make_inputs()
+    result = reconstruct_subsets(scores, components, mu, subsets=SUBSETS)
+    assert result.shape == (len(SUBSETS), N_FRAMES, N_MARKERS, 3)
+    for subset, frames in zip(SUBSETS, result, strict=True):
+        np.testing.assert_allclose(frames, reconstruct(scores, components, mu, subset), atol=1e-12)
+
+
+def test_lazy_matches_reconstruct():
+    scores, components, mu = make_inputs()
+    result = list(reconstruct_subsets(scores, components, mu, subsets=SUBSETS, lazy=True))
+    assert len(result) == len(SUBSETS)
+    for subset, frames in zip(SUBSETS, result, strict=True):
+        np.testing.assert_allclose(frames, reconstruct(scores, components, mu, subset), atol=1e-12)
+
+
+@pytest.mark.parametrize("cumulative_k", [None, 3, [2, 4, 1]])
+def test_cumulative_k(cumulative_k):
+    scores, components, mu = make_inputs()
+    result = reconstruct_subsets(scores, components, mu, cumulative_k=cumulative_k)
+
+    if cumulative_k is None:
+        ks = range(1, N_COMPONENTS + 1)
+    elif np.isscalar(cumulative_k):
+        ks = range(1, cumulative_k + 1)
+    else:
+        ks = cumulative_k
+    assert result.shape[0] == len(ks)
+    for k, frames in zip(ks, result, strict=True):
+        np.testing.assert_allclose(frames, reconstruct(scores, components, mu, list(range(k))), atol=1e-12)
+
+
+def test_float32():
+    scores, components, mu = make_inputs(np.float32)
+    result = reconstruct_subsets(scores, components, mu, subsets=SUBSETS)
+    assert result.dtype == np.float32
+    for subset, frames in zip(SUBSETS, result, strict=True):
+        np.testing.assert_allclose(frames, reconstruct(scores, components, mu, subset), atol=1e-4)
+
+    lazy = reconstruct_subsets(scores, components, mu, cumulative_k=3, lazy=True)
+    for k, frames in zip(range(1, 4), lazy, strict=True):
+        np.testing.assert_allclose(frames, reconstruct(scores, components, mu, list(range(k))), atol=1e-4)
+
+
+def test_duplicate_indices():
+    scores, components, mu = make_inputs()
+    subsets = [[0, 0], [0], [0, 0, 1], [1, 1, 1], [0, 1]]
+    result = reconstruct_subsets(scores, components, mu, subsets=subsets)
+    for subset, frames in zip(subsets, result, strict=True):
+        np.testing.assert_allclose(frames, reconstruct(scores, components, mu, subset), atol=1e-12)
+
+
+def test_invalid_inputs():
+    scores, components, mu = make_inputs()
+    with pytest.raises(ValueError, match="Invalid components"):
+        reconstruct_subsets(scores, components, mu, subsets=[[0, N_COMPONENTS]])
+    with pytest.raises(ValueError, match="not both"):
+        reconstruct_subsets(scores, components, mu, subsets=[[0]], cumulative_k=2)
+
+
+def test_long_float32_sweep_does_not_drift():
+    # A sliding window of thousands of add-one, remove-one steps
+    rng = np.random.default_rng(1)
+    n_components, window = 3000, 20
+    scores = (rng.normal(size=(20, n_components)) * 10).astype(np.float32)
+    components = rng.normal(size=(n_components, N_MARKERS * 3)).astype(np.float32)
+    mu = np.zeros((1, N_MARKERS, 3), dtype=np.float32)
+    subsets = [list(range(start, start + window)) for start in range(n_components - window)]
+
+    sweep = reconstruct_subsets(scores, components, mu, subsets=subsets, lazy=True)
+    for subset, frames in zip(subsets, sweep, strict=True):
+        exact = scores[:, subset].astype(np.float64) @ components[subset].astype(np.float64)
+        direct = reconstruct(scores, components, mu, subset).reshape(20, -1)
+        error = np.abs(frames.reshape(20, -1) - exact).max()
+        assert error <= 8 * max(np.abs(direct - exact).max(), np.finfo(np.float32).eps * 100)
+
+
+def test_reconstruct_invalid_inputs():
+    scores, components, mu = make_inputs()
+    with pytest.raises(ValueError, match="one column per principal component"):
+        reconstruct(scores[:, :-1], components, mu)
+    with pytest.raises(ValueError, match="must not exceed"):
+        reconstruct(scores, components, mu, components_list=[0] * (N_COMPONENTS + 1))
+    with pytest.raises(ValueError, match="3d array"):
+        reconstruct(scores, components, mu[0])
+    with pytest.raises(ValueError, match="one column per coordinate"):
+        reconstruct(scores, components, mu[:, :-1])
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from spiderpca import (
+    ScoresStore,
+    create_leg_scores_dataframe,
+    create_scores_dataframe,
+    get_score_range,
+    triangle_wave,
+)
+
+N_FRAMES = 20
+N_LEGS = 8
+N_PCS = 5
+
+
+def make_inputs(seed=0):
+    rng = np.random.default_rng(seed)
+    scores = rng.normal(size=(N_FRAMES, N_LEGS, N_PCS))
+    spider_data_df = pd.DataFrame({"sq_level": rng.choice(["sq040", "sq080"], size=N_FRAMES),
+                                   "filename": rng.choice(["a.csv", "b.csv", "c.csv"], size=N_FRAMES),
+                                   "time_in_frames": np.arange(N_FRAMES)})
+    return scores, spider_data_df
+
+
+def per_leg_scores_dataframe(scores, spider_data_df):
+    """
+    The per-leg create_scores_dataframe + concat route, in (frame, leg) row order.
+    """
+    per_leg = [create_scores_dataframe(scores[:, leg], spider_data_df, leg_number=leg + 1)
+               for leg in range(scores.shape[1])]
+    scores_df = pd.concat(per_leg, keys=range(scores.shape[1]), names=["leg", "frame"])
+    return scores_df.swaplevel().sort_index().reset_index(drop=True)
+
+
+def assert_same_values(result, expected):
+    assert list(result.columns) == list(expected.columns)
+    for column in expected.columns:
+        np.testing.assert_array_equal(np.asarray(result[column]), expected[column].to_numpy())
+
+
+def test_wide_matches_per_leg_frames():
+    scores, spider_data_df = make_inputs()
+    expected = per_leg_scores_dataframe(scores, spider_data_df)
+
+    result = create_leg_scores_dataframe(scores, spider_data_df)
+    assert_same_values(result, expected)
+    for column in ["sq_level", "sequenceID", "leg_number"]:
+        assert isinstance(result[column].dtype, pd.CategoricalDtype)
+
+    flat = create_leg_scores_dataframe(scores.reshape(-1, N_PCS), spider_data_df)
+    assert_same_values(flat, expected)
+
+
+def test_blocked_row_order():
+    scores, spider_data_df = make_inputs()
+    expected = per_leg_scores_dataframe(scores, spider_data_df)
+
+    # Rows as from combine_legs: legs 1-4 for every frame, then legs 5-8
+    blocked = np.concatenate([scores[:, :4], scores[:, 4:]], axis=0).reshape(-1, N_PCS)
+    result = create_leg_scores_dataframe(blocked, spider_data_df, row_order="blocked")
+    assert_same_values(result.sort_values(["time_in_frames", "leg_number"], ignore_index=True), expected)
+
+
+def test_components_and_dtype():
+    scores, spider_data_df = make_inputs()
+    expected = per_leg_scores_dataframe(scores[..., :3], spider_data_df)
+    expected = expected.astype({"PC1": np.float32, "PC2": np.float32, "PC3": np.float32})
+
+    result = create_leg_scores_dataframe(scores, spider_data_df, n_components=3, dtype=np.float32)
+    assert result["PC1"].dtype == np.float32
+    assert_same_values(result, expected)
+
+
+def test_long_matches_melted_wide():
+    scores, spider_data_df = make_inputs()
+    wide = per_leg_scores_dataframe(scores, spider_data_df)
+    id_columns = ["sq_level", "sequenceID", "time_in_frames", "leg_number"]
+    expected = (wide.reset_index()
+                    .melt(id_vars=["index", *id_columns], var_name="PC", value_name="score")
+                    .sort_values(["index", "PC"], kind="stable", ignore_index=True)
+                    .drop(columns="index"))
+
+    result = create_leg_scores_dataframe(scores, spider_data_df, layout="long")
+    assert_same_values(result, expected)
+
+
+def test_invalid_arguments():
+    scores, spider_data_df = make_inputs()
+    with pytest.raises(ValueError, match="Invalid layout"):
+        create_leg_scores_dataframe(scores, spider_data_df, layout="tall")
+    with pytest.raises(ValueError, match="expected n_frames"):
+        create_leg_scores_dataframe(scores[:-1].reshape(-1, N_PCS), spider_data_df)
+    with pytest.raises(ValueError, match="frame order"):
+        create_leg_scores_dataframe(scores, spider_data_df, row_order="blocked")
+
+
+# ------------------------- ScoresStore -----------------------------
+
+def make_scores_df(seed=0, n_rows=300):
+    rng = np.random.default_rng(seed)
+    scores_df = pd.DataFrame({"PC1": rng.normal(size=n_rows),
+                              "sq_level": rng.choice(["a", "b", "c"], size=n_rows).astype(object),
+                              "sequenceID": rng.choice(["s1", "s2", "s3", "s4"], size=n_rows),
+                              "time_in_frames": rng.permutation(n_rows),
+                              "leg_number": rng.integers(1, N_LEGS + 1, size=n_rows)})
+    scores_df.loc[[3, 50, 51], "sq_level"] = np.nan
+    scores_df.loc[[7, 90], "sequenceID"] = np.nan
+    return scores_df
+
+
+def masked(scores_df, sq_level=None, sequence_id=None, leg_number=None):
+    """
+    The boolean-mask lookup, in the store's row order.
+    """
+    mask = np.ones(len(scores_df), dtype=bool)
+    for column, value in [("sq_level", sq_level), ("sequenceID", sequence_id), ("leg_number", leg_number)]:
+        if value is not None:
+            mask &= (scores_df[column] == value).to_numpy()
+    return scores_df[mask]
+
+
+def assert_same_rows(result, expected):
+    key = ["time_in_frames"]
+    pd.testing.assert_frame_equal(result.sort_values(key, ignore_index=True),
+                                  expected.sort_values(key, ignore_index=True))
+
+
+@pytest.mark.parametrize("query", [
+    {},
+    {"sq_level": "a"},
+    {"sq_level": "c"},
+    {"sequence_id": "s2"},
+    {"sequence_id": "s4"},
+    {"leg_number": 3},
+    {"sq_level": "b", "sequence_id": "s1"},
+    {"sq_level": "b", "leg_number": 8},
+    {"sq_level": "a", "sequence_id": "s4", "leg_number": 2},
+    {"sq_level": "missing"},
+])
+def test_select_matches_masking(query):
+    scores_df = make_scores_df()
+    store = ScoresStore(scores_df)
+    assert_same_rows(store.select(**query), masked(scores_df, **query))
+
+
+def test_select_categorical_columns():
+    scores_df = make_scores_df()
+    categorical = scores_df.astype({"sq_level": "category", "sequenceID": "category", "leg_number": "category"})
+    store = ScoresStore(categorical)
+    for query in [{"sq_level": "b"}, {"sequence_id": "s3", "leg_number": 5}]:
+        assert_same_rows(store.select(**query), masked(categorical, **query))
+
+
+def test_select_is_sorted_by_time():
+    store = ScoresStore(make_scores_df())
+    result = store.select(sq_level="a", sequence_id="s1", leg_number=4)
+    assert result["time_in_frames"].is_monotonic_increasing
+    assert len(store) == 300
+    assert store.conditions[:3] == ["a", "b", "c"]
+
+
+def test_select_without_legs():
+    scores_df = make_scores_df().drop(columns="leg_number")
+    store = ScoresStore(scores_df)
+    assert store.leg_numbers is None
+    assert_same_rows(store.select(sq_level="b"), masked(scores_df, sq_level="b"))
+    with pytest.raises(ValueError, match="no leg_number"):
+        store.select(leg_number=1)
+
+
+@pytest.mark.parametrize(("num_frames", "expected"), [
+    (4, [0, 0.5, 1, 0.5]),
+    (5, [0, 0.5, 1, 0.5]),
+    (6, [0, 1 / 3, 2 / 3, 1, 2 / 3, 1 / 3]),
+])
+def test_triangle_wave(num_frames, expected):
+    np.testing.assert_allclose(triangle_wave(num_frames), expected)
+
+
+def test_score_range_follows_triangle_wave():
+    scores = np.random.default_rng(0).normal(size=(100, 3))
+    low = scores.mean(axis=0) - 2 * scores.std(axis=0)
+    high = scores.mean(axis=0) + 2 * scores.std(axis=0)
+    np.testing.assert_allclose(get_score_range(scores, num_frames=8),
+                               low + (high - low) * triangle_wave(8)[:, np.newaxis])
@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from spiderpca import clear_cache, evict_cache, load_and_process_spider_data_cached
+
+
+def write_csv(path, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {f"{marker}_{axis}": rng.normal(size=n_rows)
+            for marker in ["claw1", "coxa1"] for axis in "xyz"}
+    data["species"] = "A"
+    pd.DataFrame(data).to_csv(path, index=False)
+    return path
+
+
+def make_entries(tmp_path, cache_dir, n_entries):
+    """
+    One cache entry per source file, entry ii last used at time ii.
+    """
+    keys = []
+    for ii in range(n_entries):
+        source = write_csv(tmp_path / f"source{ii}.csv", 50, seed=ii)
+        load_and_process_spider_data_cached(source, cache_dir=cache_dir)
+        new_keys = set(entry_keys(cache_dir)) - set(keys)
+        keys.extend(new_keys)
+        os.utime(cache_dir / keys[-1], (ii, ii))
+    return keys
+
+
+def entry_keys(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir)
+                  if (cache_dir / name / "info.json").exists())
+
+
+def dir_size(path):
+    return sum(os.path.getsize(path / name) for name in os.listdir(path))
+
+
+def test_cached_load_matches_uncached(tmp_path):
+    source = write_csv(tmp_path / "source.csv", 50)
+    first = load_and_process_spider_data_cached(source, cache_dir=tmp_path / "cache")
+    second = load_and_process_spider_data_cached(source, cache_dir=tmp_path / "cache")
+
+    np.testing.assert_array_equal(first[0], second[0])
+    assert first[1] == second[1]
+    pd.testing.assert_frame_equal(first[2], second[2])
+
+
+def test_evicts_least_recently_used_first(tmp_path):
+    cache_dir = tmp_path / "cache"
+    keys = make_entries(tmp_path, cache_dir, 4)
+    entry_size = dir_size(cache_dir / keys[0])
+
+    # Use the oldest entry again, so the second oldest goes first
+    os.utime(cache_dir / keys[0], (10, 10))
+    evicted = evict_cache(cache_dir, max_cache_bytes=2 * entry_size)
+
+    assert evicted == [keys[1], keys[2]]
+    assert entry_keys(cache_dir) == sorted([keys[0], keys[3]])
+
+
+def test_eviction_keeps_cache_under_limit(tmp_path):
+    cache_dir = tmp_path / "cache"
+    keys = make_entries(tmp_path, cache_dir, 5)
+    max_cache_bytes = 3 * dir_size(cache_dir / keys[0]) - 1
+
+    evict_cache(cache_dir, max_cache_bytes=max_cache_bytes, keep_keys=[keys[0]])
+
+    remaining = entry_keys(cache_dir)
+    assert keys[0] in remaining
+    assert sum(dir_size(cache_dir / key) for key in remaining) <= max_cache_bytes
+
+
+@pytest.mark.parametrize("remove", ["evict", "clear"])
+def test_leaves_foreign_directories_alone(tmp_path, remove):
+    cache_dir = tmp_path / "cache"
+    make_entries(tmp_path, cache_dir, 2)
+
+    foreign = cache_dir / "photos"
+    foreign.mkdir()
+    (foreign / "keep.txt").write_text("keep me")
+    # Named like a cache key, but not a cache entry
+    lookalike = cache_dir / ("0" * 32)
+    lookalike.mkdir()
+    (lookalike / "keep.txt").write_text("keep me")
+
+    if remove == "evict":
+        evict_cache(cache_dir, max_cache_bytes=0)
+    else:
+        clear_cache(cache_dir)
+
+    assert entry_keys(cache_dir) == []
+    assert (foreign / "keep.txt").read_text() == "keep me"
+    assert (lookalike / "keep.txt").read_text() == "keep me"
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from spiderpca import ColumnarWriter, read_columnar
+
+
+def make_columns(n_rows, offset=0):
+    return {"PC1": np.arange(offset, offset + n_rows, dtype=np.float32),
+            "sequenceID": np.array([f"seq{ii % 3}" for ii in range(n_rows)]),
+            "leg_number": np.arange(n_rows, dtype=np.int8) % 8}
+
+
+def test_round_trip(tmp_path):
+    writer = ColumnarWriter(tmp_path / "store")
+    writer.append(make_columns(10))
+    ColumnarWriter(tmp_path / "store").append(make_columns(5, offset=10))
+
+    data = read_columnar(tmp_path / "store")
+    assert len(data) == 15
+    np.testing.assert_array_equal(data["PC1"], np.arange(15, dtype=np.float32))
+    assert list(data["sequenceID"][:4]) == ["seq0", "seq1", "seq2", "seq0"]
+
+
+def test_uncommitted_rows_are_dropped(tmp_path):
+    writer = ColumnarWriter(tmp_path)
+    writer.append(make_columns(10))
+    # Bytes written without a schema update, as after an interrupted append
+    with open(tmp_path / "PC1.bin", "ab") as f:
+        f.write(np.zeros(3, dtype=np.float32).tobytes())
+
+    ColumnarWriter(tmp_path).append(make_columns(2, offset=10))
+    np.testing.assert_array_equal(read_columnar(tmp_path)["PC1"], np.arange(12, dtype=np.float32))
+
+
+@pytest.mark.parametrize("append", [True, False])
+def test_refuses_directory_that_is_not_a_store(tmp_path, append):
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"keep me")
+    with pytest.raises(ValueError, match="not a column store"):
+        ColumnarWriter(tmp_path, append=append)
+    assert other.read_bytes() == b"keep me"
+
+
+def test_replace_only_removes_store_files(tmp_path):
+    ColumnarWriter(tmp_path).append(make_columns(10))
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"keep me")
+
+    ColumnarWriter(tmp_path, append=False).append({"PC1": np.ones(4)})
+    assert other.read_bytes() == b"keep me"
+    assert not (tmp_path / "leg_number.bin").exists()
+    assert list(read_columnar(tmp_path).columns) == ["PC1"]
+
+
+def test_missing_text_values_stay_missing(tmp_path):
+    writer = ColumnarWriter(tmp_path)
+    writer.append({"sequenceID": np.array(["seq0", None, "seq1", np.nan], dtype=object),
+                   "sq_level": pd.Categorical(["sq040", np.nan, "sq100", "sq040"])})
+    writer.append({"sequenceID": np.array([np.nan, "seq2"], dtype=object),
+                   "sq_level": pd.Categorical([np.nan, "sq060"])})
+
+    data = read_columnar(tmp_path)
+    assert list(data["sequenceID"].isna()) == [False, True, False, True, True, False]
+    assert list(data["sq_level"].isna()) == [False, True, False, False, True, False]
+    assert list(data["sequenceID"].cat.categories) == ["seq0", "seq1", "seq2"]
+    assert "nan" not in list(data["sq_level"].cat.categories)
+    assert list(data["sq_level"].dropna()) == ["sq040", "sq100", "sq040", "sq060"]
@@ -0,0 +1,297 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from spiderpca import (combine_legs, denormalise_legs, get_all_legs_markers, get_leg_marker_schema,
+                       get_leg_scatter_plan, make_coxa_origin, normalise_legs, put_legs_back,
+                       reflect_legs, restore_leg_positions)
+
+N_FRAMES = 30
+N_LEGS = 8
+N_KEYPOINTS = 4
+KEYPOINTS = ["claw", "tibiametatarsus", "patella", "coxa"]
+BODY_MARKERS = ["center", "clypeus", "pedicel", "spinneret"]
+
+
+def make_marker_names(seed=0):
+    """
+    Leg and body marker names, shuffled so that the scatter is not in leg order.
+    """
+    names = [f"{keypoint}{leg}" for leg in range(1, N_LEGS + 1) for keypoint in KEYPOINTS] + BODY_MARKERS
+    return [names[ii] for ii in np.random.default_rng(seed).permutation(len(names))]
+
+
+def make_legs(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(N_FRAMES, N_LEGS, N_KEYPOINTS, 3))
+
+
+def interleave(combined, n_groups):
+    """
+    Rows of a blocked (group, frame) array reordered to (frame, group).
+    """
+    return combined.reshape(n_groups, N_FRAMES, *combined.shape[1:]).swapaxes(0, 1).reshape(combined.shape)
+
+
+# ------------------------- get_all_legs_markers -----------------------------
+
+def substring_get_all_legs_markers(marker_names, markers, num_legs):
+    """
+    The original substring-matching implementation of get_all_legs_markers.
+    """
+    all_legs, all_legs_names = [], []
+    for leg_id in range(1, num_legs + 1):
+        names = [name for name in marker_names if str(leg_id) in name]
+        all_legs.append(markers[:, [marker_names.index(name) for name in names], :])
+        all_legs_names.append(names)
+    return np.stack(all_legs, axis=1), all_legs_names
+
+
+def keypoint_major_names():
+    """
+    Marker names ordered keypoint by keypoint, then the body markers.
+    """
+    return [f"{keypoint}{leg}" for keypoint in KEYPOINTS for leg in range(1, N_LEGS + 1)] + BODY_MARKERS
+
+
+@pytest.mark.parametrize("names", ["leg_major", "keypoint_major"])
+def test_get_all_legs_markers_matches_substring(names):
+    if names == "leg_major":
+        marker_names = [f"{keypoint}{leg}" for leg in range(1, N_LEGS + 1) for keypoint in KEYPOINTS] + BODY_MARKERS
+    else:
+        marker_names = keypoint_major_names()
+    markers = np.random.default_rng(4).normal(size=(N_FRAMES, len(marker_names), 3))
+
+    expected, expected_names = substring_get_all_legs_markers(marker_names, markers, N_LEGS)
+    all_legs, all_legs_names, returned = get_all_legs_markers(marker_names, markers, N_LEGS)
+    np.testing.assert_array_equal(all_legs, expected)
+    assert all_legs_names == expected_names
+    assert returned is markers
+    assert not np.shares_memory(all_legs, markers)
+
+
+def test_get_all_legs_markers_view_and_out():
+    marker_names = keypoint_major_names()
+    markers = np.random.default_rng(4).normal(size=(N_FRAMES, len(marker_names), 3))
+    expected, _ = substring_get_all_legs_markers(marker_names, markers, N_LEGS)
+
+    view, _, _ = get_all_legs_markers(marker_names, markers, N_LEGS, allow_view=True)
+    assert np.shares_memory(view, markers)
+    np.testing.assert_array_equal(view, expected)
+
+    out = np.empty_like(expected)
+    result, _, _ = get_all_legs_markers(marker_names, markers, N_LEGS, out=out)
+    assert result is out
+    np.testing.assert_array_equal(out, expected)
+
+    # Shuffled columns cannot be viewed, so they are gathered instead
+    shuffled = make_marker_names()
+    gathered, _, _ = get_all_legs_markers(shuffled, markers, N_LEGS, allow_view=True)
+    assert not np.shares_memory(gathered, markers)
+
+
+def test_leg_marker_schema():
+    marker_names = [f"{keypoint}{leg}" for leg in range(1, 11) for keypoint in KEYPOINTS] + BODY_MARKERS
+    schema = get_leg_marker_schema(marker_names)
+    assert get_leg_marker_schema(marker_names) is schema
+
+    # Leg 1 is not confused with leg 10
+    assert schema.leg_ids == list(range(1, 11))
+    assert schema.names[0] == ["claw1", "tibiametatarsus1", "patella1", "coxa1"]
+    assert schema.names[9] == ["claw10", "tibiametatarsus10", "patella10", "coxa10"]
+    np.testing.assert_array_equal(schema.non_leg_indices, np.arange(40, 44))
+
+    with pytest.raises(ValueError, match="No markers found for legs"):
+        get_leg_marker_schema(marker_names, num_legs=12)
+
+
+# ------------------------- normalise_legs -----------------------------
+
+@pytest.mark.parametrize("chunk_size", [7, 1000])
+def test_normalise_blocked_matches_stages(chunk_size):
+    all_legs = make_legs()
+    expected = combine_legs(reflect_legs(make_coxa_origin(all_legs)[0]))
+
+    combined, coxa = normalise_legs(all_legs, chunk_size=chunk_size)
+    np.testing.assert_array_equal(combined, expected)
+    np.testing.assert_array_equal(coxa, all_legs[:, :, -1:])
+
+    flat, _ = normalise_legs(all_legs, flat=True)
+    np.testing.assert_array_equal(flat, expected.reshape(-1, N_KEYPOINTS * 3))
+
+
+def test_normalise_interleaved_matches_stages():
+    all_legs = make_legs()
+    expected = combine_legs(reflect_legs(make_coxa_origin(all_legs)[0]))
+
+    combined, _ = normalise_legs(all_legs, layout="interleaved", chunk_size=7)
+    np.testing.assert_array_equal(combined, interleave(expected, 2))
+
+
+def test_normalise_without_reflection():
+    all_legs = make_legs()
+    expected = combine_legs(make_coxa_origin(all_legs)[0])
+
+    combined, _ = normalise_legs(all_legs, reflect=False)
+    np.testing.assert_array_equal(combined, expected)
+
+
+def test_normalise_in_place():
+    all_legs = make_legs()
+    expected = interleave(combine_legs(reflect_legs(make_coxa_origin(all_legs)[0])), 2)
+
+    buffer = all_legs.copy()
+    combined, coxa = normalise_legs(buffer, layout="interleaved", out=buffer, chunk_size=7)
+    assert np.shares_memory(combined, buffer)
+    np.testing.assert_array_equal(combined, expected)
+    np.testing.assert_array_equal(coxa, all_legs[:, :, -1:])
+
+    with pytest.raises(ValueError, match="In-place"):
+        normalise_legs(buffer, layout="blocked", out=buffer)
+
+
+def test_normalise_interleaved_needs_contiguous_out():
+    all_legs = make_legs()
+    shape = (N_FRAMES * 2, N_LEGS // 2, N_KEYPOINTS, 3)
+    out = np.empty(shape, order="F")
+    with pytest.raises(ValueError, match="C-contiguous"):
+        normalise_legs(all_legs, layout="interleaved", out=out)
+
+    # Blocked rows are written through slices, which any out supports
+    combined, _ = normalise_legs(all_legs, out=out)
+    assert combined is out
+    np.testing.assert_array_equal(out, normalise_legs(all_legs)[0])
+
+    # In place on a non-contiguous array would write into a copy
+    buffer = np.asfortranarray(all_legs)
+    with pytest.raises(ValueError, match="C-contiguous"):
+        normalise_legs(buffer, layout="interleaved", out=buffer)
+
+
+def test_denormalise_non_contiguous_input():
+    all_legs = make_legs()
+    combined, coxa = normalise_legs(all_legs, layout="interleaved")
+    restored = denormalise_legs(np.asfortranarray(combined), coxa, layout="interleaved", chunk_size=7)
+    np.testing.assert_allclose(restored, all_legs, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("layout", ["blocked", "interleaved"])
+@pytest.mark.parametrize(("n_groups", "reflect"), [(1, True), (2, True), (2, False), (8, True)])
+def test_denormalise_round_trip(layout, n_groups, reflect):
+    all_legs = make_legs()
+    combined, coxa = normalise_legs(all_legs, n_groups=n_groups, reflect=reflect, layout=layout, flat=True)
+    restored = denormalise_legs(combined, coxa, n_groups=n_groups, reflect=reflect, layout=layout,
+                                chunk_size=7)
+    np.testing.assert_allclose(restored, all_legs, rtol=0, atol=1e-12)
+
+
+# ------------------------- put_legs_back -----------------------------
+
+def loop_put_legs_back(all_legs, all_legs_names, original_marker_names, spider3d_markers,
+                       original_markers=None):
+    """
+    The original name-by-name implementation of put_legs_back.
+    """
+    reconstructed_markers = np.zeros((all_legs.shape[0], spider3d_markers.shape[1], all_legs.shape[3]))
+
+    leg_marker_to_aligned_index = {}
+    for leg_idx, leg_marker_names_per_leg in enumerate(all_legs_names):
+        for marker_idx, marker_name in enumerate(leg_marker_names_per_leg):
+            leg_marker_to_aligned_index[marker_name] = (leg_idx, marker_idx)
+
+    for marker_idx, marker_name in enumerate(original_marker_names):
+        if marker_name in leg_marker_to_aligned_index:
+            leg_idx, leg_marker_idx = leg_marker_to_aligned_index[marker_name]
+            reconstructed_markers[:, marker_idx, :] = all_legs[:, leg_idx, leg_marker_idx, :]
+        elif original_markers is not None:
+            reconstructed_markers[:, marker_idx, :] = original_markers[:, marker_idx, :]
+        else:
+            reconstructed_markers[:, marker_idx, :] = spider3d_markers[:, marker_idx, :]
+
+    if original_markers is None:
+        coxa_markers_indices = [original_marker_names.index(name)
+                                for name in original_marker_names if "coxa" in name]
+        reconstructed_markers[:, coxa_markers_indices, :] = spider3d_markers[:, coxa_markers_indices, :]
+
+    return reconstructed_markers
+
+
+def make_scatter_inputs(n_extra_markers=0):
+    rng = np.random.default_rng(1)
+    marker_names = make_marker_names()
+    markers = rng.normal(size=(N_FRAMES, len(marker_names), 3))
+    all_legs, all_legs_names, _ = get_all_legs_markers(marker_names, markers, N_LEGS)
+    spider3d_markers = rng.normal(size=(1, len(marker_names) + n_extra_markers, 3))
+    return all_legs + 1.0, all_legs_names, marker_names, spider3d_markers, markers
+
+
+@pytest.mark.parametrize("use_original", [False, True])
+def test_put_legs_back_matches_loop(use_original):
+    all_legs, all_legs_names, marker_names, spider3d_markers, markers = make_scatter_inputs()
+    original_markers = markers if use_original else None
+
+    expected = loop_put_legs_back(all_legs, all_legs_names, marker_names, spider3d_markers, original_markers)
+    result = put_legs_back(all_legs, all_legs_names, marker_names, spider3d_markers, original_markers)
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_put_legs_back_extra_markers():
+    # spider3d has more markers than the names, the extra ones are left at zero
+    all_legs, all_legs_names, marker_names, spider3d_markers, _ = make_scatter_inputs(n_extra_markers=2)
+
+    expected = loop_put_legs_back(all_legs, all_legs_names, marker_names, spider3d_markers)
+    result = put_legs_back(all_legs, all_legs_names, marker_names, spider3d_markers)
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_scatter_plan_reuse_and_out():
+    all_legs, all_legs_names, marker_names, spider3d_markers, _ = make_scatter_inputs()
+    plan = get_leg_scatter_plan(all_legs_names, marker_names)
+    assert get_leg_scatter_plan(all_legs_names, marker_names) is plan
+
+    expected = loop_put_legs_back(all_legs, all_legs_names, marker_names, spider3d_markers)
+    out = np.full_like(expected, np.nan)
+    result = put_legs_back(all_legs, all_legs_names, marker_names, spider3d_markers, plan=plan, out=out)
+    assert result is out
+    np.testing.assert_array_equal(out, expected)
+
+
+# ------------------------- restore_leg_positions -----------------------------
+
+def repeat_restore_leg_positions(reconstructed_frames, spider3d, all_legs_names):
+    """
+    The original np.repeat implementation of restore_leg_positions.
+    """
+    coxa_indices = spider3d.skeleton_definition.get_marker_indices([f"coxa{i}" for i in range(1, N_LEGS + 1)])
+
+    reconstructed_frames = np.repeat(np.expand_dims(reconstructed_frames, axis=1), N_LEGS, axis=1)
+    original_coxa_positions = np.repeat(spider3d.markers[:, coxa_indices, :], reconstructed_frames.shape[0], axis=0)
+    original_coxa_positions = np.expand_dims(original_coxa_positions, axis=2)
+
+    restored_legs = reflect_legs(reconstructed_frames) + original_coxa_positions
+    return loop_put_legs_back(restored_legs, all_legs_names, spider3d.marker_names,
+                              spider3d.markers.reshape(1, -1, 3))
+
+
+def make_spider3d():
+    marker_names = make_marker_names()
+    markers = np.random.default_rng(2).normal(size=(1, len(marker_names), 3))
+    skeleton_definition = SimpleNamespace(
+        get_marker_indices=lambda names: [marker_names.index(name) for name in names])
+    return SimpleNamespace(marker_names=marker_names, markers=markers, skeleton_definition=skeleton_definition)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1000])
+def test_restore_leg_positions_matches_repeat(chunk_size):
+    spider3d = make_spider3d()
+    _, all_legs_names, _ = get_all_legs_markers(spider3d.marker_names, spider3d.markers, N_LEGS)
+    reconstructed_frames = np.random.default_rng(3).normal(size=(N_FRAMES, N_KEYPOINTS, 3))
+
+    expected = repeat_restore_leg_positions(reconstructed_frames, spider3d, all_legs_names)
+    result = restore_leg_positions(reconstructed_frames, spider3d, all_legs_names, chunk_size=chunk_size)
+    np.testing.assert_array_equal(result, expected)
+
+    out = np.empty_like(expected)
+    assert restore_leg_positions(reconstructed_frames, spider3d, all_legs_names, out=out) is out
+    np.testing.assert_array_equal(out, expected)
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from spiderpca import iter_spider_data_chunks, load_and_process_spider_data, load_spider_data_chunked
+
+
+def write_csv(path, n_rows=200, seed=0):
+    """
+    Marker, center marker and metadata columns, with NaNs in each kind of column.
+    """
+    rng = np.random.default_rng(seed)
+    data = {f"{marker}_{axis}": rng.normal(size=n_rows) * 1000
+            for marker in ["claw1", "coxa1", "center"] for axis in "xyz"}
+    data["species"] = np.where(np.arange(n_rows) % 3 == 0, "A", "B")
+    data["time_in_frames"] = np.arange(n_rows, dtype=float)
+
+    df = pd.DataFrame(data)
+    df.loc[[5, 40, 41], "center_y"] = np.nan
+    df.loc[[10, 99], "claw1_x"] = np.nan
+    df.loc[[17, 150], "time_in_frames"] = np.nan
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("species", [None, "A"])
+@pytest.mark.parametrize("chunksize", [7, 1000])
+def test_chunked_matches_in_memory(tmp_path, species, chunksize):
+    source = write_csv(tmp_path / "source.csv")
+
+    markers, marker_columns, spider_df = load_and_process_spider_data(source, species=species)
+    chunked, chunked_columns, chunked_df = load_and_process_spider_data(
+        source, species=species, chunksize=chunksize, nan_over_all_columns=True)
+
+    assert chunked_columns == marker_columns
+    np.testing.assert_array_equal(chunked, markers)
+    pd.testing.assert_frame_equal(chunked_df, spider_df[list(chunked_df.columns)])
+
+
+def test_chunk_iterator_matches_in_memory(tmp_path):
+    source = write_csv(tmp_path / "source.csv")
+    markers, _, spider_df = load_and_process_spider_data(source)
+
+    chunks = list(iter_spider_data_chunks(source, chunksize=30, nan_over_all_columns=True))
+    np.testing.assert_array_equal(np.concatenate([chunk[0] for chunk in chunks]), markers)
+    np.testing.assert_array_equal(pd.concat([chunk[2] for chunk in chunks]).index,
+                                  spider_df.index)
+
+
+def test_chunked_memmap_matches_in_memory(tmp_path):
+    source = write_csv(tmp_path / "source.csv")
+    markers, _, _ = load_and_process_spider_data(source)
+
+    chunked, _, _ = load_and_process_spider_data(source, chunksize=25,
+                                                 memmap_path=tmp_path / "markers.mmap",
+                                                 nan_over_all_columns=True)
+    assert isinstance(chunked, np.memmap)
+    np.testing.assert_array_equal(chunked, markers)
+
+
+@pytest.mark.parametrize("species", [None, "B"])
+def test_chunked_drops_nan_in_parsed_columns(tmp_path, species):
+    source = write_csv(tmp_path / "source.csv")
+    markers, marker_columns, spider_df = load_and_process_spider_data(source, species=species,
+                                                                      remove_nan=False)
+    # The excluded center markers are not parsed, so their NaNs keep the row
+    keep = ~(np.isnan(markers).any(axis=(1, 2))
+             | spider_df[["species", "time_in_frames"]].isna().any(axis=1).to_numpy())
+
+    chunked, chunked_columns, chunked_df = load_and_process_spider_data(source, species=species,
+                                                                        chunksize=30)
+
+    assert chunked_columns == marker_columns
+    np.testing.assert_array_equal(chunked, markers[keep])
+    np.testing.assert_array_equal(chunked_df.index, spider_df.index[keep])
+    assert spider_df["center_y"][keep].isna().any()
+
+
+@pytest.mark.parametrize(("nan_over_all_columns", "expected"), [
+    (False, {"claw1_x", "claw1_y", "claw1_z", "coxa1_x", "coxa1_y", "coxa1_z", "species"}),
+    (True, None),
+])
+def test_parsed_columns(tmp_path, monkeypatch, nan_over_all_columns, expected):
+    source = write_csv(tmp_path / "source.csv")
+    header = list(pd.read_csv(source, nrows=0).columns)
+    parsed = []
+    read_csv = pd.read_csv
+
+    def recording_read_csv(*args, **kwargs):
+        if "chunksize" in kwargs:
+            parsed.append({col for col in header if kwargs["usecols"](col)})
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", recording_read_csv)
+    load_spider_data_chunked(source, species="A", metadata_columns=[], chunksize=50,
+                             nan_over_all_columns=nan_over_all_columns)
+    list(iter_spider_data_chunks(source, species="A", metadata_columns=[], chunksize=50,
+                                 nan_over_all_columns=nan_over_all_columns))
+
+    assert parsed == [expected or set(header)] * 2
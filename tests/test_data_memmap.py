@@ -0,0 +1,143 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from spiderpca import (combine_legs, create_memmap, get_all_legs_markers,
+                       load_and_process_spider_data, make_coxa_origin, normalise_legs,
+                       reflect_legs)
+from spiderpca.data_memmap import allocate_like, frame_chunks, is_memmap, open_memmap
+
+N_FRAMES = 30
+N_LEGS = 8
+KEYPOINTS = ["claw", "tibiametatarsus", "patella", "coxa"]
+
+
+def make_memmap_legs(tmp_path, seed=0):
+    legs = np.random.default_rng(seed).normal(size=(N_FRAMES, N_LEGS, len(KEYPOINTS), 3))
+    mapped = create_memmap(tmp_path / "legs.mmap", legs.shape)
+    mapped[:] = legs
+    return legs, mapped
+
+
+# ------------------------- data_memmap -----------------------------
+
+def test_create_memmap(tmp_path):
+    mapped = create_memmap(tmp_path / "a.mmap", (4, 2, 3), dtype=np.float32)
+    assert is_memmap(mapped)
+    assert mapped.shape == (4, 2, 3)
+    assert mapped.dtype == np.float32
+    assert os.path.getsize(tmp_path / "a.mmap") == 4 * 2 * 3 * 4
+
+    mapped[:] = 1.5
+    mapped.flush()
+    np.testing.assert_array_equal(open_memmap(tmp_path / "a.mmap", (4, 2, 3), np.float32, mode="r"),
+                                  np.full((4, 2, 3), 1.5))
+
+
+def test_create_memmap_without_frames(tmp_path):
+    mapped = create_memmap(tmp_path / "empty.mmap", (0, 2, 3))
+    assert is_memmap(mapped)
+    assert mapped.shape == (0, 2, 3)
+    assert os.path.getsize(tmp_path / "empty.mmap") == 0
+    mapped.flush()
+
+    assert open_memmap(tmp_path / "empty.mmap", (0, 2, 3)).shape == (0, 2, 3)
+
+
+def test_allocate_like(tmp_path):
+    in_memory = allocate_like(np.zeros((3, 2)), (5, 4), dtype=np.float32)
+    assert not is_memmap(in_memory)
+    assert in_memory.shape == (5, 4)
+    assert in_memory.dtype == np.float32
+
+    template = create_memmap(tmp_path / "template.mmap", (3, 2))
+    out = allocate_like(template, (5, 4))
+    assert is_memmap(out)
+    assert out.shape == (5, 4)
+    assert out.dtype == template.dtype
+    if os.name == "posix":
+        # The temporary file is unlinked straight away
+        assert os.listdir(tmp_path) == ["template.mmap"]
+
+
+@pytest.mark.parametrize(("n_frames", "chunk_size"), [(0, 4), (3, 4), (8, 4), (10, 4)])
+def test_frame_chunks(n_frames, chunk_size):
+    chunks = list(frame_chunks(n_frames, chunk_size))
+    assert all(chunk.stop - chunk.start <= chunk_size for chunk in chunks)
+    covered = np.concatenate([np.arange(n_frames)[chunk] for chunk in chunks] + [np.array([], int)])
+    np.testing.assert_array_equal(covered, np.arange(n_frames))
+
+
+# ------------------------- data_legs on memmaps -----------------------------
+
+def test_get_all_legs_markers_memmap(tmp_path):
+    names = [f"{keypoint}{leg}" for leg in range(1, N_LEGS + 1) for keypoint in KEYPOINTS]
+    markers = np.random.default_rng(0).normal(size=(N_FRAMES, len(names), 3))
+    mapped = create_memmap(tmp_path / "markers.mmap", markers.shape)
+    mapped[:] = markers
+
+    expected, expected_names, _ = get_all_legs_markers(names, markers, N_LEGS)
+    all_legs, leg_names, _ = get_all_legs_markers(names, mapped, N_LEGS)
+    assert is_memmap(all_legs)
+    assert leg_names == expected_names
+    np.testing.assert_array_equal(all_legs, expected)
+
+
+def test_leg_stages_memmap(tmp_path):
+    legs, mapped = make_memmap_legs(tmp_path)
+
+    translated, coxa = make_coxa_origin(mapped)
+    expected_translated, expected_coxa = make_coxa_origin(legs)
+    assert is_memmap(translated)
+    np.testing.assert_array_equal(translated, expected_translated)
+    np.testing.assert_array_equal(coxa, expected_coxa)
+
+    reflected = reflect_legs(translated)
+    assert is_memmap(reflected)
+    np.testing.assert_array_equal(reflected, reflect_legs(expected_translated))
+
+    combined = combine_legs(reflected)
+    assert is_memmap(combined)
+    np.testing.assert_array_equal(combined, combine_legs(reflect_legs(expected_translated)))
+
+
+def test_normalise_legs_memmap(tmp_path):
+    legs, mapped = make_memmap_legs(tmp_path)
+
+    combined, coxa = normalise_legs(mapped, chunk_size=7)
+    expected, expected_coxa = normalise_legs(legs)
+    assert is_memmap(combined)
+    assert is_memmap(coxa)
+    np.testing.assert_array_equal(combined, expected)
+    np.testing.assert_array_equal(coxa, expected_coxa)
+
+
+# ------------------------- loading into memmaps -----------------------------
+
+@pytest.mark.parametrize("chunksize", [None, 4])
+def test_load_memmap_without_frames(tmp_path, chunksize):
+    data = {f"claw1_{axis}": np.arange(10.0) for axis in "xyz"}
+    data["species"] = "A"
+    data["sq_level"] = np.nan
+    pd.DataFrame(data).to_csv(tmp_path / "source.csv", index=False)
+
+    markers, _, spider_df = load_and_process_spider_data(tmp_path / "source.csv", chunksize=chunksize,
+                                                         memmap_path=tmp_path / "markers.mmap")
+    assert is_memmap(markers)
+    assert markers.shape == (0, 1, 3)
+    assert len(spider_df) == 0
+    assert os.path.getsize(tmp_path / "markers.mmap") == 0
+
+
+def test_chunked_memmap_file_holds_only_kept_frames(tmp_path):
+    data = {f"claw1_{axis}": np.arange(10.0) for axis in "xyz"}
+    data["sq_level"] = np.where(np.arange(10) < 4, np.nan, 1.0)
+    pd.DataFrame(data).to_csv(tmp_path / "source.csv", index=False)
+
+    markers, _, _ = load_and_process_spider_data(tmp_path / "source.csv", chunksize=3,
+                                                 memmap_path=tmp_path / "markers.mmap")
+    assert markers.shape == (6, 1, 3)
+    np.testing.assert_array_equal(markers[:, 0, 0], np.arange(4.0, 10.0) / 1000)
+    assert os.path.getsize(tmp_path / "markers.mmap") == markers.nbytes
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from spiderpca import undo_body_rotation
+
+N_FRAMES = 200
+N_MARKERS = 10
+
+
+def loop_undo_body_rotation(markers, whole_body_angle, which_axis):
+    """
+    The original per-frame implementation of undo_body_rotation.
+    """
+    body_pitch_rad = np.radians(whole_body_angle)
+    corrected_markers = np.empty_like(markers)
+
+    for i in range(markers.shape[0]):
+        pitch = body_pitch_rad[i]
+        if which_axis == 'z':
+            rotation_matrix = np.array([
+                [1, 0, 0],
+                [0, np.cos(pitch), -np.sin(pitch)],
+                [0, np.sin(pitch), np.cos(pitch)]
+            ])
+        elif which_axis == 'x':
+            rotation_matrix = np.array([
+                [np.cos(pitch), 0, np.sin(pitch)],
+                [0, 1, 0],
+                [-np.sin(pitch), 0, np.cos(pitch)]
+            ])
+        else:
+            rotation_matrix = np.array([
+                [np.cos(pitch), -np.sin(pitch), 0],
+                [np.sin(pitch), np.cos(pitch), 0],
+                [0, 0, 1]
+            ])
+        corrected_markers[i] = markers[i] @ rotation_matrix.T
+
+    return corrected_markers
+
+
+def make_inputs(dtype=np.float64, seed=0):
+    rng = np.random.default_rng(seed)
+    markers = rng.normal(scale=0.02, size=(N_FRAMES, N_MARKERS, 3)).astype(dtype)
+    angles = rng.uniform(-180, 180, size=N_FRAMES)
+    return markers, angles
+
+
+@pytest.mark.parametrize("which_axis", ["x", "y", "z"])
+def test_matches_loop(which_axis):
+    markers, angles = make_inputs()
+    expected = loop_undo_body_rotation(markers, angles, which_axis)
+    result = undo_body_rotation(markers, angles, which_axis=which_axis)
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("which_axis", ["x", "y", "z"])
+def test_in_place(which_axis):
+    markers, angles = make_inputs()
+    expected = loop_undo_body_rotation(markers, angles, which_axis)
+    result = undo_body_rotation(markers, angles, which_axis=which_axis, out=markers)
+    assert result is markers
+    np.testing.assert_array_equal(markers, expected)
+
+
+@pytest.mark.parametrize("which_axis", ["x", "y", "z"])
+def test_float32(which_axis):
+    markers, angles = make_inputs(np.float32)
+    expected = loop_undo_body_rotation(markers, angles, which_axis)
+    result = undo_body_rotation(markers, angles, which_axis=which_axis)
+    assert result.dtype == np.float32
+    np.testing.assert_array_equal(result, expected)
+
+    undo_body_rotation(markers, angles, which_axis=which_axis, out=markers)
+    np.testing.assert_array_equal(markers, expected)
+
+
+def test_angle_column():
+    markers, angles = make_inputs()
+    np.testing.assert_array_equal(undo_body_rotation(markers, angles[:, np.newaxis]),
+                                  undo_body_rotation(markers, angles))
@@ -0,0 +1,73 @@
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from spiderpca import render_figures
+
+N_FRAMES = 200
+
+
+def make_scores_df(seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"PC1": rng.normal(size=N_FRAMES),
+                         "PC2": rng.normal(size=N_FRAMES),
+                         "sq_level": rng.choice(["sq040", "sq100"], size=N_FRAMES)})
+
+
+def plot_square(size, show=True):
+    _, ax = plt.subplots(figsize=(size, size))
+    ax.plot([0, 1], [0, 1])
+    if show:
+        plt.show()
+    return [ax]
+
+
+def image_shape(file_path):
+    return plt.imread(file_path).shape[:2]
+
+
+def test_renders_named_and_callable_functions(tmp_path):
+    specs = [{"function": "plot_pc_histogram",
+              "filename": "histograms/pc1.png",
+              "kwargs": {"pc_number": 1, "conditions": ["sq040", "sq100"], "figsize": (4, 3)},
+              "data": {"scores_df": "scores"}},
+             {"function": plot_square,
+              "filename": "square.png",
+              "kwargs": {"size": 2}}]
+
+    paths = render_figures(specs, str(tmp_path), data={"scores": make_scores_df()},
+                           n_jobs=2, dpi=50)
+
+    assert paths == [os.path.join(str(tmp_path), spec["filename"]) for spec in specs]
+    for path in paths:
+        assert os.path.getsize(path) > 0
+    assert image_shape(paths[0]) == (150, 200)
+    assert image_shape(paths[1]) == (100, 100)
+
+
+def test_savefig_kwargs_and_worker_restarts(tmp_path):
+    specs = [{"function": plot_square, "filename": f"square_{i}.svg", "kwargs": {"size": 1}}
+             for i in range(3)]
+
+    paths = render_figures(specs, str(tmp_path), n_jobs=1, max_tasks_per_child=1,
+                           savefig_kwargs={"transparent": True})
+
+    for path in paths:
+        with open(path) as file:
+            assert "<svg" in file.read()
+
+
+@pytest.mark.parametrize(("spec", "match"), [
+    ({"function": "plot_pc_histogram"}, "no filename"),
+    ({"function": "plot_nothing", "filename": "a.png"}, "Unknown figure function"),
+    ({"filename": "a.png"}, "no function"),
+    ({"function": "plot_pc_histogram", "filename": "a.png", "data": {"scores_df": "scores"}},
+     "missing data: scores"),
+])
+def test_invalid_specs(tmp_path, spec, match):
+    with pytest.raises(ValueError, match=match):
+        render_figures([spec], str(tmp_path))
+    assert os.listdir(tmp_path) == []
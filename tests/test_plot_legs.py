@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from spiderpca import compute_leg_density, plot_leg_overlay
+
+N_FRAMES = 120
+N_LEGS = 8
+N_KEYPOINTS = 4
+
+
+def make_legs(seed=0):
+    rng = np.random.default_rng(seed)
+    # Positions on a 0.05 grid land exactly on bin edges
+    legs = rng.integers(-20, 21, size=(N_FRAMES, N_LEGS, N_KEYPOINTS, 3)) * 0.05
+    legs[:, :, -1] = 0
+    legs[3, 2, 1, 0] = np.nan
+    return legs
+
+
+def expected_counts(legs, bins, extent, axes):
+    keypoints = list(range(N_KEYPOINTS - 1))
+    return np.stack([np.histogramdd(legs[:, leg][:, keypoints][..., axes].reshape(-1, len(axes)),
+                                    bins=bins, range=extent)[0]
+                     for leg in range(N_LEGS)])
+
+
+@pytest.mark.parametrize(("projection", "axes"), [(None, [0, 1, 2]), ("xy", [0, 1]), ("yz", [1, 2])])
+@pytest.mark.parametrize("bins", [10, 40])
+def test_matches_histogramdd(projection, axes, bins):
+    legs = make_legs()
+    extent = [(-1.0, 1.0)] * len(axes)
+    counts, edges = compute_leg_density(legs, bins=bins, extent=extent, projection=projection, chunk_size=50)
+
+    np.testing.assert_array_equal(counts, expected_counts(legs, bins, extent, axes))
+    for axis_edges in edges:
+        np.testing.assert_allclose(axis_edges, np.linspace(-1, 1, bins + 1))
+
+
+def test_partial_extent():
+    legs = make_legs()
+    extent = [(0.0, 0.3), (-0.5, 0.5)]
+    counts, _ = compute_leg_density(legs, bins=10, extent=extent, projection="xz")
+    np.testing.assert_array_equal(counts, expected_counts(legs, 10, extent, [0, 2]))
+
+
+def test_data_extent():
+    legs = make_legs()
+    counts, _ = compute_leg_density(legs, bins=40, chunk_size=7)
+    finite = np.isfinite(legs[:, :, :-1]).all(axis=-1)
+    assert counts.sum() == finite.sum()
+
+
+def trace_points(trace):
+    return np.column_stack([np.asarray(trace.x, dtype=np.float64),
+                            np.asarray(trace.y, dtype=np.float64),
+                            np.asarray(trace.z, dtype=np.float64)])
+
+
+def test_overlay_merged_matches_traces():
+    legs = make_legs()
+    fig_traces = plot_leg_overlay(legs, num_samples=10, mode="traces", seed=3)
+    fig_merged = plot_leg_overlay(legs, num_samples=10, mode="merged", seed=3)
+
+    assert len(fig_traces.data) == 2 * N_LEGS * 10
+    assert len(fig_merged.data) == 2 * N_LEGS
+    for leg in range(N_LEGS):
+        # traces mode alternates a leg trace and its end marker, frame by frame
+        per_frame = fig_traces.data[2 * leg * 10:2 * (leg + 1) * 10]
+        separator = np.full((1, 3), np.nan)
+        expected_path = np.concatenate([np.concatenate([trace_points(trace), separator])
+                                        for trace in per_frame[::2]])
+        expected_ends = np.concatenate([trace_points(trace) for trace in per_frame[1::2]])
+
+        path, ends = fig_merged.data[2 * leg], fig_merged.data[2 * leg + 1]
+        np.testing.assert_array_equal(trace_points(path), expected_path)
+        np.testing.assert_array_equal(trace_points(ends), expected_ends)
+        assert path.connectgaps is False
+
+
+def test_overlay_seed():
+    legs = make_legs()
+    first = plot_leg_overlay(legs, num_samples=5, mode="merged", seed=1)
+    second = plot_leg_overlay(legs, num_samples=5, mode="merged", seed=1)
+    np.testing.assert_array_equal(trace_points(first.data[0]), trace_points(second.data[0]))
+
+
+def test_overlay_density():
+    legs = make_legs()
+    fig = plot_leg_overlay(legs, mode="density")
+    counts, _ = compute_leg_density(legs)
+
+    assert [trace.type for trace in fig.data] == ["isosurface"] * N_LEGS
+    for leg, trace in enumerate(fig.data):
+        np.testing.assert_allclose(np.asarray(trace.value), counts[leg].ravel() / counts[leg].max())
+
+
+def test_overlay_invalid_mode():
+    with pytest.raises(ValueError, match="Invalid mode"):
+        plot_leg_overlay(make_legs(), mode="lines")